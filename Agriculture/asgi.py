@@ -7,5 +7,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Agriculture.settings')
+# Serve the API through the native async views (see App.async_views)
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
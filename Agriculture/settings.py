@@ -29,6 +29,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'App.metrics.MetricsMiddleware',
+    'App.querylog.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -62,14 +65,54 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Agriculture.wsgi.application'
 
+# Route the API list/detail views and /api/suggest/ to their native async
+# versions (App.async_views). Agriculture/asgi.py switches this on.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'database.db'),
+        # Keep connections (and their PRAGMAs) across requests
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            # Take the write lock at BEGIN, where busy_timeout applies, instead
+            # of failing when a read transaction upgrades to a write
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# SQLite tuning profile (App.sqlite): WAL, synchronous=NORMAL, busy_timeout,
+# mmap/cache sizes applied to every connection, plus retries of locked writes.
+SQLITE_TUNING = True
+SQLITE_PRAGMAS = {}  # overrides of App.sqlite.DEFAULT_PRAGMAS; None drops one
+SQLITE_SERIALIZE_WRITES = True  # queue this process's writers before BEGIN
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_BACKOFF = 0.05  # seconds, doubled per retry
+
+# /api/health/ready/ (App.health): a check over its threshold makes the worker
+# not ready (503); results are reused for HEALTH_CACHE_TTL seconds
+HEALTH_THRESHOLDS = {
+    'database_ms': 250.0,  # SELECT 1 round trip
+    'cache_ms': 50.0,      # cache set + get
+    'pool_waiting': 5,     # requests queued for a pooled connection
+    'write_queue': 20,     # writers queued on the SQLite write lock
+}
+HEALTH_CACHE_TTL = 2.0
+
+# Per-route request metrics at /metrics (App.metrics). Multi-process servers
+# point METRICS_DIR at a directory shared by the workers, emptied at startup.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5.0  # seconds between writes of a worker's totals
+
+# Per-view SQL query budgets and N+1 detection (App.querylog): 'off', 'warn'
+# (log requests over budget) or 'raise' (fail them, as the tests do)
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn' if DEBUG else 'off')
+QUERY_BUDGETS = {}  # overrides of App.querylog.DEFAULT_BUDGETS by URL name
+QUERY_REPEAT_THRESHOLD = 3  # runs of one query shape that count as N+1
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
@@ -78,6 +121,21 @@ AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator', },
 ]
 
+# Caches. 'responses' backs the API read-through cache (App.response_cache);
+# settings_prod.py can move it to a file or shared backend.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'App.cache_backends.CountingLocMemCache',
+        'LOCATION': 'agri-responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
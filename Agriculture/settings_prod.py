@@ -2,6 +2,7 @@
 settings_prod.py - Production-specific settings for Django
 """
 
+import importlib.util
 import os
 from Agriculture.settings import *
 
@@ -22,9 +23,53 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Validate a reused connection before handing it to a request (with
+        # pooling: psycopg_pool's check on every checkout)
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection reuse. DB_POOL=1 (default) keeps a psycopg connection pool per
+# process (Django >= 5.1, needs psycopg[pool]); pooling cannot be combined with
+# persistent connections, so without it each thread keeps its own connection
+# for DB_CONN_MAX_AGE seconds instead. /api/db/ reports the pool counters.
+DB_POOL = os.environ.get('DB_POOL', '1').lower() in ('1', 'true', 'yes')
+if DB_POOL and importlib.util.find_spec('psycopg_pool') is None:
+    DB_POOL = False  # optional dependency missing: fall back to persistent connections
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            # seconds a request waits for a free connection before failing
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            # close connections idle this long, down to min_size
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            # recycle every connection after this long
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# API response cache: RESPONSE_CACHE=locmem (per process, default), file or redis
+RESPONSE_CACHE = os.environ.get('RESPONSE_CACHE', 'locmem')
+if RESPONSE_CACHE == 'file':
+    CACHES['responses'] = {
+        'BACKEND': 'App.cache_backends.CountingFileBasedCache',
+        'LOCATION': os.environ.get('RESPONSE_CACHE_DIR', '/var/tmp/agri_response_cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+elif RESPONSE_CACHE == 'redis':
+    CACHES['responses'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'agri',
+    }
+
 # Security settings
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True
@@ -3,118 +3,148 @@
 This module provides deterministic suggestions (no external APIs).
 It is intentionally small and explainable so farmers can trust the outputs.
 """
+import logging
+import os
+import threading
+import time
 from datetime import datetime
 
+from django.conf import settings
+
+from .rule_engine import RuleEngine, RuleError
+
+logger = logging.getLogger(__name__)
+
+# Declarative rule table (see rule_engine for the format). Point the
+# AI_RULES_FILE setting at a JSON file of the same shape to replace it; the
+# file is re-read when it changes.
+DEFAULT_RULES = {
+    'suggestions': {
+        'ph_very_acidic': {'action': 'Apply lime (chalk) carefully',
+                           'reason': 'soil pH={value} (very acidic) — lime raises pH', 'confidence': 0.8},
+        'ph_acidic': {'action': 'Apply organic compost / jivamrut',
+                      'reason': 'soil pH={value} (slightly acidic) — organic matter buffers pH', 'confidence': 0.7},
+        'ph_alkaline': {'action': 'Reduce alkalinity — use acidifying organic matter',
+                        'reason': 'soil pH={value} (alkaline)', 'confidence': 0.6},
+        'dry': {'action': 'Increase irrigation frequency',
+                'reason': 'moisture={value}% — soil is dry', 'confidence': 0.9},
+        'waterlogged': {'action': 'Improve drainage and reduce watering',
+                        'reason': 'moisture={value}% — soil is waterlogged', 'confidence': 0.85},
+        'mirchi': {'action': 'Mulch and drip irrigation',
+                   'reason': 'Mirchi benefits from consistent moisture and mulching', 'confidence': 0.8},
+        'methi': {'action': 'Avoid over-watering; light irrigation',
+                  'reason': 'Methi prefers well-drained soil', 'confidence': 0.75},
+        'sandy': {'action': 'Increase organic matter and mulch',
+                  'reason': 'Sandy soils hold less water and nutrients', 'confidence': 0.8},
+        'clay': {'action': 'Improve drainage, consider raised beds',
+                 'reason': 'Clay soils may compact and hold too much water', 'confidence': 0.75},
+        'balanced': {'action': 'Soil looks balanced — maintain organic practices',
+                     'reason': 'No specific issues detected from provided inputs', 'confidence': 0.5},
+        'irrigate_now': {'action': 'Immediate irrigation advised',
+                         'reason': 'No watering for {value} days — risk of crop stress', 'confidence': 0.9},
+        'check_moisture': {'action': 'Check soil moisture; consider irrigation',
+                           'reason': '{value} days since last water', 'confidence': 0.7},
+    },
+    'rules': [
+        # PH based suggestions
+        {'input': 'soil_ph', 'lt': 5.5, 'suggest': 'ph_very_acidic'},
+        {'input': 'soil_ph', 'gte': 5.5, 'lt': 6.5, 'suggest': 'ph_acidic'},
+        {'input': 'soil_ph', 'gt': 8.0, 'suggest': 'ph_alkaline'},
+        # Moisture based suggestions
+        {'input': 'moisture', 'lt': 20, 'suggest': 'dry'},
+        {'input': 'moisture', 'gt': 80, 'suggest': 'waterlogged'},
+        # Crop-specific tips
+        {'input': 'crop', 'keywords': ['mirchi', 'chili'], 'suggest': 'mirchi'},
+        {'input': 'crop', 'keywords': ['methi', 'fenugreek'], 'suggest': 'methi'},
+        # Soil type tips
+        {'input': 'soil_type', 'keywords': ['sandy'], 'suggest': 'sandy'},
+        {'input': 'soil_type', 'keywords': ['clay'], 'suggest': 'clay'},
+        {'otherwise': True, 'suggest': 'balanced'},
+        # Irrigation timing
+        {'input': 'days_since_last_water', 'gte': 10, 'suggest': 'irrigate_now'},
+        {'input': 'days_since_last_water', 'gte': 5, 'lt': 10, 'suggest': 'check_moisture'},
+    ],
+}
+
+_default_engine = RuleEngine(DEFAULT_RULES)
+_engine = _default_engine
+_loaded = None         # (path, mtime) of the rules file in use
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_engine():
+    """The compiled rule engine, reloading AI_RULES_FILE if it has changed.
+
+    The file is stat'ed at most every AI_RULES_CHECK_INTERVAL seconds. A file
+    that fails to load is logged and the previous rules stay in effect.
+    """
+    global _engine, _loaded, _checked_at
+    path = getattr(settings, 'AI_RULES_FILE', None)
+    if not path:
+        return _default_engine
+    now = time.monotonic()
+    if now - _checked_at < getattr(settings, 'AI_RULES_CHECK_INTERVAL', 2.0):
+        return _engine
+    with _reload_lock:
+        _checked_at = now
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if _loaded != (path, mtime):
+                _engine = RuleEngine.from_file(path)
+                _loaded = (path, mtime)
+                logger.info('Loaded suggestion rules from %s', path)
+        except (OSError, RuleError) as e:
+            logger.error('Keeping current suggestion rules; could not load %s: %s', path, e)
+    return _engine
+
+
+def reload_rules():
+    """Force the next :func:`get_engine` call to re-check the rules file."""
+    global _checked_at, _loaded
+    with _reload_lock:
+        _checked_at = 0.0
+        _loaded = None
+
+
+def _timestamp():
+    return datetime.utcnow().isoformat() + 'Z'
+
 
 def suggest_for_soil(soil_ph=None, moisture=None, soil_type=None, crop=None):
-    suggestions = []
-
-    # PH based suggestions
-    if soil_ph is not None:
-        if soil_ph < 5.5:
-            suggestions.append({
-                'action': 'Apply lime (chalk) carefully',
-                'reason': f'soil pH={soil_ph} (very acidic) — lime raises pH',
-                'confidence': 0.8,
-            })
-        elif soil_ph < 6.5:
-            suggestions.append({
-                'action': 'Apply organic compost / jivamrut',
-                'reason': f'soil pH={soil_ph} (slightly acidic) — organic matter buffers pH',
-                'confidence': 0.7,
-            })
-        elif soil_ph > 8.0:
-            suggestions.append({
-                'action': 'Reduce alkalinity — use acidifying organic matter',
-                'reason': f'soil pH={soil_ph} (alkaline)',
-                'confidence': 0.6,
-            })
-
-    # Moisture based suggestions
-    if moisture is not None:
-        if moisture < 20:
-            suggestions.append({
-                'action': 'Increase irrigation frequency',
-                'reason': f'moisture={moisture}% — soil is dry',
-                'confidence': 0.9,
-            })
-        elif moisture > 80:
-            suggestions.append({
-                'action': 'Improve drainage and reduce watering',
-                'reason': f'moisture={moisture}% — soil is waterlogged',
-                'confidence': 0.85,
-            })
-
-    # Soil type and crop-specific tips
-    if crop:
-        crop = crop.lower()
-        if 'mirchi' in crop or 'chili' in crop:
-            suggestions.append({
-                'action': 'Mulch and drip irrigation',
-                'reason': 'Mirchi benefits from consistent moisture and mulching',
-                'confidence': 0.8,
-            })
-        if 'methi' in crop or 'fenugreek' in crop:
-            suggestions.append({
-                'action': 'Avoid over-watering; light irrigation',
-                'reason': 'Methi prefers well-drained soil',
-                'confidence': 0.75,
-            })
-
-    # Generic tips
-    if soil_type:
-        st = soil_type.lower()
-        if 'sandy' in st:
-            suggestions.append({
-                'action': 'Increase organic matter and mulch',
-                'reason': 'Sandy soils hold less water and nutrients',
-                'confidence': 0.8,
-            })
-        if 'clay' in st:
-            suggestions.append({
-                'action': 'Improve drainage, consider raised beds',
-                'reason': 'Clay soils may compact and hold too much water',
-                'confidence': 0.75,
-            })
-
-    if not suggestions:
-        suggestions.append({
-            'action': 'Soil looks balanced — maintain organic practices',
-            'reason': 'No specific issues detected from provided inputs',
-            'confidence': 0.5,
-        })
-
-    # Add timestamp and return
     return {
-        'generated_at': datetime.utcnow().isoformat() + 'Z',
-        'suggestions': suggestions,
+        'generated_at': _timestamp(),
+        'suggestions': get_engine().suggest({
+            'soil_ph': soil_ph,
+            'moisture': moisture,
+            'soil_type': soil_type,
+            'crop': crop,
+        }),
     }
 
 
 def suggest_actions(payload: dict):
     """High-level entrypoint. Accepts a payload with optional keys:
     - soil_ph, moisture, soil_type, crop, days_since_last_water
+
+    plus any other input named in the active rule table.
     """
-    soil_ph = payload.get('soil_ph')
-    moisture = payload.get('moisture')
-    soil_type = payload.get('soil_type')
-    crop = payload.get('crop')
-    days = payload.get('days_since_last_water')
-
-    out = suggest_for_soil(soil_ph=soil_ph, moisture=moisture, soil_type=soil_type, crop=crop)
-
-    if days is not None:
-        if days >= 10:
-            out['suggestions'].append({
-                'action': 'Immediate irrigation advised',
-                'reason': f'No watering for {days} days — risk of crop stress',
-                'confidence': 0.9,
-            })
-        elif days >= 5:
-            out['suggestions'].append({
-                'action': 'Check soil moisture; consider irrigation',
-                'reason': f'{days} days since last water',
-                'confidence': 0.7,
-            })
-
-    return out
+    return {
+        'generated_at': _timestamp(),
+        'suggestions': get_engine().suggest(payload),
+    }
+
+
+def suggest_actions_batch(columns: dict):
+    """Vectorized :func:`suggest_actions` over columnar inputs.
+
+    ``columns`` maps input names to equal-length lists (``None`` for a
+    missing reading). Threshold rules are resolved with one NumPy
+    ``searchsorted`` per input and keyword rules once per distinct string;
+    the per-plot suggestion lists are identical to calling
+    :func:`suggest_actions` on each plot.
+    """
+    return {
+        'generated_at': _timestamp(),
+        'results': get_engine().suggest_batch(columns),
+    }
@@ -0,0 +1,277 @@
+"""Daily, monthly and seasonal rollups of the record metrics.
+
+Each ``Rollup`` row holds count/sum/min/max of one metric for one farmer and
+period (and crop, for yield), so averages and totals per farmer per month or
+season are read from a few rows instead of the raw history.
+
+Inserts fold their values into the affected rows; deletes subtract them and
+only go back to the history table when a removed value was the bucket's
+minimum or maximum. Updates are a delete of the previous version followed by
+an insert. ``rebuild`` recreates everything with one GROUP BY per table.
+
+Periods use the current time zone. Seasons follow the Indian cropping
+calendar: kharif (June-October), rabi (November-March) and zaid (April-May).
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .latest import KINDS, reading_time
+from .models import CropRecord, Rollup, SoilRecord, WaterRecord
+
+GRANULARITIES = ('day', 'month', 'season')
+
+# model name -> (metric prefix, metric fields, grouping column)
+METRICS = {
+    'CropRecord': ('crop', ('yield_kg',), 'crop_name'),
+    'SoilRecord': ('soil', ('ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture'), None),
+    'WaterRecord': ('water', ('ph', 'ec', 'tds'), None),
+}
+RECORD_MODELS = (CropRecord, SoilRecord, WaterRecord)
+METRIC_NAMES = tuple(f'{prefix}.{field}' for prefix, fields, _ in METRICS.values() for field in fields)
+
+# first month of each season -> (name, first month of the next season)
+SEASONS = {6: ('kharif', 11), 11: ('rabi', 4), 4: ('zaid', 6)}
+
+
+def period_start(day, granularity):
+    if granularity == 'day':
+        return day
+    if granularity == 'month':
+        return day.replace(day=1)
+    if 6 <= day.month <= 10:
+        return date(day.year, 6, 1)
+    if day.month >= 11:
+        return date(day.year, 11, 1)
+    if day.month <= 3:
+        return date(day.year - 1, 11, 1)
+    return date(day.year, 4, 1)
+
+
+def period_end(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    following = SEASONS[start.month][1]
+    return date(start.year + (following < start.month), following, 1)
+
+
+def period_label(start, granularity):
+    if granularity == 'day':
+        return start.isoformat()
+    if granularity == 'month':
+        return start.strftime('%Y-%m')
+    return f'{SEASONS[start.month][0]}-{start.year}'
+
+
+def serialize_rollup(row, granularity):
+    """API shape of one ``Rollup`` values() row."""
+    return {
+        'farmer_id': row['farmer_id'],
+        'period': row['period'].isoformat(),
+        'label': period_label(row['period'], granularity),
+        'crop_name': row['crop_name'] or None,
+        'count': row['count'],
+        'total': row['total'],
+        'average': row['total'] / row['count'] if row['count'] else None,
+        'min': row['minimum'],
+        'max': row['maximum'],
+    }
+
+
+def _local_date(moment):
+    return timezone.localtime(moment).date() if timezone.is_aware(moment) else moment.date()
+
+
+def _local_midnight(day):
+    moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def reading_time_expression(model):
+    return Coalesce('date_recorded', KINDS[model.__name__][1])
+
+
+def _add(buckets, key, count, total, low, high):
+    acc = buckets.get(key)
+    if acc is None:
+        buckets[key] = [count, total, low, high]
+    else:
+        acc[0] += count
+        acc[1] += total
+        acc[2] = min(acc[2], low)
+        acc[3] = max(acc[3], high)
+
+
+def contributions(records):
+    """``{(farmer_id, metric, granularity, period, crop_name): [count, total, min, max]}``."""
+    buckets = {}
+    for record in records:
+        prefix, fields, group = METRICS[type(record).__name__]
+        day = _local_date(reading_time(record))
+        crop_name = getattr(record, group) if group else ''
+        for field in fields:
+            value = getattr(record, field)
+            if value is None:
+                continue
+            for granularity in GRANULARITIES:
+                key = (record.farmer_id, f'{prefix}.{field}', granularity,
+                       period_start(day, granularity), crop_name)
+                _add(buckets, key, 1, value, value, value)
+    return buckets
+
+
+def _key(row):
+    return row.farmer_id, row.metric, row.granularity, row.period, row.crop_name
+
+
+def _locked_rows(buckets):
+    farmer_ids = {key[0] for key in buckets}
+    periods = [key[3] for key in buckets]
+    rows = (Rollup.objects.select_for_update()
+            .filter(farmer_id__in=farmer_ids, metric__in={key[1] for key in buckets},
+                    period__gte=min(periods), period__lte=max(periods)))
+    return {_key(row): row for row in rows if _key(row) in buckets}
+
+
+def _extremes(model, rows, chunk_size=100):
+    """Set ``rows``' minimum and maximum from the history table, reading the
+    buckets of up to ``chunk_size`` rows in one query."""
+    group = METRICS[model.__name__][2]
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        bounds = [(_local_midnight(row.period), _local_midnight(period_end(row.period, row.granularity)))
+                  for row in chunk]
+        aggregates = {}
+        for i, (row, (begin, end)) in enumerate(zip(chunk, bounds)):
+            field = row.metric.split('.', 1)[1]
+            bucket = Q(farmer_id=row.farmer_id, at__gte=begin, at__lt=end)
+            if group:
+                bucket &= Q(**{group: row.crop_name})
+            aggregates[f'low_{i}'] = Min(field, filter=bucket)
+            aggregates[f'high_{i}'] = Max(field, filter=bucket)
+        found = model.objects.annotate(at=reading_time_expression(model)).filter(
+            farmer_id__in={row.farmer_id for row in chunk},
+            at__gte=min(begin for begin, _ in bounds),
+            at__lt=max(end for _, end in bounds),
+        ).aggregate(**aggregates)
+        for i, row in enumerate(chunk):
+            row.minimum, row.maximum = found[f'low_{i}'], found[f'high_{i}']
+
+
+def _apply(model, buckets, sign):
+    changed, created, emptied, stale = [], [], [], []
+    existing = _locked_rows(buckets)
+    for key, (count, total, low, high) in buckets.items():
+        row = existing.get(key)
+        if sign > 0:
+            if row is None:
+                farmer_id, metric, granularity, period, crop_name = key
+                created.append(Rollup(farmer_id=farmer_id, metric=metric, granularity=granularity,
+                                      period=period, crop_name=crop_name, count=count, total=total,
+                                      minimum=low, maximum=high))
+                continue
+            row.count += count
+            row.total += total
+            row.minimum = low if row.minimum is None else min(row.minimum, low)
+            row.maximum = high if row.maximum is None else max(row.maximum, high)
+        else:
+            if row is None:
+                continue
+            row.count -= count
+            row.total -= total
+            if row.count <= 0:
+                emptied.append(row.pk)
+                continue
+            if row.minimum is None or low <= row.minimum or high >= row.maximum:
+                stale.append(row)
+        changed.append(row)
+    _extremes(model, stale)
+    Rollup.objects.bulk_update(changed, ['count', 'total', 'minimum', 'maximum'])
+    Rollup.objects.bulk_create(created)
+    if emptied:
+        Rollup.objects.filter(pk__in=emptied).delete()
+
+
+def fold(model, records, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) ``records`` of one model.
+
+    A concurrent writer may create the same bucket between our locking read
+    and insert; the savepoint is then retried once the other row is visible.
+    """
+    buckets = contributions(records)
+    if not buckets:
+        return
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                _apply(model, buckets, sign)
+            return
+        except IntegrityError:
+            if attempt == 2:
+                raise
+
+
+def record_saved(model, record, created, previous=None):
+    if previous is not None and not created:
+        fold(model, [previous], -1)
+    fold(model, [record])
+
+
+def record_deleted(model, record):
+    fold(model, [record], -1)
+
+
+def rebuild(batch_size=5000):
+    """Recreate every rollup from the history tables; returns the row count.
+
+    Daily buckets come from one GROUP BY per table; months and seasons are
+    folded from them farmer by farmer.
+    """
+    tz = timezone.get_current_timezone()
+    written = 0
+    with transaction.atomic():
+        Rollup.objects.all().delete()
+        for model in RECORD_MODELS:
+            prefix, fields, group = METRICS[model.__name__]
+            keys = ['farmer_id', 'day'] + ([group] if group else [])
+            aggregates = {}
+            for field in fields:
+                aggregates[f'{field}_count'] = Count(field)
+                aggregates[f'{field}_total'] = Sum(field)
+                aggregates[f'{field}_min'] = Min(field)
+                aggregates[f'{field}_max'] = Max(field)
+            days = (model.objects
+                    .annotate(day=TruncDate(reading_time_expression(model), tzinfo=tz))
+                    .values(*keys).annotate(**aggregates).order_by('farmer_id'))
+
+            buckets, farmer_id = {}, None
+            for day in days.iterator(chunk_size=batch_size):
+                if day['farmer_id'] != farmer_id:
+                    written += _write(buckets, batch_size)
+                    buckets, farmer_id = {}, day['farmer_id']
+                crop_name = day[group] if group else ''
+                for field in fields:
+                    if not day[f'{field}_count']:
+                        continue
+                    for granularity in GRANULARITIES:
+                        key = (farmer_id, f'{prefix}.{field}', granularity,
+                               period_start(day['day'], granularity), crop_name)
+                        _add(buckets, key, day[f'{field}_count'], day[f'{field}_total'],
+                             day[f'{field}_min'], day[f'{field}_max'])
+            written += _write(buckets, batch_size)
+    return written
+
+
+def _write(buckets, batch_size):
+    Rollup.objects.bulk_create(
+        [Rollup(farmer_id=farmer_id, metric=metric, granularity=granularity, period=period,
+                crop_name=crop_name, count=count, total=total, minimum=low, maximum=high)
+         for (farmer_id, metric, granularity, period, crop_name), (count, total, low, high) in buckets.items()],
+        batch_size=batch_size,
+    )
+    return len(buckets)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AgriAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'App'
+
+    def ready(self):
+        from . import metrics, querylog, signals, sqlite  # noqa: F401
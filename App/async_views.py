@@ -0,0 +1,150 @@
+"""Native async versions of the hot API views, served under ASGI.
+
+Reads go through the async ORM (``aget``, ``afirst``, ``async for``), so an
+ASGI worker keeps serving other requests while one waits on the database.
+Writes (POST, PUT, DELETE) hand off to the sync view in ``App.views``: they
+run the model signals that keep the derived tables in step, which must stay
+inside one synchronous transaction.
+
+``App.urls`` routes the same URLs here when ``settings.ASYNC_VIEWS`` is on
+(``Agriculture.asgi`` turns it on). Under WSGI Django still runs these views,
+just through ``async_to_sync``, so either server works with either setting.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import views
+from .conditional import conditional
+from .models import Farmer, CropRecord, SoilRecord, WaterRecord
+from .pagination import apaginate
+from .renderers import FastJsonResponse
+from .response_cache import cached_response
+from .serializers import SORT_FIELDS, aget_serialized, serialize_many
+from .suggest_cache import cached_suggest_actions
+
+
+async def list_response(request, model):
+    """Async :func:`App.views.list_response`."""
+    try:
+        rows, next_cursor = await apaginate(views.list_queryset(request, model), request, SORT_FIELDS[model])
+    except ValueError as e:  # PaginationError, TimestampError, bad farmer_id
+        return FastJsonResponse({'error': str(e)}, status=400)
+    return views.page_response(request, serialize_many(model, rows), next_cursor)
+
+
+async def detail_response(model, pk):
+    return FastJsonResponse(await aget_serialized(model, pk))
+
+
+async def write(view, request, *args, **kwargs):
+    """Run the sync ``view`` for a write in the thread the ORM uses."""
+    return await sync_to_async(view)(request, *args, **kwargs)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "GET"])
+@conditional(Farmer)
+@cached_response()
+async def farmer_list_create(request):
+    """Create a new farmer (POST) or list all farmers (GET)"""
+    if request.method == 'GET':
+        return await list_response(request, Farmer)
+    return await write(views.farmer_list_create, request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@conditional(Farmer, lookup='farmer_id')
+@cached_response()
+async def farmer_detail(request, farmer_id):
+    """Get, update, or delete a specific farmer"""
+    if request.method == 'GET':
+        return await detail_response(Farmer, farmer_id)
+    return await write(views.farmer_detail, request, farmer_id)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "GET"])
+@conditional(SoilRecord)
+@cached_response()
+async def soil_record_list_create(request):
+    """Create a new soil record (POST) or list all soil records (GET)"""
+    if request.method == 'GET':
+        return await list_response(request, SoilRecord)
+    return await write(views.soil_record_list_create, request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@conditional(SoilRecord, lookup='record_id')
+@cached_response()
+async def soil_record_detail(request, record_id):
+    """Get, update, or delete a specific soil record"""
+    if request.method == 'GET':
+        return await detail_response(SoilRecord, record_id)
+    return await write(views.soil_record_detail, request, record_id)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "GET"])
+@conditional(WaterRecord)
+@cached_response()
+async def water_record_list_create(request):
+    """Create a new water record (POST) or list all water records (GET)"""
+    if request.method == 'GET':
+        return await list_response(request, WaterRecord)
+    return await write(views.water_record_list_create, request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@conditional(WaterRecord, lookup='record_id')
+@cached_response()
+async def water_record_detail(request, record_id):
+    """Get, update, or delete a specific water record"""
+    if request.method == 'GET':
+        return await detail_response(WaterRecord, record_id)
+    return await write(views.water_record_detail, request, record_id)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "GET"])
+@conditional(CropRecord)
+@cached_response()
+async def crop_record_list_create(request):
+    """Create a new crop record (POST) or list all crop records (GET)"""
+    if request.method == 'GET':
+        return await list_response(request, CropRecord)
+    return await write(views.crop_record_list_create, request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@conditional(CropRecord, lookup='record_id')
+@cached_response()
+async def crop_record_detail(request, record_id):
+    """Get, update, or delete a specific crop record"""
+    if request.method == 'GET':
+        return await detail_response(CropRecord, record_id)
+    return await write(views.crop_record_detail, request, record_id)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def suggest(request):
+    """Get AI suggestions for agricultural actions.
+
+    Pure computation behind an in-process cache, so it runs on the event
+    loop without a thread hop.
+    """
+    try:
+        data = json.loads(request.body)
+        result = cached_suggest_actions(data)
+        return FastJsonResponse(result)
+    except json.JSONDecodeError:
+        return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
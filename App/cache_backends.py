@@ -0,0 +1,57 @@
+"""Cache backends that count evictions for the response cache statistics.
+
+Django's backends cull silently when they reach ``MAX_ENTRIES``. These
+subclasses tally the entries they drop per process, keyed by cache
+location, since each thread gets its own backend instance.
+"""
+import threading
+from collections import Counter
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_evictions = Counter()
+_lock = threading.Lock()
+
+
+def _count(location, evicted):
+    if evicted:
+        with _lock:
+            _evictions[location] += evicted
+
+
+class CountingLocMemCache(LocMemCache):
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.location = name
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        _count(self.location, before - len(self._cache))
+
+    @property
+    def evictions(self):
+        return _evictions[self.location]
+
+
+class CountingFileBasedCache(FileBasedCache):
+    _culling = False
+
+    def _cull(self):
+        self._culling = True
+        try:
+            super()._cull()
+        finally:
+            self._culling = False
+
+    def _delete(self, fname):
+        deleted = super()._delete(fname)
+        if deleted and self._culling:
+            _count(self._dir, 1)
+        return deleted
+
+    @property
+    def evictions(self):
+        return _evictions[self._dir]
@@ -0,0 +1,136 @@
+"""ETag / Last-Modified validators and conditional GET for the API views.
+
+Collections are versioned by their table's change counter in ``TableCount``
+(bumped by every write, see App.counters); single objects by their own
+``updated_at``. Either is one primary-key read, done before the view runs, so
+a matching ``If-None-Match`` / ``If-Modified-Since`` gets a 304 without the
+queryset being loaded or serialized. Async views get the same treatment with
+the reads done through the async ORM.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .counters import KEYS
+from .models import TableCount
+from .serializers import SORT_FIELDS
+
+
+def _table_query(models):
+    keys = [KEYS[model.__name__] for model in models]
+    return keys, TableCount.objects.filter(pk__in=keys).values_list('table', 'version', 'changed_at')
+
+
+def _table_tokens(keys, found):
+    rows = dict((table, (version, changed_at)) for table, version, changed_at in found)
+    if len(rows) != len(keys):
+        return None
+    # changed_at keeps tokens unique should the counters ever restart
+    # (a restored database, a test run)
+    parts = []
+    for key in keys:
+        version, changed_at = rows[key]
+        parts.append(f'{key}-{version}-{changed_at.timestamp() if changed_at else 0}')
+    etag = hashlib.md5('.'.join(parts).encode()).hexdigest()
+    stamps = [changed_at for _, changed_at in rows.values() if changed_at]
+    return quote_etag(etag), int(max(stamps).timestamp()) if stamps else None
+
+
+def table_validators(models):
+    """``(etag, last_modified)`` for the current state of ``models``' tables.
+
+    ``None`` if a table has no counter yet.
+    """
+    keys, query = _table_query(models)
+    return _table_tokens(keys, query)
+
+
+async def atable_validators(models):
+    keys, query = _table_query(models)
+    return _table_tokens(keys, [row async for row in query])
+
+
+def _object_query(model, pk):
+    return model.objects.filter(pk=pk).values_list('updated_at', SORT_FIELDS[model])
+
+
+def _object_tokens(model, pk, row):
+    if row is None:
+        return None
+    changed = (row[0] or row[1]).timestamp()
+    return quote_etag(f'{KEYS[model.__name__]}-{pk}-{changed:.6f}'), int(changed)
+
+
+def object_validators(model, pk):
+    """``(etag, last_modified)`` for one row, or ``None`` if it does not exist."""
+    return _object_tokens(model, pk, _object_query(model, pk).first())
+
+
+async def aobject_validators(model, pk):
+    return _object_tokens(model, pk, await _object_query(model, pk).afirst())
+
+
+def _finish(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        # Let browsers keep the body but revalidate on every poll
+        if not response.has_header('Cache-Control'):
+            patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional(*models, lookup=None):
+    """Answer GET/HEAD on the decorated view conditionally.
+
+    Without ``lookup`` the response is versioned by the tables of ``models``;
+    with it, by the single ``models[0]`` row whose primary key is the
+    ``lookup`` URL argument. Other methods pass straight through. Works on
+    sync and async views alike.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def ainner(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                if lookup:
+                    validators = await aobject_validators(models[0], kwargs[lookup])
+                else:
+                    validators = await atable_validators(models)
+                if validators is None:
+                    return await view(request, *args, **kwargs)
+
+                request.validators = validators
+                etag, last_modified = validators
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(response, etag, last_modified)
+            return ainner
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            if lookup:
+                validators = object_validators(models[0], kwargs[lookup])
+            else:
+                validators = table_validators(models)
+            if validators is None:
+                return view(request, *args, **kwargs)
+
+            # Also keys the response cache (App.response_cache)
+            request.validators = validators
+            etag, last_modified = validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(response, etag, last_modified)
+        return inner
+    return decorator
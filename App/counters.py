@@ -0,0 +1,73 @@
+"""Incrementally maintained row counts and change counters.
+
+Every insert, update and delete adjusts a ``TableCount`` row inside the
+writing transaction, so the dashboard reads its four numbers by primary key
+instead of running ``COUNT(*)`` over each table, and ``version`` /
+``changed_at`` serve as cheap per-table validators (see App.conditional). ``manage.py reconcile_counts``
+repairs drift from writes that bypass signals (raw SQL, or a plain
+``bulk_create`` outside :mod:`App.ingest`).
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Farmer, CropRecord, SoilRecord, TableCount, WaterRecord
+
+# model name -> stats key
+KEYS = {
+    'Farmer': 'farmers',
+    'CropRecord': 'crops',
+    'SoilRecord': 'soil',
+    'WaterRecord': 'water',
+}
+COUNTED_MODELS = (Farmer, CropRecord, SoilRecord, WaterRecord)
+
+
+def adjust(model, delta=0):
+    """Record a write to ``model``'s table that changed its size by ``delta``."""
+    TableCount.objects.filter(pk=KEYS[model.__name__]).update(
+        rows=F('rows') + delta, version=F('version') + 1, changed_at=timezone.now())
+
+
+def adjust_many(deltas):
+    """``adjust()`` several tables in one UPDATE; ``deltas`` maps model -> delta."""
+    deltas = {KEYS[model.__name__]: delta for model, delta in deltas.items()}
+    TableCount.objects.filter(pk__in=deltas).update(
+        rows=F('rows') + Case(*(When(pk=key, then=Value(delta)) for key, delta in deltas.items()),
+                              default=Value(0)),
+        version=F('version') + 1, changed_at=timezone.now())
+
+
+def touch_all():
+    """Bump every table version, e.g. after writes that bypassed the signals."""
+    TableCount.objects.update(version=F('version') + 1, changed_at=timezone.now())
+
+
+def exact_counts(models=COUNTED_MODELS):
+    return {KEYS[model.__name__]: model.objects.count() for model in models}
+
+
+def counts():
+    """Stored counts in one query; a missing counter falls back to COUNT(*)."""
+    stored = dict(TableCount.objects.filter(pk__in=KEYS.values()).values_list('table', 'rows'))
+    for model in COUNTED_MODELS:
+        key = KEYS[model.__name__]
+        if key not in stored:
+            stored[key] = model.objects.count()
+    return {KEYS[model.__name__]: stored[KEYS[model.__name__]] for model in COUNTED_MODELS}
+
+
+def reconcile():
+    """Reset every counter to its exact count; returns ``{key: (stored, exact)}``.
+
+    Counter rows are locked before counting, so writers that commit
+    meanwhile queue behind the reset instead of being lost or counted twice.
+    """
+    changes = {}
+    with transaction.atomic():
+        stored = dict(TableCount.objects.select_for_update()
+                      .filter(pk__in=KEYS.values()).values_list('table', 'rows'))
+        for key, exact in exact_counts().items():
+            TableCount.objects.update_or_create(table=key, defaults={'rows': exact})
+            changes[key] = (stored.get(key), exact)
+    return changes
@@ -0,0 +1,34 @@
+"""Database connection reuse statistics, served at ``/api/db/``.
+
+``settings_prod.py`` gives PostgreSQL a psycopg connection pool per process
+(Django's ``OPTIONS['pool']``, psycopg >= 3 with ``psycopg[pool]``), or
+persistent connections when pooling is off. This reports which one each
+database alias uses and, for pools, psycopg_pool's counters: connections
+open and idle, requests served and queued, time spent waiting for a
+connection, and connections found broken by the health check.
+"""
+from django.db import connections
+
+
+def _pool_options(connection):
+    return connection.settings_dict.get('OPTIONS', {}).get('pool')
+
+
+def pool_stats():
+    """``{alias: {...}}`` describing how each database reuses connections."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        entry = {
+            'vendor': connection.vendor,
+            'pooled': False,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        }
+        # Only the PostgreSQL backend has pools (``connection.pool``)
+        if connection.vendor == 'postgresql' and _pool_options(connection):
+            pool = connection.pool
+            entry['pooled'] = True
+            entry['pool'] = {'name': pool.name, **pool.get_stats()}
+        stats[alias] = entry
+    return stats
@@ -0,0 +1,45 @@
+"""Streaming exports of whole record tables.
+
+Rows are pulled with ``QuerySet.iterator(chunk_size=...)`` and encoded one
+chunk at a time, so memory stays bounded by the chunk size rather than the
+table size and the first bytes go out before the query has finished.
+"""
+from django.conf import settings
+
+from .renderers import dumps
+from .serializers import FIELDS, projected
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _chunks(model, chunk_size):
+    fields = FIELDS[model]
+    rows = projected(model).order_by('id').iterator(chunk_size=chunk_size)
+    batch = []
+    for row in rows:
+        batch.append(dumps({key: row[column] for key, column in fields}))
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def stream_ndjson(model):
+    """One JSON object per line."""
+    for batch in _chunks(model, chunk_size()):
+        yield b'\n'.join(batch) + b'\n'
+
+
+def stream_json(model):
+    """A single JSON array, emitted incrementally."""
+    yield b'['
+    first = True
+    for batch in _chunks(model, chunk_size()):
+        yield (b'' if first else b',') + b','.join(batch)
+        first = False
+    yield b']'
@@ -0,0 +1,133 @@
+"""Liveness and readiness probes for load balancers and orchestrators.
+
+Liveness only says the process is serving requests. Readiness times a
+trivial query on every database, a set/get round trip on every cache and,
+where they exist, the queues in front of the database (requests waiting for
+a pooled connection, writers waiting on the SQLite write queue); each is
+compared against ``HEALTH_THRESHOLDS``. A check that
+errors or exceeds its threshold makes the worker not ready (HTTP 503).
+
+Readiness results are reused for ``HEALTH_CACHE_TTL`` seconds (kept in
+process memory, not in the caches being probed), and only one request per
+process runs the probes at a time, so frequent polling adds no load.
+"""
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils import timezone
+
+from . import sqlite
+from .db_pool import pool_stats
+
+DEFAULT_THRESHOLDS = {
+    'database_ms': 250.0,
+    'cache_ms': 50.0,
+    'pool_waiting': 5,
+    'write_queue': 20,
+}
+DEFAULT_TTL = 2.0  # seconds
+
+STARTED = time.monotonic()
+
+_lock = threading.Lock()
+_last = None  # (monotonic time, result)
+
+
+def thresholds():
+    return dict(DEFAULT_THRESHOLDS, **getattr(settings, 'HEALTH_THRESHOLDS', {}))
+
+
+def liveness():
+    return {
+        'status': 'ok',
+        'pid': os.getpid(),
+        'uptime_s': round(time.monotonic() - STARTED, 3),
+        'time': timezone.now(),
+    }
+
+
+def _timed(probe):
+    """``(latency_ms, error)`` of calling ``probe``."""
+    started = time.perf_counter()
+    try:
+        probe()
+    except Exception as e:
+        return (time.perf_counter() - started) * 1000, f'{type(e).__name__}: {e}'
+    return (time.perf_counter() - started) * 1000, None
+
+
+def _check(latency_ms, error, limit):
+    if error:
+        return {'status': 'error', 'latency_ms': round(latency_ms, 3), 'error': error}
+    status = 'ok' if latency_ms <= limit else 'slow'
+    return {'status': status, 'latency_ms': round(latency_ms, 3), 'threshold_ms': limit}
+
+
+def check_database(alias, limit):
+    def probe():
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    return _check(*_timed(probe), limit)
+
+
+def check_cache(alias, limit):
+    def probe():
+        cache = caches[alias]
+        key, token = f'health:{os.getpid()}', uuid.uuid4().hex
+        cache.set(key, token, 30)
+        if cache.get(key) != token:
+            raise RuntimeError('value written was not read back')
+    return _check(*_timed(probe), limit)
+
+
+def check_pool_queue(stats, limit):
+    waiting = stats.get('requests_waiting', 0)
+    return {'status': 'ok' if waiting <= limit else 'saturated', 'waiting': waiting,
+            'size': stats.get('pool_size'), 'available': stats.get('pool_available'), 'threshold': limit}
+
+
+def check_write_queue(limit):
+    waiting = sqlite.write_queue.waiting
+    return {'status': 'ok' if waiting <= limit else 'saturated', 'waiting': waiting, 'threshold': limit}
+
+
+def run_checks():
+    limits = thresholds()
+    checks = {}
+    for alias in connections:
+        checks[f'database:{alias}'] = check_database(alias, limits['database_ms'])
+    for alias in settings.CACHES:
+        checks[f'cache:{alias}'] = check_cache(alias, limits['cache_ms'])
+    if all(check['status'] == 'ok' for check in checks.values()):
+        # Pool counters need a reachable database
+        for alias, entry in pool_stats().items():
+            if entry['pooled']:
+                checks[f'pool:{alias}'] = check_pool_queue(entry['pool'], limits['pool_waiting'])
+    if any(connections[alias].vendor == 'sqlite' for alias in connections) and sqlite.enabled():
+        checks['queue:sqlite_writes'] = check_write_queue(limits['write_queue'])
+    ready = all(check['status'] == 'ok' for check in checks.values())
+    return {'status': 'ready' if ready else 'unavailable', 'checked_at': timezone.now(), 'checks': checks}
+
+
+def readiness():
+    """``(ready, body)``, reusing a result younger than ``HEALTH_CACHE_TTL``."""
+    global _last
+    ttl = getattr(settings, 'HEALTH_CACHE_TTL', DEFAULT_TTL)
+    last, fresh = _last, False
+    if last is None or time.monotonic() - last[0] >= ttl:
+        # One prober per process; concurrent pollers get the previous result
+        if _lock.acquire(blocking=last is None):
+            try:
+                _last = last = (time.monotonic(), run_checks())
+                fresh = True
+            finally:
+                _lock.release()
+    checked, result = last
+    body = dict(result, cached=not fresh, age_s=round(time.monotonic() - checked, 3))
+    return result['status'] == 'ready', body
@@ -0,0 +1,139 @@
+"""Validation and batched insertion for bulk record uploads.
+
+Every bulk write path (the ``/api/records/<kind>/bulk/`` endpoint and the
+``import_records`` command) goes through :func:`bulk_insert`, so rows land
+with one INSERT per batch inside a single transaction instead of one
+``objects.create`` and commit per row.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Farmer, CropRecord, SoilRecord, WaterRecord
+from .signals import records_bulk_created
+from .timestamps import TimestampError, coerce_timestamp
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_ITEMS = 10000
+
+# model -> (float columns, text columns, required columns)
+WRITABLE = {
+    SoilRecord: (
+        ('ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture'),
+        ('soil_type', 'notes'),
+        (),
+    ),
+    WaterRecord: (
+        ('ph', 'ec', 'tds', 'amount_l'),
+        ('notes',),
+        (),
+    ),
+    CropRecord: (
+        ('yield_kg',),
+        ('crop_name', 'notes'),
+        ('crop_name',),
+    ),
+}
+
+
+class ValidationError(ValueError):
+    """An item that cannot be turned into a record."""
+
+
+def batch_size():
+    return getattr(settings, 'BULK_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def max_items():
+    return getattr(settings, 'BULK_MAX_ITEMS', DEFAULT_MAX_ITEMS)
+
+
+def _float(name, value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValidationError(f'{name} must be a number')
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f'{name} must be a number')
+
+
+def _text(name, value):
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValidationError(f'{name} must be a string')
+    return value
+
+
+def build_record(model, item, farmer_ids):
+    """Validate one item dict and return an unsaved ``model`` instance.
+
+    ``farmer_ids`` is the set of farmer ids known to exist.
+    """
+    if not isinstance(item, dict):
+        raise ValidationError('item must be an object')
+    floats, texts, required = WRITABLE[model]
+
+    farmer_id = item.get('farmer_id')
+    if isinstance(farmer_id, bool) or not isinstance(farmer_id, int):
+        raise ValidationError('farmer_id must be an integer')
+    if farmer_id not in farmer_ids:
+        raise ValidationError(f'farmer {farmer_id} does not exist')
+
+    values = {name: _float(name, item.get(name)) for name in floats}
+    values.update({name: _text(name, item.get(name)) for name in texts})
+    for name in required:
+        if values[name] is None:
+            raise ValidationError(f'{name} is required')
+    try:
+        values['date_recorded'] = coerce_timestamp('date_recorded', item.get('date_recorded'), timezone.now())
+    except TimestampError as e:
+        raise ValidationError(str(e))
+    return model(farmer_id=farmer_id, **values)
+
+
+def existing_farmer_ids(items):
+    """Ids referenced by ``items`` that exist, fetched in one query."""
+    ids = {item.get('farmer_id') for item in items if isinstance(item, dict)}
+    ids = {i for i in ids if isinstance(i, int) and not isinstance(i, bool)}
+    return set(Farmer.objects.filter(id__in=ids).values_list('id', flat=True))
+
+
+def bulk_insert(model, records, size=None):
+    """Insert ``records`` with ``bulk_create`` in batches of ``size``.
+
+    Callers own the transaction; ids are populated on the instances on
+    backends that return them (PostgreSQL, SQLite >= 3.35). Sends
+    ``records_bulk_created`` so derived tables see the new rows.
+    """
+    created = model.objects.bulk_create(records, batch_size=size or batch_size())
+    if created:
+        records_bulk_created.send(sender=model, records=created)
+    return created
+
+
+def ingest(model, items):
+    """Validate ``items`` and insert the valid ones in one transaction.
+
+    Returns one result per item, in order: ``{'index', 'id'}`` for inserted
+    rows and ``{'index', 'error'}`` for rejected ones.
+    """
+    farmer_ids = existing_farmer_ids(items)
+    results, records, positions = [], [], []
+    for index, item in enumerate(items):
+        try:
+            records.append(build_record(model, item, farmer_ids))
+        except ValidationError as e:
+            results.append({'index': index, 'error': str(e)})
+        else:
+            positions.append(len(results))
+            results.append({'index': index, 'id': None})
+
+    with transaction.atomic():
+        bulk_insert(model, records)
+
+    for position, record in zip(positions, records):
+        results[position]['id'] = record.id
+    return results
@@ -0,0 +1,156 @@
+"""Maintenance of the per-farmer ``LatestReading`` table.
+
+A reading's time is its ``date_recorded`` (when it was taken), falling back
+to the row's creation time. New readings are compared against the stored
+latest one in O(1); only updates and deletes of the current latest reading
+fall back to a per-farmer lookup on the history table.
+"""
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Farmer, CropRecord, LatestReading, SoilRecord, WaterRecord
+
+# model name -> (column prefix on LatestReading, creation timestamp,
+#                {LatestReading column: record column})
+KINDS = {
+    'SoilRecord': ('soil', 'recorded_at', {'soil_ph': 'ph', 'moisture': 'moisture', 'soil_type': 'soil_type'}),
+    'WaterRecord': ('water', 'recorded_at', {}),
+    'CropRecord': ('crop', 'planted_on', {'crop_name': 'crop_name'}),
+}
+RECORD_MODELS = (SoilRecord, WaterRecord, CropRecord)
+
+
+def reading_time(record):
+    return record.date_recorded or getattr(record, KINDS[type(record).__name__][1])
+
+
+def _sort_key(record):
+    return reading_time(record), record.id or 0
+
+
+def _columns(record):
+    prefix, _, copied = KINDS[type(record).__name__]
+    values = {column: getattr(record, source) for column, source in copied.items()}
+    values[f'{prefix}_id'] = record.id
+    values[f'{prefix}_at'] = reading_time(record)
+    return values
+
+
+def _empty_columns(model):
+    prefix, _, copied = KINDS[model.__name__]
+    values = dict.fromkeys(copied)
+    values[f'{prefix}_id'] = None
+    values[f'{prefix}_at'] = None
+    return values
+
+
+def _history(model):
+    """``model`` rows newest reading first."""
+    created_field = KINDS[model.__name__][1]
+    return model.objects.order_by(Coalesce('date_recorded', created_field).desc(), '-id')
+
+
+def offer(records):
+    """Fold newly inserted ``records`` (one model) into the table.
+
+    Used for single saves and bulk inserts alike: one locking read of the
+    affected farmers' rows, then one write per changed row.
+    """
+    newest = {}
+    for record in records:
+        best = newest.get(record.farmer_id)
+        if best is None or _sort_key(record) >= _sort_key(best):
+            newest[record.farmer_id] = record
+    if not newest:
+        return
+
+    prefix = KINDS[type(records[0]).__name__][0]
+    with transaction.atomic():
+        rows = {row.farmer_id: row for row in
+                LatestReading.objects.select_for_update().filter(farmer_id__in=newest)}
+        missing = []
+        for farmer_id, record in newest.items():
+            row = rows.get(farmer_id)
+            if row is None:
+                missing.append(LatestReading(farmer_id=farmer_id, **_columns(record)))
+                continue
+            current_at = getattr(row, f'{prefix}_at')
+            if current_at is None or _sort_key(record) >= (current_at, getattr(row, f'{prefix}_id') or 0):
+                LatestReading.objects.filter(pk=farmer_id).update(**_columns(record))
+        LatestReading.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def recompute(model, farmer_id):
+    """Re-read ``farmer_id``'s latest ``model`` reading from history.
+
+    Only updates an existing row: a delete may be cascading from the farmer
+    itself, whose row must not be recreated.
+    """
+    record = _history(model).filter(farmer_id=farmer_id).first()
+    values = _columns(record) if record else _empty_columns(model)
+    LatestReading.objects.filter(pk=farmer_id).update(**values)
+
+
+def record_saved(model, record, created):
+    if created:
+        offer([record])
+        return
+    prefix = KINDS[model.__name__][0]
+    # Only the farmer(s) this record is the latest reading of need their
+    # history re-read: the edit may have moved it back in time or away from
+    # them. For any other farmer it can only have become newer.
+    latest_of = list(LatestReading.objects.filter(**{f'{prefix}_id': record.id})
+                     .values_list('farmer_id', flat=True))
+    for farmer_id in latest_of:
+        recompute(model, farmer_id)
+    if record.farmer_id not in latest_of:
+        offer([record])
+
+
+def record_deleted(model, record):
+    prefix = KINDS[model.__name__][0]
+    if LatestReading.objects.filter(pk=record.farmer_id, **{f'{prefix}_id': record.id}).exists():
+        recompute(model, record.farmer_id)
+
+
+def rebuild(batch_size=1000):
+    """Recreate every row from the history tables; returns the row count."""
+    with transaction.atomic():
+        LatestReading.objects.all().delete()
+        annotations = {
+            f'latest_{KINDS[model.__name__][0]}': Subquery(
+                _history(model).filter(farmer_id=OuterRef('pk')).values('id')[:1])
+            for model in RECORD_MODELS
+        }
+        farmers = list(Farmer.objects.annotate(**annotations).values('pk', *annotations))
+
+        rows = {}
+        for model in RECORD_MODELS:
+            column = f'latest_{KINDS[model.__name__][0]}'
+            ids = [f[column] for f in farmers if f[column]]
+            for start in range(0, len(ids), batch_size):
+                for record in model.objects.filter(id__in=ids[start:start + batch_size]):
+                    rows.setdefault(record.farmer_id, {}).update(_columns(record))
+        LatestReading.objects.bulk_create(
+            [LatestReading(farmer_id=farmer_id, **values) for farmer_id, values in rows.items()],
+            batch_size=batch_size,
+        )
+    return len(rows)
+
+
+def suggestion_payload(farmer_id, now):
+    """``suggest_actions`` inputs from the stored latest readings.
+
+    Returns ``None`` if the farmer has no readings row.
+    """
+    row = LatestReading.objects.filter(pk=farmer_id).first()
+    if row is None:
+        return None
+    return {
+        'soil_ph': row.soil_ph,
+        'moisture': row.moisture,
+        'soil_type': row.soil_type,
+        'crop': row.crop_name,
+        'days_since_last_water': (now - row.water_at).days if row.water_at else None,
+    }
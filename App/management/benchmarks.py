@@ -0,0 +1,9 @@
+"""Helpers shared by the ``bench_*`` management commands."""
+
+
+def percentile(timings, q):
+    """The ``q`` quantile (0-1) of ``timings`` by nearest rank; 0.0 if empty."""
+    if not timings:
+        return 0.0
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * q))]
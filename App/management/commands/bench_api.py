@@ -0,0 +1,284 @@
+"""Latency and memory of the API endpoints as the tables grow.
+
+Seeds a throwaway test database up to each ``--sizes`` row count per record
+table (farmers grow with them, ``--records-per-farmer``), rebuilding the
+counters, latest readings and rollups after each step, then sends every
+endpoint in ``ENDPOINTS`` through ``django.test.Client`` one request at a
+time. For each size and endpoint it reports:
+
+* p50/p95/p99 latency over ``--requests`` timed requests;
+* ``peak_kb``: the largest tracemalloc peak of a single request, from a
+  separate pass of ``--memory-samples`` requests (tracing slows everything
+  down, so it is kept out of the timed pass);
+* ``rss_mb``: the process's resident set high-water mark after the endpoint,
+  next to ``seed_rss_mb``, the mark once seeding finished (seeding usually
+  sets it, so only growth beyond it comes from the requests).
+
+Results are written to ``--output`` as JSON. ``--compare`` reads an earlier
+file and flags every size/endpoint whose p50, p95 or peak memory grew by
+more than ``--threshold`` (and by at least ``--min-delta-ms`` for latency),
+exiting with an error if any did::
+
+    python manage.py bench_api --sizes 10000 100000 --output base.json
+    python manage.py bench_api --sizes 10000 100000 --compare base.json
+"""
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from App import analytics, latest
+from App.counters import reconcile
+from App.management.benchmarks import percentile
+from App.models import Farmer, SoilRecord
+from App.seeding import seed_dataset
+
+ENDPOINTS = (
+    'farmer list', 'farmer detail', 'farmer create', 'soil list', 'soil list by farmer',
+    'soil detail', 'soil create', 'soil bulk', 'stats', 'suggest', 'farmer suggest',
+)
+BULK_ROWS = 100
+
+
+def rss_mb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class Workload:
+    """Builds random requests for each endpoint against the seeded tables."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.refresh()
+
+    def refresh(self):
+        # Seeded ids are contiguous, so random ids between the bounds exist
+        self.farmers = (Farmer.objects.order_by('id').values_list('id', flat=True).first(),
+                        Farmer.objects.order_by('-id').values_list('id', flat=True).first())
+        self.soil = (SoilRecord.objects.order_by('id').values_list('id', flat=True).first(),
+                     SoilRecord.objects.order_by('-id').values_list('id', flat=True).first())
+
+    def farmer_id(self):
+        return self.rng.randint(*self.farmers)
+
+    def reading(self):
+        return {'farmer_id': self.farmer_id(), 'ph': round(self.rng.uniform(4.5, 9.0), 2),
+                'nitrogen': round(self.rng.uniform(5, 80), 1), 'date_recorded': timezone.now().isoformat()}
+
+    def request(self, endpoint):
+        """``(method, path, body)`` of one request to ``endpoint``."""
+        rng = self.rng
+        if endpoint == 'farmer list':
+            return 'get', '/api/farmers/?limit=50', None
+        if endpoint == 'farmer detail':
+            return 'get', f'/api/farmers/{self.farmer_id()}/', None
+        if endpoint == 'farmer create':
+            return 'post', '/api/farmers/', {'name': f'Bench {rng.random()}'}
+        if endpoint == 'soil list':
+            return 'get', '/api/records/soil/?limit=50', None
+        if endpoint == 'soil list by farmer':
+            return 'get', f'/api/records/soil/?farmer_id={self.farmer_id()}&limit=50', None
+        if endpoint == 'soil detail':
+            return 'get', f'/api/records/soil/{rng.randint(*self.soil)}/', None
+        if endpoint == 'soil create':
+            return 'post', '/api/records/soil/', self.reading()
+        if endpoint == 'soil bulk':
+            return 'post', '/api/records/soil/bulk/', [self.reading() for _ in range(BULK_ROWS)]
+        if endpoint == 'stats':
+            return 'get', '/stats/', None
+        if endpoint == 'suggest':
+            return 'post', '/api/suggest/', {
+                'soil_ph': round(rng.uniform(4.5, 9.0), 1), 'moisture': rng.randint(5, 95),
+                'crop': rng.choice(['mirchi', 'methi', 'wheat', 'rice']),
+                'days_since_last_water': rng.randint(0, 10),
+            }
+        if endpoint == 'farmer suggest':
+            return 'get', f'/api/farmers/{self.farmer_id()}/suggest/', None
+        raise ValueError(endpoint)
+
+
+def call(client, method, path, body):
+    if body is None:
+        response = getattr(client, method)(path)
+    else:
+        response = getattr(client, method)(path, json.dumps(body), content_type='application/json')
+    if response.status_code >= 400:
+        raise CommandError(f'{method.upper()} {path} returned {response.status_code}')
+    return response
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API latency percentiles and memory at several table sizes, with regression checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Rows per record table to measure at (default: 10000 100000 1000000)')
+        parser.add_argument('--records-per-farmer', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Timed requests per endpoint and size (default: 200)')
+        parser.add_argument('--memory-samples', type=int, default=20,
+                            help='Traced requests per endpoint and size (default: 20)')
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--response-cache', action='store_true',
+                            help='Keep the API response cache on (default: measure the views)')
+        parser.add_argument('--output', default='bench_api.json',
+                            help='JSON file to write results to (default: bench_api.json)')
+        parser.add_argument('--compare', help='Earlier results file to check for regressions')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Relative growth flagged as a regression (default: 0.25)')
+        parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                            help='Ignore latency changes smaller than this (default: 0.5)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        sizes = sorted(set(options['sizes']))
+        rng = random.Random(options['seed'])
+
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        directory = None
+        if connection.vendor == 'sqlite':
+            # On disk like the real database, and out of the process's memory
+            directory = tempfile.mkdtemp(prefix='bench_api_')
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.db')
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = {}
+        try:
+            # DEBUG would keep every seeding INSERT in connection.queries
+            overrides = {'DEBUG': False, 'ALLOWED_HOSTS': ['*'], 'QUERY_BUDGET_MODE': 'off'}
+            if not options['response_cache']:
+                overrides['RESPONSE_CACHE_ALIAS'] = None
+            with override_settings(**overrides):
+                seeded = 0
+                for step, size in enumerate(sizes):
+                    started = time.perf_counter()
+                    self.stdout.write(f'Seeding to {size} rows per record table on {connection.vendor}...')
+                    seed_dataset(max(1, (size - seeded) // options['records_per_farmer']), size - seeded,
+                                 seed=options['seed'] + step)
+                    reconcile()
+                    latest.rebuild()
+                    analytics.rebuild()
+                    seeded = size
+                    seed_s = time.perf_counter() - started
+                    seed_rss = rss_mb()
+
+                    workload = Workload(rng)
+                    endpoints = {endpoint: self.measure(workload, endpoint, options)
+                                 for endpoint in options['endpoints']}
+                    results[str(size)] = {'seed_s': round(seed_s, 2), 'seed_rss_mb': round(seed_rss, 1),
+                                          'endpoints': endpoints}
+                    self.report(size, seed_rss, endpoints)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+            if directory:
+                connection.settings_dict['TEST']['NAME'] = None
+                for name in os.listdir(directory):  # WAL and shared-memory files
+                    os.remove(os.path.join(directory, name))
+                os.rmdir(directory)
+
+        document = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'requests': options['requests'],
+                'memory_samples': options['memory_samples'],
+                'records_per_farmer': options['records_per_farmer'],
+                'response_cache': options['response_cache'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(document, f, indent=2)
+        self.stdout.write(f'\nWrote {options["output"]}')
+
+        if baseline is not None:
+            regressions = self.compare(baseline, document, options)
+            if regressions:
+                raise CommandError(f'{regressions} regression(s) against {options["compare"]}')
+
+    def measure(self, workload, endpoint, options):
+        client = Client()
+        for _ in range(5):  # warm up caches and lazy imports
+            call(client, *workload.request(endpoint))
+
+        timings = []
+        for _ in range(options['requests']):
+            method, path, body = workload.request(endpoint)
+            started = time.perf_counter()
+            call(client, method, path, body)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for _ in range(options['memory_samples']):
+                request = workload.request(endpoint)
+                tracemalloc.reset_peak()
+                call(client, *request)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'requests': len(timings),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'peak_kb': round(peak / 1024, 1),
+            'rss_mb': round(rss_mb(), 1),
+        }
+
+    def report(self, size, seed_rss, endpoints):
+        self.stdout.write(f'\n{size} rows per record table (RSS after seeding: {seed_rss:.1f} MB)')
+        self.stdout.write(f'{"endpoint":<22}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"peak KB":>10}{"RSS MB":>9}')
+        for endpoint, row in endpoints.items():
+            self.stdout.write(f'{endpoint:<22}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}'
+                              f'{row["peak_kb"]:>10.1f}{row["rss_mb"]:>9.1f}')
+
+    def compare(self, baseline, current, options):
+        """Print changes against ``baseline``; returns the number of regressions."""
+        limit = 1 + options['threshold']
+        regressions = 0
+        self.stdout.write(f'\nAgainst {options["compare"]} ({baseline["meta"].get("created", "?")}):')
+        self.stdout.write(f'{"size":>9}  {"endpoint":<22}{"p50":>9}{"p95":>9}{"peak":>9}')
+        for size, entry in current['results'].items():
+            before_endpoints = baseline['results'].get(size, {}).get('endpoints', {})
+            for endpoint, row in entry['endpoints'].items():
+                before = before_endpoints.get(endpoint)
+                if before is None:
+                    continue
+                flagged = []
+                for key in ('p50_ms', 'p95_ms', 'peak_kb'):
+                    grew = row[key] > before[key] * limit
+                    if key != 'peak_kb':
+                        grew = grew and row[key] - before[key] >= options['min_delta_ms']
+                    if grew:
+                        flagged.append(key.split('_')[0])
+                changes = ''.join(f'{row[key] / before[key] - 1 if before[key] else 0:>+9.0%}'
+                                  for key in ('p50_ms', 'p95_ms', 'peak_kb'))
+                note = f'  REGRESSION ({", ".join(flagged)})' if flagged else ''
+                self.stdout.write(f'{size:>9}  {endpoint:<22}{changes}{note}')
+                regressions += bool(flagged)
+        return regressions
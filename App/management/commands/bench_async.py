@@ -0,0 +1,154 @@
+"""Compare request throughput of the sync and native async API views.
+
+Seeds a throwaway test database, then pushes the same request mix (list
+page, detail, /api/suggest/) through Django's request handlers at each
+concurrency level:
+
+* ``wsgi``: sync views, clients served by a pool of ``--threads`` worker
+  threads, like a threaded WSGI server;
+* ``asgi-sync``: sync views under the ASGI handler (each runs in a thread
+  via ``sync_to_async``);
+* ``asgi-async``: the views in App.async_views under the ASGI handler.
+
+Requests are made in-process (``django.test.Client`` / ``AsyncClient``),
+so the numbers measure the handler and view stack without socket or
+server overhead::
+
+    python manage.py bench_async --clients 100 1000 --requests 5000
+"""
+import asyncio
+import importlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches
+
+from App.counters import reconcile
+from App.seeding import seed_dataset
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+SUGGEST_BODY = {'soil_ph': 5.4, 'moisture': 22, 'crop': 'wheat', 'days_since_last_water': 4}
+
+
+def route(async_views):
+    """Re-import the URLconf with ``ASYNC_VIEWS`` set to ``async_views``."""
+    settings.ASYNC_VIEWS = async_views
+    importlib.reload(importlib.import_module('App.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def request_mix(farmer_ids, total):
+    urls = cycle(['/api/records/soil/?limit=50', 'farmer', 'suggest'])
+    ids = cycle(farmer_ids)
+    plan = []
+    for _ in range(total):
+        url = next(urls)
+        if url == 'farmer':
+            plan.append(('get', f'/api/farmers/{next(ids)}/'))
+        elif url == 'suggest':
+            plan.append(('post', '/api/suggest/'))
+        else:
+            plan.append(('get', url))
+    return plan
+
+
+def _call(client, method, url):
+    if method == 'post':
+        return client.post(url, SUGGEST_BODY, content_type='application/json')
+    return client.get(url)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark throughput of sync vs async API views at several concurrency levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000],
+                            help='Concurrent clients per run (default: 100 1000)')
+        parser.add_argument('--requests', type=int, default=3000,
+                            help='Requests per run (default: 3000)')
+        parser.add_argument('--threads', type=int, default=32,
+                            help='Worker threads of the simulated WSGI server (default: 32)')
+        parser.add_argument('--farmers', type=int, default=500)
+        parser.add_argument('--records', type=int, default=20000,
+                            help='Rows seeded into each record table (default: 20000)')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+
+    def handle(self, **options):
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        configured = getattr(settings, 'ASYNC_VIEWS', False)
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Seeding {options["farmers"]} farmers and '
+                              f'{options["records"]} rows per record table on {connection.vendor}...')
+            farmer_ids = seed_dataset(options['farmers'], options['records'])
+            reconcile()
+            plan = request_mix(farmer_ids, options['requests'])
+
+            # Measure the views, not the response cache or DEBUG query logging
+            with override_settings(RESPONSE_CACHE_ALIAS=None, DEBUG=False, ALLOWED_HOSTS=['*']):
+                results = []
+                for clients in options['clients']:
+                    for mode in options['modes']:
+                        route(mode == 'asgi-async')
+                        if mode == 'wsgi':
+                            timings, elapsed = self.run_threaded(plan, clients, options['threads'])
+                        else:
+                            timings, elapsed = asyncio.run(self.run_async(plan, clients))
+                        results.append((clients, mode, timings, elapsed))
+            self.report(results)
+        finally:
+            route(configured)
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def run_threaded(self, plan, clients, threads):
+        """``clients`` callers sharing a pool of ``threads`` request workers."""
+        def serve(method, url, sent):
+            response = _call(Client(), method, url)
+            assert response.status_code == 200, (url, response.status_code)
+            # From submission, so time queued for a free worker counts too
+            return (time.perf_counter() - sent) * 1000
+
+        with ThreadPoolExecutor(max_workers=min(threads, clients)) as pool:
+            started = time.perf_counter()
+            # Keep at most ``clients`` requests in flight, like that many callers
+            timings, pending = [], []
+            for method, url in plan:
+                pending.append(pool.submit(serve, method, url, time.perf_counter()))
+                if len(pending) >= clients:
+                    timings.append(pending.pop(0).result())
+            timings += [future.result() for future in pending]
+            elapsed = time.perf_counter() - started
+        return timings, elapsed
+
+    async def run_async(self, plan, clients):
+        """``clients`` concurrent callers on one event loop."""
+        work = iter(plan)
+        timings = []
+
+        async def caller():
+            client = AsyncClient()
+            for method, url in work:
+                started = time.perf_counter()
+                response = await _call(client, method, url)
+                assert response.status_code == 200, (url, response.status_code)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(clients)))
+        return timings, time.perf_counter() - started
+
+    def report(self, results):
+        self.stdout.write(f'\n{"clients":>8}  {"mode":<11}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for clients, mode, timings, elapsed in results:
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(f'{clients:>8}  {mode:<11}{len(timings) / elapsed:>10.0f}'
+                              f'{statistics.median(timings):>10.2f}{p99:>10.2f}')
@@ -0,0 +1,101 @@
+"""Compare query plans and latencies with and without the access-path indexes.
+
+Seeds a throwaway test database (never the configured one), then runs each
+per-farmer / per-crop history query with the composite indexes dropped and
+again with them in place. Works against whichever backend the settings
+module selects, e.g.::
+
+    python manage.py bench_indexes --records 200000
+    DJANGO_SETTINGS_MODULE=Agriculture.settings_prod python manage.py bench_indexes
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from App.models import CropRecord, SoilRecord, WaterRecord
+from App.seeding import seed_dataset
+
+# Indexes added for the access paths below; dropped for the "before" run
+ACCESS_PATH_INDEXES = (
+    (SoilRecord, 'soil_farmer_recorded_idx'),
+    (WaterRecord, 'water_farmer_recorded_idx'),
+    (CropRecord, 'crop_farmer_planted_idx'),
+    (CropRecord, 'crop_name_planted_idx'),
+)
+
+
+def access_paths(farmer_id):
+    return {
+        'soil history': SoilRecord.objects.filter(farmer_id=farmer_id).order_by('-recorded_at', '-id')[:100],
+        'water history': WaterRecord.objects.filter(farmer_id=farmer_id).order_by('-recorded_at', '-id')[:100],
+        'crop history': CropRecord.objects.filter(farmer_id=farmer_id).order_by('-planted_on', '-id')[:100],
+        'crop by name': CropRecord.objects.filter(crop_name='mirchi').order_by('-planted_on')[:100],
+    }
+
+
+def _index(model, name):
+    return next(index for index in model._meta.indexes if index.name == name)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark EXPLAIN plans and latencies of record history queries before/after the composite indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=500)
+        parser.add_argument('--records', type=int, default=50000,
+                            help='Rows seeded into each record table (default: 50000)')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Timed runs per query (default: 50)')
+
+    def handle(self, **options):
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Seeding {options["farmers"]} farmers and '
+                              f'{options["records"]} rows per record table on {connection.vendor}...')
+            farmer_ids = seed_dataset(options['farmers'], options['records'])
+            queries = access_paths(farmer_ids[len(farmer_ids) // 2])
+
+            with connection.schema_editor() as editor:
+                for model, name in ACCESS_PATH_INDEXES:
+                    editor.remove_index(model, _index(model, name))
+            self.analyze()
+            before = self.measure(queries, options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for model, name in ACCESS_PATH_INDEXES:
+                    editor.add_index(model, _index(model, name))
+            self.analyze()
+            after = self.measure(queries, options['repeat'])
+
+            self.report(before, after)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, queries, repeat):
+        results = {}
+        for label, queryset in queries.items():
+            list(queryset.all())  # warm the cache
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = (statistics.median(timings), queryset.explain())
+        return results
+
+    def report(self, before, after):
+        self.stdout.write(f'\n{"query":<16}{"before ms":>12}{"after ms":>12}{"speedup":>10}')
+        for label, (before_ms, _) in before.items():
+            after_ms = after[label][0]
+            speedup = before_ms / after_ms if after_ms else float('inf')
+            self.stdout.write(f'{label:<16}{before_ms:>12.3f}{after_ms:>12.3f}{speedup:>9.1f}x')
+        for label in before:
+            self.stdout.write(f'\n== {label}\n-- before\n{before[label][1]}\n-- after\n{after[label][1]}')
@@ -0,0 +1,75 @@
+"""Benchmark JSON rendering of API payloads.
+
+Builds a list payload shaped like ``/api/records/soil/`` (float readings and
+timestamps), checks that the orjson and stdlib renderers produce the same
+JSON, and reports the median encode time of each next to Django's
+``JsonResponse``::
+
+    python manage.py bench_json --records 10000
+"""
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import JsonResponse
+from django.test import override_settings
+from django.utils import timezone
+
+from App.renderers import FastJsonResponse, orjson
+
+
+def soil_payload(records, seed=0):
+    rng = random.Random(seed)
+    now = timezone.now()
+    return [{
+        'id': i,
+        'farmer_id': rng.randrange(1, 1000),
+        'ph': round(rng.uniform(4.5, 9.0), 2),
+        'nitrogen': rng.uniform(5, 80),
+        'phosphorus': rng.uniform(5, 60),
+        'potassium': rng.uniform(50, 400),
+        'date_recorded': now - timedelta(seconds=rng.randrange(63072000)),
+    } for i in range(records)]
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare JsonResponse with the orjson/stdlib FastJsonResponse on large payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, **options):
+        payload = soil_payload(options['records'])
+        candidates = {'JsonResponse': lambda: JsonResponse(payload, safe=False)}
+        renderers = ['stdlib'] + (['orjson'] if orjson is not None else [])
+        for name in renderers:
+            def render(name=name):
+                with override_settings(JSON_RENDERER=name):
+                    return FastJsonResponse(payload, safe=False)
+            candidates[f'FastJsonResponse[{name}]'] = render
+
+        reference = json.loads(candidates['FastJsonResponse[stdlib]']().content)
+        for label, render in candidates.items():
+            if label != 'JsonResponse' and json.loads(render().content) != reference:
+                raise CommandError(f'{label} output differs from the stdlib renderer')
+
+        baseline = None
+        for label, render in candidates.items():
+            ms = median_ms(render, options['repeat'])
+            baseline = baseline or ms
+            self.stdout.write(f'{label:>26}: {ms:8.2f} ms  ({baseline / ms:.1f}x)')
+        if orjson is None:
+            self.stdout.write('orjson is not installed; FastJsonResponse uses the stdlib encoder')
@@ -0,0 +1,135 @@
+"""Request latency on PostgreSQL with and without connection reuse.
+
+Seeds a throwaway test database, then sends the same detail GETs from
+``--threads`` concurrent clients under three connection strategies:
+
+* ``connect``: ``CONN_MAX_AGE = 0``, a new connection (TCP, auth, backend
+  startup) for every request, the old ``settings_prod.py`` behaviour;
+* ``persistent``: ``CONN_MAX_AGE`` > 0 with health checks, one connection
+  kept per thread;
+* ``pool``: a psycopg pool shared by the threads (needs ``psycopg[pool]``).
+
+Run it against the production profile and a local server, e.g.::
+
+    DJANGO_SETTINGS_MODULE=Agriculture.settings_prod DB_HOST=localhost \\
+        python manage.py bench_pool --threads 8 --requests 500
+"""
+import importlib.util
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from App.counters import reconcile
+from App.db_pool import pool_stats
+from App.management.benchmarks import percentile
+from App.models import Farmer
+
+MODES = ('connect', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark request latency with per-request connections, persistent connections and a pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Concurrent clients (default: 8)')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per client (default: 500)')
+        parser.add_argument('--farmers', type=int, default=1000)
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+
+    def handle(self, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('bench_pool needs a PostgreSQL database (e.g. Agriculture.settings_prod)')
+        modes = options['modes']
+        if 'pool' in modes and importlib.util.find_spec('psycopg_pool') is None:
+            self.stderr.write('psycopg_pool is not installed; skipping the pool run')
+            modes = [mode for mode in modes if mode != 'pool']
+
+        settings_dict = connection.settings_dict
+        saved = {
+            'CONN_MAX_AGE': settings_dict.get('CONN_MAX_AGE', 0),
+            'CONN_HEALTH_CHECKS': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            'OPTIONS': dict(settings_dict.get('OPTIONS', {})),
+        }
+        pool_options = saved['OPTIONS'].get('pool') or {}
+        if pool_options is True:
+            pool_options = {}
+        pool_options = {'min_size': options['threads'], 'max_size': options['threads'], **pool_options}
+
+        connection.close_pool()
+        settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_MAX_AGE'] = 0
+        old_name = settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            Farmer.objects.bulk_create(Farmer(name=f'Farmer {i}') for i in range(options['farmers']))
+            reconcile()
+            farmer_ids = list(Farmer.objects.values_list('id', flat=True))
+
+            results = {}
+            with override_settings(RESPONSE_CACHE_ALIAS=None, DEBUG=False, ALLOWED_HOSTS=['*']):
+                for mode in modes:
+                    self.configure(mode, pool_options)
+                    results[mode] = self.run(options, farmer_ids)
+                    if mode == 'pool':
+                        stats = pool_stats()['default'].get('pool', {})
+                        self.stdout.write('pool stats: ' + ', '.join(f'{k}={v}' for k, v in stats.items()))
+            self.report(results)
+        finally:
+            connections.close_all()
+            connection.close_pool()
+            settings_dict['OPTIONS'].pop('pool', None)
+            settings_dict['CONN_MAX_AGE'] = 0
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            settings_dict.update(saved)
+
+    def configure(self, mode, pool_options):
+        """Point new connections at ``mode``'s strategy."""
+        connections.close_all()
+        connection.close_pool()
+        settings_dict = connection.settings_dict
+        settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_HEALTH_CHECKS'] = mode != 'connect'
+        settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+        if mode == 'pool':
+            settings_dict['OPTIONS']['pool'] = pool_options
+
+    def run(self, options, farmer_ids):
+        timings = []
+        lock = threading.Lock()
+
+        def client_loop(seed):
+            rng = random.Random(seed)
+            client = Client()
+            mine = []
+            try:
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    # request_finished closes (or returns to the pool) per CONN_MAX_AGE
+                    response = client.get(f'/api/farmers/{rng.choice(farmer_ids)}/')
+                    assert response.status_code == 200, response.status_code
+                    mine.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections.close_all()
+            with lock:
+                timings.extend(mine)
+
+        threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, time.perf_counter() - started
+
+    def report(self, results):
+        self.stdout.write(f'\n{"mode":<12}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+        for mode, (timings, elapsed) in results.items():
+            self.stdout.write(f'{mode:<12}{len(timings) / elapsed:>8.0f}{statistics.median(timings):>9.2f}'
+                              f'{percentile(timings, 0.95):>9.2f}{percentile(timings, 0.99):>9.2f}')
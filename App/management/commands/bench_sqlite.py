@@ -0,0 +1,149 @@
+"""Mixed read/write load on SQLite with and without the tuning profile.
+
+Seeds a throwaway database *file* (WAL needs one), then runs the same
+workload twice, each time from ``--threads`` concurrent clients issuing
+soil-record POSTs (``--write-ratio`` of requests) among list and detail GETs:
+
+* ``default``: rollback journal, ``synchronous=FULL``, deferred
+  transactions, no lock retries, i.e. Django's stock SQLite setup;
+* ``tuned``: the App.sqlite profile and ``BEGIN IMMEDIATE``.
+
+Reports throughput, latency percentiles per request type, and requests that
+failed (typically "database is locked")::
+
+    python manage.py bench_sqlite --threads 16 --requests 400
+"""
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from App.counters import reconcile
+from App.management.benchmarks import percentile
+from App.models import SoilRecord
+from App.seeding import seed_dataset
+from App.sqlite import pragmas
+
+MODES = ('default', 'tuned')
+
+
+def configure(tuned):
+    """Switch new connections between Django's defaults and the profile."""
+    connections.close_all()
+    connection.settings_dict['OPTIONS']['transaction_mode'] = 'IMMEDIATE' if tuned else None
+    with connection.cursor() as cursor:
+        # journal_mode is stored in the file, so reset it explicitly
+        cursor.execute(f'PRAGMA journal_mode = {pragmas()["journal_mode"] if tuned else "delete"}')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent reads and writes on SQLite with and without the tuning profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16,
+                            help='Concurrent clients (default: 16)')
+        parser.add_argument('--requests', type=int, default=300,
+                            help='Requests per client (default: 300)')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Share of requests that are writes (default: 0.2)')
+        parser.add_argument('--farmers', type=int, default=200)
+        parser.add_argument('--records', type=int, default=20000,
+                            help='Rows seeded into each record table (default: 20000)')
+
+    def handle(self, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('bench_sqlite needs an SQLite database')
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        old_options = dict(connection.settings_dict['OPTIONS'])
+        directory = tempfile.mkdtemp(prefix='bench_sqlite_')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.db')
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Seeding {options["farmers"]} farmers and {options["records"]} '
+                              f'rows per record table in {connection.settings_dict["NAME"]}...')
+            farmer_ids = seed_dataset(options['farmers'], options['records'])
+            reconcile()
+            record_ids = list(SoilRecord.objects.values_list('id', flat=True)[:1000])
+
+            results = {}
+            with override_settings(RESPONSE_CACHE_ALIAS=None, DEBUG=False, ALLOWED_HOSTS=['*']):
+                for mode in MODES:
+                    with override_settings(SQLITE_TUNING=mode == 'tuned'):
+                        configure(mode == 'tuned')
+                        results[mode] = self.run(options, farmer_ids, record_ids)
+            self.report(results)
+        finally:
+            connections.close_all()
+            connection.settings_dict['OPTIONS'] = old_options
+            creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = None
+            os.rmdir(directory)
+
+    def run(self, options, farmer_ids, record_ids):
+        timings = {'read': [], 'write': []}
+        errors = {'read': 0, 'write': 0}
+        reasons = Counter()
+        lock = threading.Lock()
+
+        def client_loop(seed):
+            rng = random.Random(seed)
+            client = Client(raise_request_exception=False)
+            try:
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    if rng.random() < options['write_ratio']:
+                        kind = 'write'
+                        response = client.post('/api/records/soil/', {
+                            'farmer_id': rng.choice(farmer_ids), 'ph': round(rng.uniform(5, 8), 2),
+                            'nitrogen': 20, 'phosphorus': 15, 'potassium': 120,
+                        }, content_type='application/json')
+                    else:
+                        kind = 'read'
+                        if rng.random() < 0.5:
+                            response = client.get(f'/api/records/soil/?limit=50&farmer_id={rng.choice(farmer_ids)}')
+                        else:
+                            response = client.get(f'/api/records/soil/{rng.choice(record_ids)}/')
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        if response.status_code >= 500:
+                            errors[kind] += 1
+                            reasons[self.reason(response)] += 1
+                        else:
+                            timings[kind].append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, errors, reasons, time.perf_counter() - started
+
+    def reason(self, response):
+        if response.get('Content-Type') == 'application/json':
+            return response.json().get('error', '')
+        return f'HTTP {response.status_code}'
+
+    def report(self, results):
+        self.stdout.write(f'\n{"mode":<9}{"req/s":>8}{"read p50":>10}{"read p99":>10}'
+                          f'{"write p50":>11}{"write p99":>11}{"failed r/w":>12}')
+        for mode, (timings, errors, _, elapsed) in results.items():
+            done = len(timings['read']) + len(timings['write'])
+            self.stdout.write(
+                f'{mode:<9}{done / elapsed:>8.0f}'
+                f'{statistics.median(timings["read"] or [0]):>10.2f}{percentile(timings["read"], 0.99):>10.2f}'
+                f'{statistics.median(timings["write"] or [0]):>11.2f}{percentile(timings["write"], 0.99):>11.2f}'
+                f'{errors["read"]:>6}/{errors["write"]}')
+        for mode, (_, _, reasons, _) in results.items():
+            for reason, count in reasons.most_common(3):
+                self.stdout.write(f'{mode}: {count} x {reason}')
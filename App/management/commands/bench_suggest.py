@@ -0,0 +1,86 @@
+"""Benchmark the suggestion engine.
+
+Generates random plots, checks that the batch path produces the same
+suggestion lists as per-plot calls, reports the wall time of each, and shows
+how per-call cost behaves as the rule table grows::
+
+    python manage.py bench_suggest --plots 50000 --rules 5000
+"""
+import copy
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from App.ai_engine import DEFAULT_RULES, suggest_actions, suggest_actions_batch
+from App.rule_engine import RuleEngine
+
+CROPS = ('Mirchi', 'green chili', 'methi', 'Fenugreek', 'wheat', 'rice', None)
+SOIL_TYPES = ('Sandy loam', 'clay', 'black', 'red', None)
+
+
+def random_columns(plots, seed=0):
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return None if rng.random() < 0.1 else value
+
+    return {
+        'soil_ph': [maybe(round(rng.uniform(4.0, 9.5), 1)) for _ in range(plots)],
+        'moisture': [maybe(rng.randrange(0, 100)) for _ in range(plots)],
+        'soil_type': [rng.choice(SOIL_TYPES) for _ in range(plots)],
+        'crop': [rng.choice(CROPS) for _ in range(plots)],
+        'days_since_last_water': [maybe(rng.randrange(0, 20)) for _ in range(plots)],
+    }
+
+
+def grown_rules(extra, seed=0):
+    """DEFAULT_RULES plus ``extra`` synthetic crop-keyword and threshold rules."""
+    rng = random.Random(seed)
+    table = copy.deepcopy(DEFAULT_RULES)
+    table['suggestions']['synthetic'] = {'action': 'Synthetic rule', 'reason': 'value={value}', 'confidence': 0.1}
+    for i in range(extra):
+        if i % 2:
+            word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(8))
+            table['rules'].append({'input': 'crop', 'keywords': [word], 'suggest': 'synthetic'})
+        else:
+            low = round(rng.uniform(0, 100), 3)
+            table['rules'].append({'input': 'moisture', 'gt': low, 'lt': low + 0.001, 'suggest': 'synthetic'})
+    return table
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized suggestion engine and rule-table scaling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plots', type=int, default=50000)
+        parser.add_argument('--rules', type=int, default=5000,
+                            help='Synthetic rules added for the scaling run (default: 5000)')
+
+    def handle(self, **options):
+        plots = options['plots']
+        columns = random_columns(plots)
+        payloads = [{name: values[i] for name, values in columns.items()} for i in range(plots)]
+
+        started = time.perf_counter()
+        scalar = [suggest_actions(payload)['suggestions'] for payload in payloads]
+        scalar_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = suggest_actions_batch(columns)['results']
+        batch_s = time.perf_counter() - started
+
+        if scalar != batch:
+            raise CommandError('batch results differ from suggest_actions')
+        self.stdout.write(f'{plots} plots: scalar {scalar_s:.3f}s, batch {batch_s:.3f}s '
+                          f'({scalar_s / batch_s:.1f}x), outputs identical')
+
+        for engine, label in ((RuleEngine(DEFAULT_RULES), f'{len(DEFAULT_RULES["rules"])} rules'),
+                              (RuleEngine(grown_rules(options['rules'])),
+                               f'{len(DEFAULT_RULES["rules"]) + options["rules"]} rules')):
+            started = time.perf_counter()
+            for payload in payloads:
+                engine.suggest(payload)
+            per_call = (time.perf_counter() - started) / plots * 1e6
+            self.stdout.write(f'{label:>12}: {per_call:.2f} µs per call')
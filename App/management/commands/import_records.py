@@ -0,0 +1,164 @@
+"""Backfill soil/water/crop records from CSV or NDJSON files.
+
+Files are read row by row, so their size is not limited by memory. Farmers
+are resolved by ``farmer_id`` or by ``farmer`` (name) against a map loaded
+once up front. Rows are committed in transactions of ``--batch-size`` rows,
+each of which also updates the file's ``ImportCheckpoint`` row, so an
+interrupted import can be re-run and picks up exactly after the last
+committed batch. The checkpoint holds the file's SHA-256 and resuming from
+a file that has changed since is refused.
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from App.ingest import ValidationError, build_record, bulk_insert
+from App.models import Farmer, ImportCheckpoint
+from App.serializers import RECORD_MODELS
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_rows(path, fmt):
+    with open(path, newline='', encoding='utf-8') as fh:
+        if fmt == 'csv':
+            for row in csv.DictReader(fh):
+                yield {key: (value if value != '' else None) for key, value in row.items()}
+        else:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+class FarmerResolver:
+    """Map ``farmer_id`` / ``farmer`` (name) values to existing farmer ids."""
+
+    def __init__(self):
+        self.ids = set()
+        self.by_name = {}
+        self.ambiguous = set()
+        for pk, name in Farmer.objects.values_list('id', 'name').iterator():
+            self.ids.add(pk)
+            key = name.strip().lower()
+            if key in self.by_name:
+                self.ambiguous.add(key)
+            self.by_name[key] = pk
+
+    def resolve(self, row):
+        raw = row.get('farmer_id')
+        if raw not in (None, ''):
+            try:
+                return int(raw)
+            except (TypeError, ValueError):
+                raise ValidationError(f'farmer_id {raw!r} is not an integer')
+        name = (row.get('farmer') or '').strip().lower()
+        if not name:
+            raise ValidationError('farmer_id or farmer is required')
+        if name in self.ambiguous:
+            raise ValidationError(f'farmer name {name!r} is ambiguous')
+        if name not in self.by_name:
+            raise ValidationError(f'farmer {name!r} does not exist')
+        return self.by_name[name]
+
+
+class Command(BaseCommand):
+    help = 'Stream records from a CSV or NDJSON file into the database in large batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(RECORD_MODELS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per transaction (default: 5000)')
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint name for resuming (default: the absolute path of the file)')
+        parser.add_argument('--no-resume', action='store_true',
+                            help='Ignore an existing checkpoint and start from the first row')
+
+    def handle(self, kind, path, **options):
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        self.checkpoint = options['checkpoint'] or os.path.abspath(path)
+        self.sha256 = file_sha256(path)
+
+        done = 0 if options['no_resume'] else self.load_checkpoint(path)
+        if done:
+            self.stdout.write(f'Resuming after {done} rows')
+
+        self.verbosity = options['verbosity']
+        self.model = RECORD_MODELS[kind]
+        self.resolver = FarmerResolver()
+        self.started = time.monotonic()
+        self.inserted = self.skipped = 0
+
+        batch = []
+        rows = read_rows(path, fmt)
+        for row_no, row in enumerate(rows, start=1):
+            if row_no <= done:
+                continue
+            batch.append((row_no, row))
+            if len(batch) >= options['batch_size']:
+                self.commit(batch)
+                batch = []
+        if batch:
+            self.commit(batch)
+
+        self.report(final=True)
+
+    def commit(self, batch):
+        records = []
+        for row_no, row in batch:
+            try:
+                if not isinstance(row, dict):
+                    raise ValidationError('row is not a JSON object')
+                row = dict(row, farmer_id=self.resolver.resolve(row))
+                records.append(build_record(self.model, row, self.resolver.ids))
+            except ValidationError as e:
+                self.skipped += 1
+                if self.verbosity > 1:
+                    self.stderr.write(f'row {row_no}: {e}')
+        with transaction.atomic():
+            bulk_insert(self.model, records)
+            ImportCheckpoint.objects.update_or_create(
+                name=self.checkpoint, defaults={'sha256': self.sha256, 'rows': batch[-1][0]})
+        self.inserted += len(records)
+        self.report()
+
+    def report(self, final=False):
+        elapsed = time.monotonic() - self.started
+        rate = self.inserted / elapsed if elapsed else 0.0
+        message = f'{self.inserted} rows inserted, {self.skipped} skipped ({rate:,.0f} rows/s)'
+        if final:
+            self.stdout.write(self.style.SUCCESS(f'Done: {message} in {elapsed:.1f}s'))
+        elif self.verbosity:
+            self.stdout.write(message)
+
+    def load_checkpoint(self, path):
+        """Rows already committed from ``path``; 0 when there is no checkpoint."""
+        checkpoint = ImportCheckpoint.objects.filter(pk=self.checkpoint).first()
+        if checkpoint is None:
+            return 0
+        if checkpoint.sha256 != self.sha256:
+            raise CommandError(f'{path} has changed since {checkpoint.rows} rows were imported from it; '
+                               'use --no-resume to import it from the first row')
+        return checkpoint.rows
@@ -0,0 +1,12 @@
+"""Recreate the per-farmer LatestReading table from the record history."""
+from django.core.management.base import BaseCommand
+
+from App.latest import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the latest soil/water/crop reading of every farmer from history'
+
+    def handle(self, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt latest readings for {count} farmers'))
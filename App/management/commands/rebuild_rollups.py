@@ -0,0 +1,15 @@
+"""Recreate the analytics rollups from the record history."""
+from django.core.management.base import BaseCommand
+
+from App.analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily/monthly/seasonal analytics rollups from history (e.g. after a backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, **options):
+        count = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup rows'))
@@ -0,0 +1,18 @@
+"""Reset the /stats/ counters to the exact table counts and bump table versions."""
+from django.core.management.base import BaseCommand
+
+from App.counters import reconcile, touch_all
+
+
+class Command(BaseCommand):
+    help = 'Recount farmers and records and repair any drift in the stats counters'
+
+    def handle(self, **options):
+        for key, (stored, exact) in reconcile().items():
+            if stored == exact:
+                self.stdout.write(f'{key}: {exact}')
+            else:
+                self.stdout.write(self.style.WARNING(f'{key}: {stored} -> {exact}'))
+        # Rows may have changed behind the ORM: invalidate cached ETags too
+        touch_all()
+        self.stdout.write(self.style.SUCCESS('Counters reconciled'))
@@ -0,0 +1,331 @@
+"""Per-route request metrics, exported in Prometheus text format at /metrics.
+
+``MetricsMiddleware`` records, per resolved URL name and HTTP method (methods
+outside ``METHODS`` share the label ``other``):
+
+* requests by status code;
+* a latency histogram;
+* SQL queries issued and time spent in them;
+* a response size histogram (streamed responses without a
+  ``Content-Length`` are left out of it, their size being unknown).
+
+Queries are counted by an execute wrapper installed on every connection when
+it is created. It attributes each query to the request in progress through a
+context variable, so it also sees queries that async views run in
+``sync_to_async`` threads.
+
+Recording takes no locks. Each thread updates its own shard of series, and
+``snapshot()`` sums the shards when /metrics is scraped. A thread's shard is
+folded into the totals of finished threads when the thread exits, so servers
+that start a thread per request do not accumulate shards.
+
+Multi-process servers (gunicorn, uvicorn workers) set ``METRICS_DIR`` to a
+directory shared by the workers and emptied at server start. Every process
+writes its totals there at most every ``METRICS_FLUSH_INTERVAL`` seconds,
+and /metrics adds up all the files, so a scrape answered by any one worker
+reports the whole server.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+# Methods labelled as themselves; anything a client makes up is 'other'
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# [queries, seconds] of the request being served in this context
+_request_queries = ContextVar('metrics_request_queries', default=None)
+
+_local = threading.local()
+_shards = []  # each live thread's {(route, method): Series}
+_retired = {}  # totals of the shards of finished threads, as snapshot() returns
+_shards_lock = threading.Lock()  # guards _shards and _retired, not the series
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+
+
+class Series:
+    __slots__ = ('count', 'latency_sum', 'latency_buckets', 'queries', 'query_seconds',
+                 'size_count', 'size_sum', 'size_buckets', 'statuses')
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.size_count = 0
+        self.size_sum = 0
+        self.size_buckets = [0] * (len(SIZE_BUCKETS) + 1)
+        self.statuses = {}
+
+    def observe(self, status, seconds, queries, query_seconds, size):
+        self.count += 1
+        self.latency_sum += seconds
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.queries += queries
+        self.query_seconds += query_seconds
+        if size is not None:
+            self.size_count += 1
+            self.size_sum += size
+            self.size_buckets[bisect_left(SIZE_BUCKETS, size)] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+class _Owner:
+    """Held only by its thread's ``_local``, so it is collected when the thread exits."""
+    __slots__ = ('series', '__weakref__')
+
+
+def _shard():
+    owner = getattr(_local, 'owner', None)
+    if owner is None:
+        owner = _local.owner = _Owner()
+        owner.series = {}
+        with _shards_lock:
+            _shards.append(owner.series)
+        weakref.finalize(owner, _retire, owner.series)
+    return owner.series
+
+
+def _retire(shard):
+    with _shards_lock:
+        _shards.remove(shard)
+        for (route, method), series in shard.items():
+            _merge(_retired, route, method, _row(series))
+
+
+def record_query(execute, sql, params, many, context):
+    counters = _request_queries.get()
+    if counters is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counters[0] += 1
+        counters[1] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # First in the list: execute_wrapper() blocks pop the last entry on exit
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'  # 404s before routing; keeps label cardinality bounded
+    return match.view_name or match.route
+
+
+def method_label(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+def response_size(response):
+    """Body size in bytes, or ``None`` for a stream of unknown length."""
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+def observe(request, response, seconds, counters):
+    key = (route_name(request), method_label(request))
+    shard = _shard()
+    series = shard.get(key)
+    if series is None:
+        series = shard[key] = Series()
+    series.observe(response.status_code, seconds, counters[0], counters[1], response_size(response))
+    if metrics_dir() and time.monotonic() - _last_flush >= flush_interval():
+        flush()
+
+
+class MetricsMiddleware:
+    """Time every request and record it under its route (place it first)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counters = [0, 0.0]
+        token = _request_queries.set(counters)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        observe(request, response, time.perf_counter() - started, counters)
+        return response
+
+    async def __acall__(self, request):
+        counters = [0, 0.0]
+        token = _request_queries.set(counters)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        observe(request, response, time.perf_counter() - started, counters)
+        return response
+
+
+# -- aggregation ------------------------------------------------------------
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+
+def _merge(totals, route, method, row):
+    total = totals.get((route, method))
+    if total is None:
+        total = totals[(route, method)] = {
+            'count': 0, 'latency_sum': 0.0, 'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+            'queries': 0, 'query_seconds': 0.0, 'size_count': 0, 'size_sum': 0,
+            'size_buckets': [0] * (len(SIZE_BUCKETS) + 1), 'statuses': {},
+        }
+    for name in ('count', 'latency_sum', 'queries', 'query_seconds', 'size_count', 'size_sum'):
+        total[name] += row[name]
+    for name in ('latency_buckets', 'size_buckets'):
+        total[name] = [a + b for a, b in zip(total[name], row[name])]
+    for status, count in row['statuses'].items():
+        total['statuses'][str(status)] = total['statuses'].get(str(status), 0) + count
+
+
+def _row(series):
+    # Copies, as the owning thread may be updating the series
+    row = {name: getattr(series, name) for name in Series.__slots__}
+    row['statuses'] = dict(row['statuses'])
+    return row
+
+
+def snapshot():
+    """This process's totals: ``{(route, method): {...}}``."""
+    totals = {}
+    with _shards_lock:
+        shards = list(_shards)
+        for (route, method), row in _retired.items():
+            _merge(totals, route, method, row)
+    for shard in shards:
+        for (route, method), series in list(shard.items()):
+            _merge(totals, route, method, _row(series))
+    return totals
+
+
+def flush():
+    """Write this process's totals to ``METRICS_DIR`` (one file per pid)."""
+    global _last_flush
+    if not _flush_lock.acquire(blocking=False):
+        return  # another thread is writing them
+    try:
+        _last_flush = time.monotonic()
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        rows = [{'route': route, 'method': method, **values} for (route, method), values in snapshot().items()]
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'latency_buckets': LATENCY_BUCKETS, 'size_buckets': SIZE_BUCKETS, 'series': rows}, f)
+        os.replace(f'{path}.tmp', path)
+    finally:
+        _flush_lock.release()
+
+
+def collect():
+    """Totals of every process sharing ``METRICS_DIR``, or of this one."""
+    directory = metrics_dir()
+    if not directory:
+        return snapshot()
+    flush()
+    totals = {}
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith('metrics-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced, or truncated by a crash
+        if tuple(data['latency_buckets']) != LATENCY_BUCKETS or tuple(data['size_buckets']) != SIZE_BUCKETS:
+            continue  # written by a version with different buckets
+        for row in data['series']:
+            row.setdefault('size_count', row['count'])  # written before streams were left out
+            _merge(totals, row['route'], row['method'], row)
+    return totals
+
+
+# -- exposition -------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram(lines, name, bounds, buckets, total, count, **labels):
+    cumulative = 0
+    for bound, n in zip(bounds, buckets):
+        cumulative += n
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total}')
+    lines.append(f'{name}_count{_labels(**labels)} {count}')
+
+
+def render(totals):
+    """Prometheus text exposition (format 0.0.4) of ``totals``."""
+    rows = sorted(totals.items())
+    lines = ['# HELP agri_http_requests_total Requests by route, method and status code.',
+             '# TYPE agri_http_requests_total counter']
+    for (route, method), total in rows:
+        for status, count in sorted(total['statuses'].items()):
+            lines.append(f'agri_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+    lines += ['# HELP agri_http_request_duration_seconds Time to produce the response.',
+              '# TYPE agri_http_request_duration_seconds histogram']
+    for (route, method), total in rows:
+        _histogram(lines, 'agri_http_request_duration_seconds', LATENCY_BUCKETS, total['latency_buckets'],
+                   total['latency_sum'], total['count'], route=route, method=method)
+
+    lines += ['# HELP agri_http_db_queries_total SQL queries issued while serving requests.',
+              '# TYPE agri_http_db_queries_total counter']
+    for (route, method), total in rows:
+        lines.append(f'agri_http_db_queries_total{_labels(route=route, method=method)} {total["queries"]}')
+
+    lines += ['# HELP agri_http_db_query_seconds_total Time spent in SQL queries while serving requests.',
+              '# TYPE agri_http_db_query_seconds_total counter']
+    for (route, method), total in rows:
+        lines.append(f'agri_http_db_query_seconds_total{_labels(route=route, method=method)} '
+                     f'{total["query_seconds"]}')
+
+    lines += ['# HELP agri_http_response_size_bytes Response body size.',
+              '# TYPE agri_http_response_size_bytes histogram']
+    for (route, method), total in rows:
+        _histogram(lines, 'agri_http_response_size_bytes', SIZE_BUCKETS, total['size_buckets'],
+                   total['size_sum'], total['size_count'], route=route, method=method)
+    return '\n'.join(lines) + '\n'
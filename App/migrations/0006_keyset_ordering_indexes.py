@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0005_alter_croprecord_id_alter_waterrecord_id'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='croprecord',
+            options={'ordering': ['-planted_on', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='farmer',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='soilrecord',
+            options={'ordering': ['-recorded_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='waterrecord',
+            options={'ordering': ['-recorded_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='croprecord',
+            index=models.Index(fields=['-planted_on', '-id'], name='crop_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmer',
+            index=models.Index(fields=['-created_at', '-id'], name='farmer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilrecord',
+            index=models.Index(fields=['-recorded_at', '-id'], name='soil_recorded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waterrecord',
+            index=models.Index(fields=['-recorded_at', '-id'], name='water_recorded_idx'),
+        ),
+    ]
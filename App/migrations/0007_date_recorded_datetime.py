@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Move the free-text date_recorded aside and add a typed, indexed column.
+
+    The old text is kept in ``date_recorded_text`` until 0008 has parsed it.
+    """
+
+    dependencies = [
+        ('App', '0006_keyset_ordering_indexes'),
+    ]
+
+    operations = []
+    for model_name in ('croprecord', 'soilrecord', 'waterrecord'):
+        operations += [
+            migrations.RenameField(
+                model_name=model_name,
+                old_name='date_recorded',
+                new_name='date_recorded_text',
+            ),
+            migrations.AddField(
+                model_name=model_name,
+                name='date_recorded',
+                field=models.DateTimeField(blank=True, db_index=True, null=True),
+            ),
+        ]
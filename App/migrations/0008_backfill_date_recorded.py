@@ -0,0 +1,110 @@
+"""Parse the legacy ``date_recorded_text`` strings into ``date_recorded``.
+
+Runs non-atomically in id-ordered batches, each committed on its own, so no
+long table lock is held. Only rows whose ``date_recorded`` is still NULL are
+touched, which makes the migration safe to re-run after an interruption.
+Text that cannot be parsed falls back to the row's creation timestamp, the
+value the API would have stored had the client sent nothing. 0009 drops the
+text column, so every such row is logged with its original text, followed
+by a count per table.
+
+The parser is a frozen copy of ``App.timestamps.parse_timestamp`` as of this
+migration, so later changes to the live module cannot change what it writes.
+"""
+import logging
+from datetime import datetime, time
+
+from django.db import migrations, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+CREATED_FIELDS = {
+    'CropRecord': 'planted_on',
+    'SoilRecord': 'recorded_at',
+    'WaterRecord': 'recorded_at',
+}
+
+FALLBACK_FORMATS = (
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+)
+
+
+def parse_timestamp(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value.replace('Z', '+00:00'))
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        for fmt in FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def backfill(apps, schema_editor):
+    for model_name, created_field in CREATED_FIELDS.items():
+        model = apps.get_model('App', model_name)
+        pending = model.objects.filter(date_recorded__isnull=True).order_by('id')
+        last_id = fell_back = 0
+        while True:
+            batch = list(
+                pending.filter(id__gt=last_id)
+                .values_list('id', 'date_recorded_text', created_field)[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            records = []
+            for pk, text, created in batch:
+                parsed = parse_timestamp(text)
+                if parsed is None and text and text.strip():
+                    fell_back += 1
+                    logger.warning('%s %s: unparseable date_recorded %r replaced by %s',
+                                   model_name, pk, text, created)
+                records.append(model(id=pk, date_recorded=parsed or created))
+            with transaction.atomic():
+                model.objects.bulk_update(records, ['date_recorded'])
+            last_id = batch[-1][0]
+        if fell_back:
+            logger.warning('%s: %d unparseable date_recorded values replaced by %s',
+                           model_name, fell_back, created_field)
+
+
+def restore_text(apps, schema_editor):
+    for model_name in CREATED_FIELDS:
+        model = apps.get_model('App', model_name)
+        for record in model.objects.filter(date_recorded_text__isnull=True).iterator():
+            if record.date_recorded:
+                record.date_recorded_text = record.date_recorded.isoformat()
+                record.save(update_fields=['date_recorded_text'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('App', '0007_date_recorded_datetime'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore_text),
+    ]
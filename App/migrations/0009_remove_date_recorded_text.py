@@ -0,0 +1,13 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0008_backfill_date_recorded'),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name=model_name, name='date_recorded_text')
+        for model_name in ('croprecord', 'soilrecord', 'waterrecord')
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0009_remove_date_recorded_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='croprecord',
+            index=models.Index(fields=['farmer', '-planted_on', '-id'], name='crop_farmer_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='croprecord',
+            index=models.Index(fields=['crop_name', '-planted_on'], name='crop_name_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='soilrecord',
+            index=models.Index(fields=['farmer', '-recorded_at', '-id'], name='soil_farmer_recorded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waterrecord',
+            index=models.Index(fields=['farmer', '-recorded_at', '-id'], name='water_farmer_recorded_idx'),
+        ),
+    ]
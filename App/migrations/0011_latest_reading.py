@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Frozen copy of App.latest.rebuild() as of this migration, so later changes
+# to the live module cannot change what it writes.
+# model name -> (column prefix, creation timestamp, {column: record column})
+KINDS = {
+    'SoilRecord': ('soil', 'recorded_at', {'soil_ph': 'ph', 'moisture': 'moisture', 'soil_type': 'soil_type'}),
+    'WaterRecord': ('water', 'recorded_at', {}),
+    'CropRecord': ('crop', 'planted_on', {'crop_name': 'crop_name'}),
+}
+
+
+def populate(apps, schema_editor):
+    Farmer = apps.get_model('App', 'Farmer')
+    LatestReading = apps.get_model('App', 'LatestReading')
+    models = {name: apps.get_model('App', name) for name in KINDS}
+    annotations = {
+        f'latest_{prefix}': Subquery(
+            models[name].objects.filter(farmer_id=OuterRef('pk'))
+            .order_by(Coalesce('date_recorded', created_field).desc(), '-id').values('id')[:1])
+        for name, (prefix, created_field, _) in KINDS.items()
+    }
+    farmers = list(Farmer.objects.annotate(**annotations).values('pk', *annotations))
+
+    rows = {}
+    for name, (prefix, created_field, copied) in KINDS.items():
+        ids = [f[f'latest_{prefix}'] for f in farmers if f[f'latest_{prefix}']]
+        for start in range(0, len(ids), 1000):
+            for record in models[name].objects.filter(id__in=ids[start:start + 1000]):
+                values = rows.setdefault(record.farmer_id, {})
+                values.update({column: getattr(record, source) for column, source in copied.items()})
+                values[f'{prefix}_id'] = record.id
+                values[f'{prefix}_at'] = record.date_recorded or getattr(record, created_field)
+    LatestReading.objects.bulk_create(
+        [LatestReading(farmer_id=farmer_id, **values) for farmer_id, values in rows.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestReading',
+            fields=[
+                ('farmer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_reading', serialize=False, to='App.farmer')),
+                ('soil_id', models.IntegerField(blank=True, null=True)),
+                ('soil_at', models.DateTimeField(blank=True, null=True)),
+                ('soil_ph', models.FloatField(blank=True, null=True)),
+                ('moisture', models.FloatField(blank=True, null=True)),
+                ('soil_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('water_id', models.IntegerField(blank=True, null=True)),
+                ('water_at', models.DateTimeField(blank=True, null=True)),
+                ('crop_id', models.IntegerField(blank=True, null=True)),
+                ('crop_at', models.DateTimeField(blank=True, null=True)),
+                ('crop_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+# Frozen copy of App.counters.reconcile() as of this migration, so later
+# changes to the live module cannot change what it writes.
+# model name -> counter key
+KEYS = {
+    'Farmer': 'farmers',
+    'CropRecord': 'crops',
+    'SoilRecord': 'soil',
+    'WaterRecord': 'water',
+}
+
+
+def populate(apps, schema_editor):
+    TableCount = apps.get_model('App', 'TableCount')
+    TableCount.objects.bulk_create(
+        [TableCount(table=key, rows=apps.get_model('App', name).objects.count()) for name, key in KEYS.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0011_latest_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableCount',
+            fields=[
+                ('table', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('rows', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
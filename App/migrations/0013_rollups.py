@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+# Frozen copy of App.analytics.rebuild() as of this migration, so later
+# changes to the live module cannot change what it writes.
+METRICS = {
+    'CropRecord': ('crop', ('yield_kg',), 'crop_name', 'planted_on'),
+    'SoilRecord': ('soil', ('ph', 'nitrogen', 'phosphorus', 'potassium', 'moisture'), None, 'recorded_at'),
+    'WaterRecord': ('water', ('ph', 'ec', 'tds'), None, 'recorded_at'),
+}
+GRANULARITIES = ('day', 'month', 'season')
+
+
+def period_start(day, granularity):
+    if granularity == 'day':
+        return day
+    if granularity == 'month':
+        return day.replace(day=1)
+    if 6 <= day.month <= 10:
+        return date(day.year, 6, 1)
+    if day.month >= 11:
+        return date(day.year, 11, 1)
+    if day.month <= 3:
+        return date(day.year - 1, 11, 1)
+    return date(day.year, 4, 1)
+
+
+def populate(apps, schema_editor):
+    Rollup = apps.get_model('App', 'Rollup')
+    tz = timezone.get_current_timezone()
+    for name, (prefix, fields, group, created_field) in METRICS.items():
+        model = apps.get_model('App', name)
+        keys = ['farmer_id', 'day'] + ([group] if group else [])
+        aggregates = {}
+        for field in fields:
+            aggregates[f'{field}_count'] = Count(field)
+            aggregates[f'{field}_total'] = Sum(field)
+            aggregates[f'{field}_min'] = Min(field)
+            aggregates[f'{field}_max'] = Max(field)
+        days = (model.objects
+                .annotate(day=TruncDate(Coalesce('date_recorded', created_field), tzinfo=tz))
+                .values(*keys).annotate(**aggregates).order_by('farmer_id'))
+
+        buckets, farmer_id = {}, None
+        for day in days.iterator(chunk_size=5000):
+            if day['farmer_id'] != farmer_id:
+                write(Rollup, buckets)
+                buckets, farmer_id = {}, day['farmer_id']
+            crop_name = day[group] if group else ''
+            for field in fields:
+                if not day[f'{field}_count']:
+                    continue
+                for granularity in GRANULARITIES:
+                    key = (farmer_id, f'{prefix}.{field}', granularity,
+                           period_start(day['day'], granularity), crop_name)
+                    acc = buckets.setdefault(key, [0, 0, day[f'{field}_min'], day[f'{field}_max']])
+                    acc[0] += day[f'{field}_count']
+                    acc[1] += day[f'{field}_total']
+                    acc[2] = min(acc[2], day[f'{field}_min'])
+                    acc[3] = max(acc[3], day[f'{field}_max'])
+        write(Rollup, buckets)
+
+
+def write(Rollup, buckets):
+    Rollup.objects.bulk_create(
+        [Rollup(farmer_id=farmer_id, metric=metric, granularity=granularity, period=period,
+                crop_name=crop_name, count=count, total=total, minimum=low, maximum=high)
+         for (farmer_id, metric, granularity, period, crop_name), (count, total, low, high) in buckets.items()],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0012_table_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=32)),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('month', 'Month'), ('season', 'Season')], max_length=8)),
+                ('period', models.DateField()),
+                ('crop_name', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('minimum', models.FloatField(blank=True, null=True)),
+                ('maximum', models.FloatField(blank=True, null=True)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='App.farmer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'granularity', '-period'], name='rollup_metric_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'metric', 'granularity', 'period', 'crop_name'), name='rollup_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
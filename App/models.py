@@ -7,12 +7,14 @@ class Farmer(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     def __str__(self):
         return self.name
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [models.Index(fields=['-created_at', '-id'], name='farmer_created_idx')]
 
 
 class CropRecord(models.Model):
@@ -21,15 +23,21 @@ class CropRecord(models.Model):
     farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='crops')
     crop_name = models.CharField(max_length=255, null=False)
     yield_kg = models.FloatField(blank=True, null=True)
-    date_recorded = models.CharField(max_length=255, blank=True, null=True)
+    date_recorded = models.DateTimeField(blank=True, null=True, db_index=True)
     planted_on = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return f"{self.crop_name} - {self.farmer.name}"
 
     class Meta:
-        ordering = ['-planted_on']
+        ordering = ['-planted_on', '-id']
+        indexes = [
+            models.Index(fields=['-planted_on', '-id'], name='crop_planted_idx'),
+            models.Index(fields=['farmer', '-planted_on', '-id'], name='crop_farmer_planted_idx'),
+            models.Index(fields=['crop_name', '-planted_on'], name='crop_name_planted_idx'),
+        ]
 
 
 class WaterRecord(models.Model):
@@ -40,15 +48,20 @@ class WaterRecord(models.Model):
     ec = models.FloatField(blank=True, null=True)
     tds = models.FloatField(blank=True, null=True)
     amount_l = models.FloatField(blank=True, null=True)
-    date_recorded = models.CharField(max_length=255, blank=True, null=True)
+    date_recorded = models.DateTimeField(blank=True, null=True, db_index=True)
     recorded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return f"Water Record - {self.farmer.name} ({self.recorded_at})"
 
     class Meta:
-        ordering = ['-recorded_at']
+        ordering = ['-recorded_at', '-id']
+        indexes = [
+            models.Index(fields=['-recorded_at', '-id'], name='water_recorded_idx'),
+            models.Index(fields=['farmer', '-recorded_at', '-id'], name='water_farmer_recorded_idx'),
+        ]
 
 
 class SoilRecord(models.Model):
@@ -63,12 +76,104 @@ class SoilRecord(models.Model):
     potassium = models.FloatField(blank=True, null=True)
     moisture = models.FloatField(blank=True, null=True)
     soil_type = models.CharField(max_length=100, blank=True, null=True)
-    date_recorded = models.CharField(max_length=255, blank=True, null=True)
+    date_recorded = models.DateTimeField(blank=True, null=True, db_index=True)
     recorded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return f"Soil Record - {self.farmer.name} ({self.recorded_at})"
 
     class Meta:
-        ordering = ['-recorded_at']
+        ordering = ['-recorded_at', '-id']
+        indexes = [
+            models.Index(fields=['-recorded_at', '-id'], name='soil_recorded_idx'),
+            models.Index(fields=['farmer', '-recorded_at', '-id'], name='soil_farmer_recorded_idx'),
+        ]
+
+
+class LatestReading(models.Model):
+    """Most recent soil, water and crop reading per farmer.
+
+    Maintained on every record write (see App.latest) so per-farmer
+    suggestions never scan the history tables.
+    """
+    farmer = models.OneToOneField(Farmer, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='latest_reading')
+
+    soil_id = models.IntegerField(blank=True, null=True)
+    soil_at = models.DateTimeField(blank=True, null=True)
+    soil_ph = models.FloatField(blank=True, null=True)
+    moisture = models.FloatField(blank=True, null=True)
+    soil_type = models.CharField(max_length=100, blank=True, null=True)
+
+    water_id = models.IntegerField(blank=True, null=True)
+    water_at = models.DateTimeField(blank=True, null=True)
+
+    crop_id = models.IntegerField(blank=True, null=True)
+    crop_at = models.DateTimeField(blank=True, null=True)
+    crop_name = models.CharField(max_length=255, blank=True, null=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Latest readings - {self.farmer_id}"
+
+
+class TableCount(models.Model):
+    """Row count and change counter of one table, kept current by signals
+    (see App.counters)."""
+    table = models.CharField(max_length=32, primary_key=True)
+    rows = models.BigIntegerField(default=0)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.table}: {self.rows}"
+
+
+class Rollup(models.Model):
+    """Count/sum/min/max of one metric for one farmer and period.
+
+    Maintained on every record write (see App.analytics); ``crop_name`` is
+    set for crop metrics and empty otherwise.
+    """
+    GRANULARITY_CHOICES = [('day', 'Day'), ('month', 'Month'), ('season', 'Season')]
+
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name='rollups')
+    metric = models.CharField(max_length=32)
+    granularity = models.CharField(max_length=8, choices=GRANULARITY_CHOICES)
+    period = models.DateField()
+    crop_name = models.CharField(max_length=255, blank=True, default='')
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    minimum = models.FloatField(blank=True, null=True)
+    maximum = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'metric', 'granularity', 'period', 'crop_name'],
+                                    name='rollup_bucket_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'granularity', '-period'], name='rollup_metric_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.granularity} {self.period} - {self.farmer_id}"
+
+
+class ImportCheckpoint(models.Model):
+    """Rows of an input file committed by ``manage.py import_records``.
+
+    Written in the same transaction as each batch, so a resumed import
+    neither repeats nor skips rows; ``sha256`` identifies the file contents
+    the count refers to.
+    """
+    name = models.CharField(max_length=1024, primary_key=True)
+    sha256 = models.CharField(max_length=64)
+    rows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.rows} rows"
@@ -1,3 +1,39 @@
+from .precompressed import PrecompressedJSON
+
+PAGINATION_PARAMETERS = [
+    {
+        "name": "limit",
+        "in": "query",
+        "required": False,
+        "description": "Page size (capped server-side)",
+        "schema": {"type": "integer", "minimum": 1},
+    },
+    {
+        "name": "cursor",
+        "in": "query",
+        "required": False,
+        "description": "Opaque cursor from the X-Next-Cursor header of the previous page",
+        "schema": {"type": "string"},
+    },
+]
+
+RANGE_PARAMETERS = [
+    {
+        "name": "from",
+        "in": "query",
+        "required": False,
+        "description": "Only records with date_recorded at or after this ISO 8601 date/datetime",
+        "schema": {"type": "string", "format": "date-time"},
+    },
+    {
+        "name": "to",
+        "in": "query",
+        "required": False,
+        "description": "Only records with date_recorded before this ISO 8601 date/datetime",
+        "schema": {"type": "string", "format": "date-time"},
+    },
+]
+
 OPENAPI_SCHEMA = {
     "openapi": "3.0.3",
     "info": {
@@ -39,6 +75,15 @@ OPENAPI_SCHEMA = {
         "/stats/": {
             "get": {
                 "summary": "Record counts",
+                "parameters": [
+                    {
+                        "name": "exact",
+                        "in": "query",
+                        "required": False,
+                        "description": "1 to count the tables instead of reading the maintained counters",
+                        "schema": {"type": "integer", "enum": [0, 1]},
+                    }
+                ],
                 "responses": {
                     "200": {
                         "description": "Counts for dashboard",
@@ -54,6 +99,7 @@ OPENAPI_SCHEMA = {
         "/api/farmers/": {
             "get": {
                 "summary": "List farmers",
+                "parameters": PAGINATION_PARAMETERS,
                 "responses": {
                     "200": {
                         "description": "Farmer list",
@@ -168,6 +214,7 @@ OPENAPI_SCHEMA = {
         "/api/records/soil/": {
             "get": {
                 "summary": "List soil records",
+                "parameters": PAGINATION_PARAMETERS + RANGE_PARAMETERS,
                 "responses": {
                     "200": {
                         "description": "Soil record list",
@@ -286,6 +333,7 @@ OPENAPI_SCHEMA = {
         "/api/records/water/": {
             "get": {
                 "summary": "List water records",
+                "parameters": PAGINATION_PARAMETERS + RANGE_PARAMETERS,
                 "responses": {
                     "200": {
                         "description": "Water record list",
@@ -404,6 +452,7 @@ OPENAPI_SCHEMA = {
         "/api/records/crop/": {
             "get": {
                 "summary": "List crop records",
+                "parameters": PAGINATION_PARAMETERS + RANGE_PARAMETERS,
                 "responses": {
                     "200": {
                         "description": "Crop record list",
@@ -447,6 +496,7 @@ OPENAPI_SCHEMA = {
         "/api/records/crops/": {
             "get": {
                 "summary": "List crop records (alias)",
+                "parameters": PAGINATION_PARAMETERS + RANGE_PARAMETERS,
                 "responses": {
                     "200": {
                         "description": "Crop record list",
@@ -562,6 +612,61 @@ OPENAPI_SCHEMA = {
                 },
             },
         },
+        "/api/records/{kind}/bulk/": {
+            "post": {
+                "summary": "Create many records in one transaction",
+                "parameters": [
+                    {
+                        "name": "kind",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "string", "enum": ["soil", "water", "crop"]},
+                    }
+                ],
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": {"type": "array", "minItems": 1, "items": {"type": "object"}}
+                        }
+                    },
+                },
+                "responses": {
+                    "201": {"description": "All records created"},
+                    "207": {"description": "Some records rejected; see per-item results"},
+                    "400": {"description": "Not a non-empty array, or no valid records"},
+                    "413": {"description": "Too many records in one request"},
+                },
+            }
+        },
+        "/api/records/{kind}/export/": {
+            "get": {
+                "summary": "Stream all records of a kind",
+                "parameters": [
+                    {
+                        "name": "kind",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "string", "enum": ["soil", "water", "crop"]},
+                    },
+                    {
+                        "name": "format",
+                        "in": "query",
+                        "required": False,
+                        "schema": {"type": "string", "enum": ["ndjson", "json"], "default": "ndjson"},
+                    },
+                ],
+                "responses": {
+                    "200": {
+                        "description": "Streamed records",
+                        "content": {
+                            "application/x-ndjson": {"schema": {"type": "string"}},
+                            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+                        },
+                    }
+                },
+            }
+        },
         "/api/suggest/": {
             "post": {
                 "summary": "Get AI suggestions",
@@ -585,6 +690,109 @@ OPENAPI_SCHEMA = {
                 },
             }
         },
+        "/api/suggest/batch/": {
+            "post": {
+                "summary": "Get AI suggestions for many plots",
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/SuggestBatchRequest"}
+                        }
+                    },
+                },
+                "responses": {
+                    "200": {
+                        "description": "Per-plot suggestions, in input order",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/SuggestBatchResponse"}
+                            }
+                        },
+                    }
+                },
+            }
+        },
+        "/api/farmers/{farmer_id}/series/{metric}/": {
+            "get": {
+                "summary": "Downsampled time series of one metric",
+                "parameters": [
+                    {"name": "farmer_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                    {
+                        "name": "metric",
+                        "in": "path",
+                        "required": True,
+                        "description": "e.g. water.ph, water.ec, soil.moisture",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "name": "points",
+                        "in": "query",
+                        "required": False,
+                        "description": "Maximum number of samples returned (capped server-side)",
+                        "schema": {"type": "integer", "minimum": 3, "default": 500},
+                    },
+                    {
+                        "name": "method",
+                        "in": "query",
+                        "required": False,
+                        "schema": {"type": "string", "enum": ["lttb", "minmax"], "default": "lttb"},
+                    },
+                ] + RANGE_PARAMETERS,
+                "responses": {
+                    "200": {
+                        "description": "At most `points` [timestamp, value] pairs in time order",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Series"}
+                            }
+                        },
+                    },
+                    "400": {"description": "Invalid points, method or range"},
+                    "404": {"description": "Unknown farmer or metric"},
+                },
+            }
+        },
+        "/api/analytics/": {
+            "get": {
+                "summary": "Available analytics metrics and granularities",
+                "responses": {"200": {"description": "Metric and granularity names"}},
+            }
+        },
+        "/api/analytics/{metric}/": {
+            "get": {
+                "summary": "Per-farmer rollups of one metric",
+                "parameters": [
+                    {
+                        "name": "metric",
+                        "in": "path",
+                        "required": True,
+                        "description": "e.g. crop.yield_kg, soil.nitrogen, water.ec",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "name": "granularity",
+                        "in": "query",
+                        "required": False,
+                        "schema": {"type": "string", "enum": ["day", "month", "season"], "default": "month"},
+                    },
+                    {"name": "farmer_id", "in": "query", "required": False, "schema": {"type": "integer"}},
+                    {"name": "crop_name", "in": "query", "required": False, "schema": {"type": "string"}},
+                ] + PAGINATION_PARAMETERS + RANGE_PARAMETERS,
+                "responses": {
+                    "200": {
+                        "description": "Rollups, newest period first",
+                        "content": {
+                            "application/json": {
+                                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Rollup"}}
+                            }
+                        },
+                    },
+                    "400": {"description": "Invalid granularity or query parameter"},
+                    "404": {"description": "Unknown metric"},
+                },
+            }
+        },
     },
     "components": {
         "schemas": {
@@ -613,6 +821,33 @@ OPENAPI_SCHEMA = {
                     "water": {"type": "integer"},
                 },
             },
+            "Rollup": {
+                "type": "object",
+                "properties": {
+                    "farmer_id": {"type": "integer"},
+                    "period": {"type": "string", "format": "date"},
+                    "label": {"type": "string"},
+                    "crop_name": {"type": "string", "nullable": True},
+                    "count": {"type": "integer"},
+                    "total": {"type": "number"},
+                    "average": {"type": "number", "nullable": True},
+                    "min": {"type": "number", "nullable": True},
+                    "max": {"type": "number", "nullable": True},
+                },
+            },
+            "Series": {
+                "type": "object",
+                "properties": {
+                    "farmer_id": {"type": "integer"},
+                    "metric": {"type": "string"},
+                    "method": {"type": "string"},
+                    "rows": {"type": "integer", "description": "Raw readings in the range"},
+                    "data": {
+                        "type": "array",
+                        "items": {"type": "array", "items": {}, "minItems": 2, "maxItems": 2},
+                    },
+                },
+            },
             "Success": {
                 "type": "object",
                 "properties": {"success": {"type": "boolean"}},
@@ -664,7 +899,7 @@ OPENAPI_SCHEMA = {
                     "nitrogen": {"type": "number", "nullable": True},
                     "phosphorus": {"type": "number", "nullable": True},
                     "potassium": {"type": "number", "nullable": True},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "SoilRecordCreate": {
@@ -675,7 +910,7 @@ OPENAPI_SCHEMA = {
                     "nitrogen": {"type": "number"},
                     "phosphorus": {"type": "number"},
                     "potassium": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "SoilRecordUpdate": {
@@ -686,7 +921,7 @@ OPENAPI_SCHEMA = {
                     "nitrogen": {"type": "number"},
                     "phosphorus": {"type": "number"},
                     "potassium": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "WaterRecord": {
@@ -697,7 +932,7 @@ OPENAPI_SCHEMA = {
                     "ph": {"type": "number", "nullable": True},
                     "ec": {"type": "number", "nullable": True},
                     "tds": {"type": "number", "nullable": True},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "WaterRecordCreate": {
@@ -707,7 +942,7 @@ OPENAPI_SCHEMA = {
                     "ph": {"type": "number"},
                     "ec": {"type": "number"},
                     "tds": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "WaterRecordUpdate": {
@@ -717,7 +952,7 @@ OPENAPI_SCHEMA = {
                     "ph": {"type": "number"},
                     "ec": {"type": "number"},
                     "tds": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "CropRecord": {
@@ -727,7 +962,7 @@ OPENAPI_SCHEMA = {
                     "farmer_id": {"type": "integer"},
                     "crop_name": {"type": "string", "nullable": True},
                     "yield_kg": {"type": "number", "nullable": True},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "CropRecordCreate": {
@@ -736,7 +971,7 @@ OPENAPI_SCHEMA = {
                     "farmer_id": {"type": "integer"},
                     "crop_name": {"type": "string"},
                     "yield_kg": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "CropRecordUpdate": {
@@ -745,11 +980,32 @@ OPENAPI_SCHEMA = {
                     "farmer_id": {"type": "integer"},
                     "crop_name": {"type": "string"},
                     "yield_kg": {"type": "number"},
-                    "date_recorded": {"type": "string"},
+                    "date_recorded": {"type": "string", "format": "date-time"},
                 },
             },
             "SuggestRequest": {"type": "object"},
             "SuggestResponse": {"type": "object"},
+            "SuggestBatchRequest": {
+                "type": "object",
+                "description": "Equal-length arrays; null marks a missing reading",
+                "properties": {
+                    "soil_ph": {"type": "array", "items": {"type": "number", "nullable": True}},
+                    "moisture": {"type": "array", "items": {"type": "number", "nullable": True}},
+                    "soil_type": {"type": "array", "items": {"type": "string", "nullable": True}},
+                    "crop": {"type": "array", "items": {"type": "string", "nullable": True}},
+                    "days_since_last_water": {"type": "array", "items": {"type": "number", "nullable": True}},
+                },
+            },
+            "SuggestBatchResponse": {
+                "type": "object",
+                "properties": {
+                    "generated_at": {"type": "string"},
+                    "results": {"type": "array", "items": {"type": "array", "items": {"type": "object"}}},
+                },
+            },
         }
     },
 }
+
+# Encoded and compressed once at import; served by views.openapi_schema
+ENCODED_SCHEMA = PrecompressedJSON(OPENAPI_SCHEMA)
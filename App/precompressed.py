@@ -0,0 +1,69 @@
+"""Static JSON documents encoded and compressed once per process.
+
+A :class:`PrecompressedJSON` holds identity, gzip and (when the optional
+``brotli`` package is installed) brotli bodies, each with its own strong
+ETag, so serving one is a negotiation, a dict lookup and a write.
+"""
+import gzip
+import hashlib
+import json
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+DEFAULT_MAX_AGE = 86400
+
+
+def _accepted(header):
+    """Codings of an Accept-Encoding header with a non-zero q-value."""
+    codings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+class PrecompressedJSON:
+
+    def __init__(self, document, max_age=DEFAULT_MAX_AGE):
+        body = json.dumps(document, separators=(',', ':')).encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.max_age = max_age
+        # coding -> (body, strong ETag); each representation needs its own tag
+        self.variants = {'identity': (body, f'"{digest}"')}
+        self.variants['gzip'] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            self.variants['br'] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+    def negotiate(self, request):
+        accepted = _accepted(request.headers.get('Accept-Encoding', ''))
+        for coding in ('br', 'gzip'):
+            if coding in self.variants and coding in accepted:
+                return coding
+        return 'identity'
+
+    def response(self, request):
+        coding = self.negotiate(request)
+        body, etag = self.variants[coding]
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+            if coding != 'identity':
+                response['Content-Encoding'] = coding
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={self.max_age}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -0,0 +1,241 @@
+"""Per-request SQL recording, query budgets and N+1 detection.
+
+``QueryLog`` records every statement run while it is active, on any database
+connection, including queries that async views run in ``sync_to_async``
+threads. It groups them by *shape*: the SQL with literals, parameters and
+``IN (...)`` lists reduced to placeholders. A shape executed repeatedly with
+different parameters is the signature of an N+1 query (``record.farmer.id``
+in a loop, one query per row).
+
+``QueryBudgetMiddleware`` runs each request inside a ``QueryLog`` and checks
+it against the view's budget (``DEFAULT_BUDGETS`` updated by the
+``QUERY_BUDGETS`` setting, keyed by URL name and optionally by method), and
+against ``QUERY_REPEAT_THRESHOLD`` for repeated shapes. ``QUERY_BUDGET_MODE``
+is ``'off'``, ``'warn'`` (log it), or ``'raise'`` (raise
+``QueryBudgetExceeded``, an ``AssertionError``, so the test client fails the
+test). In tests, ``query_budget()`` does the same check around any block.
+
+Transaction control and connection setup (``SAVEPOINT``, ``PRAGMA`` ...) are
+not counted: they depend on the transaction and connection state, not on
+the view.
+"""
+import logging
+import re
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import route_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT_THRESHOLD = 3
+
+# Most queries each view may run; budgets without a method apply to all of them
+DEFAULT_BUDGETS = {
+    # Pages and endpoints that never touch the database
+    'frontend_index': 0, 'frontend_index_html': 0, 'frontend_farmers': 0, 'frontend_contact': 0,
+    'admin_dashboard': 0, 'admin_farmers': 0, 'admin_crops': 0, 'admin_soil': 0, 'admin_water': 0,
+    'index': 0, 'docs': 0, 'openapi_schema': 0, 'metrics': 0, 'response_cache_stats': 0,
+    'database_pool_stats': 0, 'suggest_cache_stats': 0, 'analytics_index': 0,
+    'health': 0, 'health_live': 0, 'suggest': 0, 'suggest_batch': 0,
+    # One round trip per database
+    'health_ready': 1,
+    # Validators, then the data (see App.conditional); ?exact=1 counts each table
+    'stats': 5,
+    # Record writes also maintain the counters, latest readings and rollups
+    # (App.signals). Record budgets are the worst case: a PUT moving a
+    # farmer's latest reading to another farmer, emptying its daily buckets
+    # and re-reading the extremes of the others, and a DELETE of a latest
+    # reading that was also its buckets' extreme. Bulk uploads are budgeted
+    # for one BULK_BATCH_SIZE batch of rows of one farmer; each further batch
+    # adds an INSERT, and rows spread over many farmers update more rollups,
+    # which bulk_update() writes in several batches.
+    'farmer_list_create': {'GET': 2, 'POST': 2},
+    'farmer_detail': {'GET': 2, 'PUT': 3, 'DELETE': 12},
+    'soil_record_list_create': {'GET': 2, 'POST': 7},
+    'soil_record_detail': {'GET': 2, 'PUT': 16, 'DELETE': 10},
+    'water_record_list_create': {'GET': 2, 'POST': 7},
+    'water_record_detail': {'GET': 2, 'PUT': 16, 'DELETE': 10},
+    'crop_record_list_create': {'GET': 2, 'POST': 7},
+    'crop_record_detail': {'GET': 2, 'PUT': 16, 'DELETE': 10},
+    'crop_records_list': {'GET': 2, 'POST': 7},
+    'record_bulk_create': 8,
+    'record_export': 1,
+    # A farmer without readings is looked up again to tell them from a 404
+    'farmer_suggest': 2,
+    'farmer_series': 2,
+    'analytics_rollups': 1,
+}
+
+_CONTROL = re.compile(r'\s*(PRAGMA|SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?![\w"])')
+_PLACEHOLDERS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+# statement lists of the QueryLogs active in this context, innermost last
+_active = ContextVar('querylog_active', default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def shape(sql):
+    """``sql`` with its literals and parameter lists replaced by ``?``."""
+    sql = _STRING.sub('?', sql.replace('%s', '?'))
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def record_statement(execute, sql, params, many, context):
+    active = _active.get()
+    if active and not _CONTROL.match(sql):
+        for statements in active:
+            statements.append((sql, params))
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # First in the list: execute_wrapper() blocks pop the last entry on exit
+    if record_statement not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_statement)
+
+
+class QueryLog:
+    """Records the statements run while it is active (a context manager).
+
+    Logs nest: a statement is recorded by every active log.
+    """
+
+    def __init__(self):
+        self.statements = []  # (sql, params)
+
+    def __enter__(self):
+        self._token = _active.set(_active.get() + (self.statements,))
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=DEFAULT_REPEAT_THRESHOLD):
+        """``[(shape, times)]`` of shapes run ``threshold`` or more times with different parameters."""
+        runs = {}
+        for sql, params in self.statements:
+            runs.setdefault(shape(sql), []).append((sql, repr(params)))
+        return [(key, len(calls)) for key, calls in runs.items()
+                if len(calls) >= threshold and len(set(calls)) > 1]
+
+    def problems(self, budget=None, threshold=DEFAULT_REPEAT_THRESHOLD):
+        """Messages describing how the recorded statements break the limits."""
+        found = []
+        if budget is not None and len(self) > budget:
+            found.append(f'{len(self)} queries, budget is {budget}')
+        for key, times in self.repeated(threshold):
+            found.append(f'possible N+1: {times} queries shaped {key}')
+        return found
+
+    def __str__(self):
+        return '\n'.join(f'{n}. {sql} {params!r}' for n, (sql, params) in enumerate(self.statements, 1))
+
+
+class query_budget:
+    """Fail with ``QueryBudgetExceeded`` if the block runs more than ``budget``
+    queries or repeats a query shape (a context manager for tests)."""
+
+    def __init__(self, budget=None, threshold=DEFAULT_REPEAT_THRESHOLD):
+        self.budget = budget
+        self.threshold = threshold
+        self.log = QueryLog()
+
+    def __enter__(self):
+        return self.log.__enter__()
+
+    def __exit__(self, exc_type, *exc_info):
+        self.log.__exit__(exc_type, *exc_info)
+        if exc_type is None:
+            problems = self.log.problems(self.budget, self.threshold)
+            if problems:
+                raise QueryBudgetExceeded('; '.join(problems) + f'\n{self.log}')
+
+
+def budget_for(route, method):
+    budget = {**DEFAULT_BUDGETS, **getattr(settings, 'QUERY_BUDGETS', {})}.get(route)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+def check(request, log):
+    route = route_name(request)
+    threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+    problems = log.problems(budget_for(route, request.method), threshold)
+    if not problems:
+        return
+    message = f'{request.method} {request.path} ({route}): ' + '; '.join(problems)
+    if budget_mode() == 'raise':
+        raise QueryBudgetExceeded(f'{message}\n{log}')
+    logger.warning(message)
+
+
+def _logged(chunks, request, log):
+    # Streamed bodies query while they are consumed, after the view returned
+    chunks = iter(chunks)
+    while True:
+        token = _active.set(_active.get() + (log.statements,))
+        try:
+            chunk = next(chunks, None)
+        finally:
+            _active.reset(token)
+        if chunk is None:
+            break
+        yield chunk
+    check(request, log)
+
+
+def finish(request, response, log):
+    if response.streaming and not response.is_async:
+        response.streaming_content = _logged(response.streaming_content, request, log)
+        return response
+    check(request, log)
+    response['X-Query-Count'] = str(len(log))
+    return response
+
+
+def budget_mode():
+    return getattr(settings, 'QUERY_BUDGET_MODE', 'off')
+
+
+class QueryBudgetMiddleware:
+    """Check every request's queries against its view's budget."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if budget_mode() == 'off':
+            return self.get_response(request)
+        with QueryLog() as log:
+            response = self.get_response(request)
+        return finish(request, response, log)
+
+    async def __acall__(self, request):
+        if budget_mode() == 'off':
+            return await self.get_response(request)
+        with QueryLog() as log:
+            response = await self.get_response(request)
+        return finish(request, response, log)
@@ -0,0 +1,63 @@
+"""JSON encoding for API responses.
+
+``dumps`` uses orjson when it is installed and the stdlib otherwise; the
+``JSON_RENDERER`` setting (``'orjson'`` or ``'stdlib'``) forces one. Both
+produce the same values: datetimes as RFC 3339 with microseconds and ``Z``
+for UTC (orjson's native format, which the stdlib encoder below mirrors),
+Decimals, timedeltas and lazy strings as ``DjangoJSONEncoder`` renders them.
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+class APIJSONEncoder(DjangoJSONEncoder):
+    """``DjangoJSONEncoder`` keeping full microsecond precision, like orjson."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            r = o.isoformat()
+            return r[:-6] + 'Z' if r.endswith('+00:00') else r
+        if isinstance(o, time):
+            return o.isoformat()
+        return super().default(o)
+
+
+_stdlib_encoder = APIJSONEncoder(separators=(',', ':'))
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def renderer():
+    """Name of the encoder in use."""
+    if orjson is None or getattr(settings, 'JSON_RENDERER', None) == 'stdlib':
+        return 'stdlib'
+    return 'orjson'
+
+
+def dumps(data):
+    """``data`` as compact UTF-8 JSON bytes."""
+    if renderer() == 'orjson':
+        return orjson.dumps(data, default=_stdlib_encoder.default, option=ORJSON_OPTIONS)
+    return _stdlib_encoder.encode(data).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """Drop-in for ``JsonResponse`` that encodes with :func:`dumps`."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,132 @@
+"""Read-through cache of API GET responses on Django's cache framework.
+
+Keys combine the request path and sorted query string with the ETag that
+App.conditional computed for the request. Writes bump those validators
+inside their own transaction (table change counters, row ``updated_at``),
+so a POST, PUT or DELETE makes exactly the entries of the tables and rows
+it touched unreachable: in every process, without flushing anything else.
+Superseded entries age out through the backend's TIMEOUT and culling.
+
+The backend is the ``RESPONSE_CACHE_ALIAS`` entry of ``CACHES`` (``None``
+disables caching). Async views use the backend's ``aget``/``aset``.
+"""
+import hashlib
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_ALIAS = 'default'
+
+
+class CacheStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    alias = getattr(settings, 'RESPONSE_CACHE_ALIAS', DEFAULT_ALIAS)
+    return caches[alias] if alias else None
+
+
+def cache_key(request, etag):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'response:{etag.strip(chr(34))}:{digest}'
+
+
+def _lookup_key(request):
+    """Cache key for ``request``, or ``None`` if it must bypass the cache."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    validators = getattr(request, 'validators', None)
+    if validators is None:
+        return None
+    return cache_key(request, validators[0])
+
+
+def _hit(response):
+    stats.add(hits=1)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def _storable(response):
+    return response.status_code == 200 and not response.streaming
+
+
+def cached_response():
+    """Serve the decorated view's 200 GET responses from the cache.
+
+    The view must sit below :func:`App.conditional.conditional`, whose
+    validators become part of the key; without validators (e.g. no table
+    counter yet) the request bypasses the cache rather than risk a stale hit.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def ainner(request, *args, **kwargs):
+                cache = get_cache()
+                key = _lookup_key(request) if cache is not None else None
+                if key is None:
+                    return await view(request, *args, **kwargs)
+
+                response = await cache.aget(key)
+                if response is not None:
+                    return _hit(response)
+                stats.add(misses=1)
+                response = await view(request, *args, **kwargs)
+                if _storable(response):
+                    await cache.aset(key, response)
+                    stats.add(stores=1)
+                response['X-Cache'] = 'MISS'
+                return response
+            return ainner
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            cache = get_cache()
+            key = _lookup_key(request) if cache is not None else None
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            response = cache.get(key)
+            if response is not None:
+                return _hit(response)
+            stats.add(misses=1)
+            response = view(request, *args, **kwargs)
+            if _storable(response):
+                cache.set(key, response)
+                stats.add(stores=1)
+            response['X-Cache'] = 'MISS'
+            return response
+        return inner
+    return decorator
+
+
+def cache_stats():
+    cache = get_cache()
+    lookups = stats.hits + stats.misses
+    return {
+        'alias': getattr(settings, 'RESPONSE_CACHE_ALIAS', DEFAULT_ALIAS),
+        'backend': type(cache).__name__ if cache is not None else None,
+        'hits': stats.hits,
+        'misses': stats.misses,
+        'stores': stats.stores,
+        'hit_ratio': stats.hits / lookups if lookups else 0.0,
+        # Only the counting backends in App.cache_backends report evictions
+        'evictions': getattr(cache, 'evictions', None),
+    }
@@ -0,0 +1,287 @@
+"""Compiler for the declarative suggestion rule table.
+
+A rule table is a dict (or a JSON file with the same shape)::
+
+    {
+        "suggestions": {"dry": {"action": "...", "reason": "moisture={value}%", "confidence": 0.9}},
+        "rules": [
+            {"input": "moisture", "lt": 20, "suggest": "dry"},
+            {"input": "crop", "keywords": ["mirchi", "chili"], "suggest": "mirchi"},
+            {"otherwise": true, "suggest": "balanced"}
+        ]
+    }
+
+Numeric rules take ``gt``/``gte`` and/or ``lt``/``lte`` bounds; keyword rules
+match case-insensitive substrings of a text input; an ``otherwise`` rule
+fires when no earlier rule matched. Suggestions are emitted in rule order.
+
+Compilation turns every numeric input into one sorted boundary array whose
+segments map to the rules covering them (a bisect per reading) and every
+text input into one Aho-Corasick automaton (a single pass per string), so
+the cost of a call does not grow with the number of rules.
+"""
+import json
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+LOWER_BOUNDS = ('gt', 'gte')
+UPPER_BOUNDS = ('lt', 'lte')
+
+
+class RuleError(ValueError):
+    """Raised for a malformed rule table."""
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton reporting the rules whose keywords occur in a text."""
+
+    def __init__(self, keywords):
+        goto, out = [{}], [set()]
+        for word, rule in keywords:
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(rule)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+
+        self.goto = goto
+        self.fail = fail
+        self.out = [frozenset(rules) for rules in out]
+
+    def find(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        state, found = 0, set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class IntervalIndex:
+    """Sorted bounds of one numeric input; each segment lists its rules.
+
+    With bounds ``p0 < p1 < ... < pk-1``, segment ``2i`` is the open gap
+    below ``pi`` and ``2i + 1`` is ``pi`` itself, so inclusive and exclusive
+    bounds both land on exact segment edges.
+    """
+
+    def __init__(self, rules):
+        self.points = sorted({rule[op] for _, rule in rules for op in LOWER_BOUNDS + UPPER_BOUNDS if op in rule})
+        self.position = {point: i for i, point in enumerate(self.points)}
+        segments = [[] for _ in range(2 * len(self.points) + 1)]
+        for rule_id, rule in rules:
+            first = self._lower(rule)
+            last = self._upper(rule)
+            for segment in range(first, last + 1):
+                segments[segment].append(rule_id)
+        self.segments = [tuple(ids) for ids in segments]
+        self.array = np.array(self.points, dtype=float)
+
+    def _lower(self, rule):
+        if 'gte' in rule:
+            return 2 * self.position[rule['gte']] + 1
+        if 'gt' in rule:
+            return 2 * self.position[rule['gt']] + 2
+        return 0
+
+    def _upper(self, rule):
+        if 'lte' in rule:
+            return 2 * self.position[rule['lte']] + 1
+        if 'lt' in rule:
+            return 2 * self.position[rule['lt']]
+        return 2 * len(self.points)
+
+    def lookup(self, value):
+        if value != value:  # NaN satisfies no bound
+            return ()
+        i = bisect_left(self.points, value)
+        if i < len(self.points) and self.points[i] == value:
+            return self.segments[2 * i + 1]
+        return self.segments[2 * i]
+
+    def lookup_many(self, values):
+        """Segment index per value (``-1`` for NaN)."""
+        i = np.searchsorted(self.array, values, side='left')
+        padded = np.append(self.array, np.nan)
+        segment = 2 * i + (padded[i] == values)
+        segment[np.isnan(values)] = -1
+        return segment
+
+
+class RuleEngine:
+    """A compiled rule table."""
+
+    def __init__(self, table):
+        try:
+            self.suggestions = {
+                key: (s['action'], s.get('reason', ''), s['confidence'])
+                for key, s in table['suggestions'].items()
+            }
+            rules = table['rules']
+        except (KeyError, TypeError, AttributeError) as e:
+            raise RuleError(f'rule table is missing {e}')
+
+        self.rules = []          # rule id -> (suggestion key, input name or None)
+        self.otherwise = None    # first ``otherwise`` rule id
+        numeric, keywords = {}, {}
+        for rule_id, rule in enumerate(rules):
+            if not isinstance(rule, dict):
+                raise RuleError(f'rule {rule_id} must be an object')
+            key = rule.get('suggest')
+            if key not in self.suggestions:
+                raise RuleError(f'rule {rule_id} suggests unknown {key!r}')
+            name = rule.get('input')
+            self.rules.append((key, name))
+            if rule.get('otherwise'):
+                if self.otherwise is None:
+                    self.otherwise = rule_id
+            elif 'keywords' in rule:
+                words = [str(w).lower() for w in rule['keywords']]
+                if not name or not words or not all(words):
+                    raise RuleError(f'rule {rule_id} needs an input and non-empty keywords')
+                keywords.setdefault(name, []).extend((w, rule_id) for w in words)
+            else:
+                bounds = [op for op in LOWER_BOUNDS + UPPER_BOUNDS if op in rule]
+                if not name or not bounds or all(op in rule for op in LOWER_BOUNDS) \
+                        or all(op in rule for op in UPPER_BOUNDS):
+                    raise RuleError(f'rule {rule_id} needs an input and at most one lower and one upper bound')
+                if not all(type(rule[op]) in (int, float) for op in bounds):
+                    raise RuleError(f'rule {rule_id} bounds must be numbers')
+                numeric.setdefault(name, []).append((rule_id, rule))
+
+        if set(numeric) & set(keywords):
+            raise RuleError(f'inputs {sorted(set(numeric) & set(keywords))} have both numeric and keyword rules')
+        self.intervals = {name: IntervalIndex(items) for name, items in numeric.items()}
+        self.matchers = {name: KeywordMatcher(words) for name, words in keywords.items()}
+        self.inputs = tuple(self.intervals) + tuple(self.matchers)
+        # inputs whose value is written into a reason, so must reach it unchanged
+        self.echoed = frozenset(name for key, name in self.rules if name and '{value}' in self.suggestions[key][1])
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as fh:
+            try:
+                return cls(json.load(fh))
+            except json.JSONDecodeError as e:
+                raise RuleError(f'{path}: {e}')
+
+    def _suggestion(self, rule_id, value):
+        action, reason, confidence = self.suggestions[self.rules[rule_id][0]]
+        return {'action': action, 'reason': reason.format(value=value), 'confidence': confidence}
+
+    def suggest(self, payload):
+        """Suggestion list for one payload of input readings."""
+        matched = []
+        for name, index in self.intervals.items():
+            value = payload.get(name)
+            if value is not None:
+                matched.extend(index.lookup(value))
+        for name, matcher in self.matchers.items():
+            value = payload.get(name)
+            if value:
+                matched.extend(matcher.find(value.lower()))
+        if self.otherwise is not None and (not matched or min(matched) > self.otherwise):
+            matched.append(self.otherwise)
+
+        matched.sort()
+        return [self._suggestion(rule_id, payload.get(self.rules[rule_id][1])) for rule_id in matched]
+
+    def suggest_batch(self, columns):
+        """Suggestion lists for many plots given equal-length input columns.
+
+        ``columns`` maps input names to lists with ``None`` for a missing
+        reading; the result matches :meth:`suggest` applied to each plot.
+        """
+        lengths = {len(values) for values in columns.values() if values is not None}
+        if len(lengths) > 1:
+            raise ValueError('all columns must have the same length')
+        n = lengths.pop() if lengths else 0
+
+        rule_rows = {}
+        for name, index in self.intervals.items():
+            if columns.get(name) is None:
+                continue
+            segment = index.lookup_many(_numeric_column(name, columns[name]))
+            order = np.argsort(segment, kind='stable')
+            for rows in np.split(order, np.flatnonzero(np.diff(segment[order])) + 1):
+                if rows.size and segment[rows[0]] >= 0:
+                    for rule_id in index.segments[segment[rows[0]]]:
+                        rule_rows.setdefault(rule_id, []).append(rows)
+        for name, matcher in self.matchers.items():
+            if columns.get(name) is None:
+                continue
+            for value, rows in _group_text(name, columns[name]).items():
+                for rule_id in matcher.find(value.lower()):
+                    rule_rows.setdefault(rule_id, []).append(np.array(rows))
+
+        rule_rows = {rule_id: np.concatenate(parts) for rule_id, parts in rule_rows.items()}
+        if self.otherwise is not None:
+            first = np.full(n, len(self.rules))
+            for rule_id, rows in rule_rows.items():
+                first[rows] = np.minimum(first[rows], rule_id)
+            rule_rows[self.otherwise] = np.flatnonzero(first > self.otherwise)
+
+        results = [[] for _ in range(n)]
+        for rule_id in sorted(rule_rows):
+            key, name = self.rules[rule_id]
+            action, reason, confidence = self.suggestions[key]
+            values = columns.get(name) if name else None
+            rows = rule_rows[rule_id].tolist()
+            if values is None or '{value}' not in reason:
+                text = reason.format(value=None)
+                for i in rows:
+                    results[i].append({'action': action, 'reason': text, 'confidence': confidence})
+                continue
+            # Readings repeat a lot; format each distinct (type, value) once so
+            # 5 and 5.0 still render exactly as the per-plot path does
+            reasons = {}
+            for i in rows:
+                value = values[i]
+                text = reasons.get((type(value), value))
+                if text is None:
+                    text = reasons[type(value), value] = reason.format(value=value)
+                results[i].append({'action': action, 'reason': text, 'confidence': confidence})
+        return results
+
+
+NUMERIC_TYPES = {int, float, bool, type(None)}
+
+
+def _numeric_column(name, values):
+    """Float array with NaN for missing readings (NaN satisfies no bound)."""
+    if not set(map(type, values)) <= NUMERIC_TYPES:
+        raise ValueError(f'{name} must contain only numbers or null')
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _group_text(name, values):
+    """Row indices per distinct non-empty string."""
+    groups = {}
+    for i, value in enumerate(values):
+        if value:
+            if not isinstance(value, str):
+                raise ValueError(f'{name} must contain only strings or null')
+            groups.setdefault(value, []).append(i)
+    return groups
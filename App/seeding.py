@@ -0,0 +1,90 @@
+"""Synthetic data for benchmarks.
+
+Seeds farmers and soil/water/crop history with timestamps spread over the
+past ``days`` days, so ordering and range queries behave as they would on
+real data rather than on rows that all share one ``auto_now_add`` instant.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Farmer, CropRecord, SoilRecord, WaterRecord
+
+CROPS = ('mirchi', 'methi', 'wheat', 'rice', 'cotton', 'tomato', 'onion', 'soybean')
+SOIL_TYPES = ('sandy', 'clay', 'loam', 'black', 'red', 'sandy loam')
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let ``bulk_create`` keep the ``auto_now_add`` values we assign."""
+    fields = [
+        Farmer._meta.get_field('created_at'),
+        CropRecord._meta.get_field('planted_on'),
+        SoilRecord._meta.get_field('recorded_at'),
+        WaterRecord._meta.get_field('recorded_at'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _soil(rng, farmer_id, when):
+    return SoilRecord(
+        farmer_id=farmer_id, recorded_at=when, date_recorded=when,
+        ph=round(rng.uniform(4.5, 9.0), 2), nitrogen=round(rng.uniform(5, 80), 1),
+        phosphorus=round(rng.uniform(5, 60), 1), potassium=round(rng.uniform(50, 400), 1),
+        moisture=round(rng.uniform(5, 95), 1), soil_type=rng.choice(SOIL_TYPES),
+    )
+
+
+def _water(rng, farmer_id, when):
+    return WaterRecord(
+        farmer_id=farmer_id, recorded_at=when, date_recorded=when,
+        ph=round(rng.uniform(5.5, 8.5), 2), ec=round(rng.uniform(0.1, 3.0), 2),
+        tds=round(rng.uniform(50, 2000), 0), amount_l=round(rng.uniform(100, 5000), 0),
+    )
+
+
+def _crop(rng, farmer_id, when):
+    return CropRecord(
+        farmer_id=farmer_id, planted_on=when, date_recorded=when,
+        crop_name=rng.choice(CROPS), yield_kg=round(rng.uniform(50, 5000), 1),
+    )
+
+
+def seed_dataset(farmers, records, days=730, batch_size=5000, seed=0):
+    """Insert ``farmers`` farmers and ``records`` rows into each record table.
+
+    Returns the list of created farmer ids.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = days * 86400
+
+    def when():
+        return now - timedelta(seconds=rng.randrange(span))
+
+    with explicit_timestamps(), transaction.atomic():
+        created = Farmer.objects.bulk_create(
+            (Farmer(name=f'Farmer {i}', location=f'Village {i % 50}', created_at=when())
+             for i in range(farmers)),
+            batch_size=batch_size,
+        )
+        farmer_ids = [f.id for f in created]
+        if not farmer_ids or None in farmer_ids:
+            farmer_ids = list(Farmer.objects.values_list('id', flat=True))
+        for model, build in ((SoilRecord, _soil), (WaterRecord, _water), (CropRecord, _crop)):
+            for start in range(0, records, batch_size):
+                count = min(batch_size, records - start)
+                model.objects.bulk_create(
+                    [build(rng, rng.choice(farmer_ids), when()) for _ in range(count)],
+                    batch_size=batch_size,
+                )
+    return farmer_ids
@@ -0,0 +1,90 @@
+"""Column projections shared by the API list and detail views.
+
+Rows are read with ``.values()`` so a page of records is a single SELECT of
+exactly the columns the API returns; ``farmer_id`` comes straight off the FK
+column instead of loading each Farmer.
+"""
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import Farmer, CropRecord, SoilRecord, WaterRecord
+
+# model -> ((response key, column), ...)
+FIELDS = {
+    Farmer: (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('phone', 'phone'),
+        ('region', 'location'),
+    ),
+    SoilRecord: (
+        ('id', 'id'),
+        ('farmer_id', 'farmer_id'),
+        ('ph', 'ph'),
+        ('nitrogen', 'nitrogen'),
+        ('phosphorus', 'phosphorus'),
+        ('potassium', 'potassium'),
+        ('date_recorded', 'date_recorded'),
+    ),
+    WaterRecord: (
+        ('id', 'id'),
+        ('farmer_id', 'farmer_id'),
+        ('ph', 'ph'),
+        ('ec', 'ec'),
+        ('tds', 'tds'),
+        ('date_recorded', 'date_recorded'),
+    ),
+    CropRecord: (
+        ('id', 'id'),
+        ('farmer_id', 'farmer_id'),
+        ('crop_name', 'crop_name'),
+        ('yield_kg', 'yield_kg'),
+        ('date_recorded', 'date_recorded'),
+    ),
+}
+
+# Column each collection is ordered (and keyset-paginated) by
+SORT_FIELDS = {
+    Farmer: 'created_at',
+    SoilRecord: 'recorded_at',
+    WaterRecord: 'recorded_at',
+    CropRecord: 'planted_on',
+}
+
+
+# URL ``<kind>`` segment -> record model
+RECORD_MODELS = {
+    'soil': SoilRecord,
+    'water': WaterRecord,
+    'crop': CropRecord,
+}
+
+
+def projected(model, queryset=None):
+    """``.values()`` queryset with the response columns plus the sort key."""
+    if queryset is None:
+        queryset = model.objects.all()
+    columns = [column for _, column in FIELDS[model]]
+    return queryset.values(*columns, SORT_FIELDS[model])
+
+
+def serialize(model, row):
+    return {key: row[column] for key, column in FIELDS[model]}
+
+
+def serialize_many(model, rows):
+    fields = FIELDS[model]
+    return [{key: row[column] for key, column in fields} for row in rows]
+
+
+def get_serialized(model, pk):
+    """Serialized detail dict for one row, or Http404."""
+    return serialize(model, get_object_or_404(projected(model), pk=pk))
+
+
+async def aget_serialized(model, pk):
+    """:func:`get_serialized` through the async ORM."""
+    try:
+        return serialize(model, await projected(model).aget(pk=pk))
+    except model.DoesNotExist:
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
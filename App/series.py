@@ -0,0 +1,127 @@
+"""Downsampled per-farmer time series for dashboard charts.
+
+Rows are streamed from the database straight into one NumPy array (no model
+instances or datetime objects), then reduced to at most ``points`` samples so the response size
+does not depend on how many raw readings a farmer has:
+
+* ``lttb`` — Largest-Triangle-Three-Buckets, which keeps the points that
+  best preserve the visual shape of the line;
+* ``minmax`` — the lowest and highest reading of every bucket, so spikes
+  are never smoothed away. Fully vectorized.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField, Func
+
+from .analytics import METRICS, RECORD_MODELS, reading_time_expression
+
+METHODS = ('lttb', 'minmax')
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+
+class EpochSeconds(Func):
+    """Seconds since the Unix epoch, computed by the database.
+
+    Returning plain floats skips the per-row datetime conversion, which is
+    most of the cost of loading a long series.
+    """
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # julianday() is a float day count, good to ~20 microseconds only, so
+        # whole seconds come from strftime() and the fraction from the stored
+        # 'YYYY-MM-DD HH:MM:SS.ffffff' text
+        sql, params = compiler.compile(self.source_expressions[0])
+        return (f"(CAST(strftime('%%s', {sql}) AS REAL) + CAST(substr({sql}, 20) AS REAL))",
+                (*params, *params))
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)', **extra_context)
+
+
+def max_points():
+    return getattr(settings, 'SERIES_MAX_POINTS', MAX_POINTS)
+
+
+def load(model, farmer_id, field, start=None, end=None, chunk_size=5000):
+    """``(times, values)`` float arrays (epoch seconds) ordered by reading time."""
+    queryset = (model.objects.annotate(at=reading_time_expression(model))
+                .filter(farmer_id=farmer_id, **{f'{field}__isnull': False}))
+    if start is not None:
+        queryset = queryset.filter(at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(at__lt=end)
+    rows = (queryset.annotate(epoch=EpochSeconds('at')).order_by('at', 'id')
+            .values_list('epoch', field).iterator(chunk_size=chunk_size))
+    table = np.fromiter(rows, dtype=[('time', 'f8'), ('value', 'f8')])
+    return table['time'], table['value']
+
+
+def lttb(times, values, points):
+    """Indices of the ``points`` samples chosen by LTTB (first and last kept)."""
+    n = len(times)
+    if points >= n or points < 3:
+        return np.arange(n)
+    # Bucket edges over the interior points; bucket i is [edges[i], edges[i+1])
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    # Average of each bucket, used as the third vertex for the bucket before it
+    counts = np.diff(edges)
+    avg_t = np.add.reduceat(times[:-1], edges[:-1]) / counts
+    avg_v = np.add.reduceat(values[:-1], edges[:-1]) / counts
+    avg_t = np.append(avg_t, times[-1])
+    avg_v = np.append(avg_v, values[-1])
+
+    chosen = np.empty(points, dtype=np.intp)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        t, v = times[lo:hi], values[lo:hi]
+        # Twice the triangle area (a, candidate, next bucket average)
+        area = np.abs((times[a] - avg_t[i + 1]) * (v - values[a]) - (times[a] - t) * (avg_v[i + 1] - values[a]))
+        a = lo + int(area.argmax())
+        chosen[i + 1] = a
+    return chosen
+
+
+def minmax(times, values, points):
+    """Indices of each bucket's minimum and maximum, in time order."""
+    n = len(times)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+    starts = np.linspace(0, n, buckets + 1).astype(int)[:-1]
+    sizes = np.diff(np.append(starts, n))
+    lows = np.minimum.reduceat(values, starts)
+    highs = np.maximum.reduceat(values, starts)
+    # First index in each bucket holding its minimum / maximum
+    at_low = np.flatnonzero(values == np.repeat(lows, sizes))
+    at_high = np.flatnonzero(values == np.repeat(highs, sizes))
+    first_low = at_low[np.searchsorted(at_low, starts)]
+    first_high = at_high[np.searchsorted(at_high, starts)]
+    return np.unique(np.concatenate([first_low, first_high]))
+
+
+def downsample(times, values, points, method='lttb'):
+    index = (lttb if method == 'lttb' else minmax)(times, values, points)
+    return times[index], values[index]
+
+
+def series(farmer_id, metric, points, method='lttb', start=None, end=None):
+    """Response body for one farmer's downsampled ``metric`` series."""
+    prefix, field = metric.split('.', 1)
+    model = next(m for m in RECORD_MODELS if METRICS[m.__name__][0] == prefix)
+    times, values = load(model, farmer_id, field, start, end)
+    sampled_times, sampled_values = downsample(times, values, points, method)
+    return {
+        'farmer_id': farmer_id,
+        'metric': metric,
+        'method': method,
+        'rows': len(times),
+        'data': [[datetime.fromtimestamp(t, dt_timezone.utc), v]
+                 for t, v in zip(sampled_times.tolist(), sampled_values.tolist())],
+    }
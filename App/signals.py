@@ -0,0 +1,87 @@
+"""Signals that keep derived tables in step with record writes.
+
+``bulk_create`` skips ``post_save``, so :func:`App.ingest.bulk_insert` sends
+``records_bulk_created`` for every batch it inserts; receivers of derived
+data listen to both.
+"""
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal
+
+from . import analytics, counters, latest
+from .models import Farmer, CropRecord, SoilRecord, WaterRecord
+
+# sender=<record model>, records=[inserted instances]
+records_bulk_created = Signal()
+
+RECORD_MODELS = (SoilRecord, WaterRecord, CropRecord)
+
+
+def record_saving(sender, instance, raw=False, **kwargs):
+    # Rollups need the stored version to take an updated record's old values out
+    if not raw and instance.pk is not None:
+        instance._stored_version = sender.objects.filter(pk=instance.pk).first()
+
+
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    previous = instance.__dict__.pop('_stored_version', None)
+    if raw:  # loaddata
+        return
+    counters.adjust(sender, 1 if created else 0)
+    latest.record_saved(sender, instance, created)
+    analytics.record_saved(sender, instance, created, previous)
+
+
+def record_deleted(sender, instance, **kwargs):
+    counters.adjust(sender, -1)
+    latest.record_deleted(sender, instance)
+    analytics.record_deleted(sender, instance)
+
+
+def records_inserted(sender, records, **kwargs):
+    counters.adjust(sender, len(records))
+    latest.offer(records)
+    analytics.fold(sender, records)
+
+
+def farmer_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        counters.adjust(sender, 1 if created else 0)
+
+
+def farmer_deleted(sender, instance, **kwargs):
+    counters.adjust(sender, -1)
+
+
+def delete_farmer(farmer):
+    """Delete ``farmer`` and everything of theirs, adjusting the counters in
+    one UPDATE rather than once per record.
+
+    The farmer's LatestReading and Rollup rows cascade with them, so their
+    records need no other bookkeeping and are deleted with one statement per
+    table, before the farmer, instead of being collected for the delete
+    signals in batches of 100. Returns ``Model.delete()``'s result.
+    """
+    quote = connection.ops.quote_name
+    with transaction.atomic():
+        records = {}
+        with connection.cursor() as cursor:
+            for model in RECORD_MODELS:
+                cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} '
+                               f'WHERE {quote(model._meta.get_field("farmer").column)} = %s', [farmer.pk])
+                records[model] = cursor.rowcount
+        deleted, per_model = farmer.delete()
+        for model, count in records.items():
+            per_model[model._meta.label] = per_model.get(model._meta.label, 0) + count
+        counters.adjust_many({model: -count for model, count in records.items()})
+    return deleted + sum(records.values()), per_model
+
+for model in RECORD_MODELS:
+    pre_save.connect(record_saving, sender=model, dispatch_uid=f'record_saving_{model.__name__}')
+    post_save.connect(record_saved, sender=model, dispatch_uid=f'record_saved_{model.__name__}')
+    post_delete.connect(record_deleted, sender=model, dispatch_uid=f'record_deleted_{model.__name__}')
+    records_bulk_created.connect(records_inserted, sender=model,
+                                 dispatch_uid=f'records_inserted_{model.__name__}')
+
+post_save.connect(farmer_saved, sender=Farmer, dispatch_uid='farmer_saved')
+post_delete.connect(farmer_deleted, sender=Farmer, dispatch_uid='farmer_deleted')
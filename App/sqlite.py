@@ -0,0 +1,158 @@
+"""SQLite tuning profile for single-server deployments.
+
+Every new SQLite connection gets the ``PRAGMA`` settings below (connection
+pragmas do not persist, so they are applied on ``connection_created``):
+
+* ``journal_mode=WAL`` lets readers run while a write is in progress;
+* ``synchronous=NORMAL`` is durable across application crashes in WAL mode
+  and only fsyncs at checkpoints;
+* ``busy_timeout`` makes a writer wait for the lock instead of failing;
+* ``mmap_size``, ``cache_size`` and ``temp_store`` keep hot pages and sort
+  scratch space in memory.
+
+``SQLITE_PRAGMAS`` overrides individual values (``None`` drops one) and
+``SQLITE_TUNING = False`` turns the whole profile off, lock retries included.
+
+Write views go through :func:`retry_on_lock`. Their transactions queue on a
+process-wide lock before ``BEGIN`` (``SQLITE_SERIALIZE_WRITES``); SQLite's
+own busy handler polls, and under sustained writes it starves some waiters
+past the timeout. Writes that still hit "database is locked" (another
+process held the lock past ``busy_timeout``) are retried with jittered
+exponential backoff. Each attempt is a whole transaction, so a retry never
+repeats half of a write. Pair this with ``'transaction_mode': 'IMMEDIATE'``
+in the database ``OPTIONS`` so the lock is taken, and waited for, at
+``BEGIN``.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .renderers import FastJsonResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,          # ms
+    'mmap_size': 256 * 1024 ** 2,  # bytes
+    'cache_size': -64000,          # negative: KiB, i.e. 64 MB
+    'temp_store': 'memory',
+}
+# Only meaningful for a database file
+FILE_ONLY_PRAGMAS = ('journal_mode', 'mmap_size')
+
+DEFAULT_LOCK_RETRIES = 5
+DEFAULT_LOCK_BACKOFF = 0.05  # seconds, doubled per attempt
+MAX_LOCK_BACKOFF = 2.0
+
+
+class WriteQueue:
+    """Process-wide lock for writers that knows how many are waiting.
+
+    Writers queue here rather than in SQLite's busy handler, which polls and
+    lets late arrivals starve earlier ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self.waiting = 0
+
+    def __enter__(self):
+        with self._count_lock:
+            self.waiting += 1
+        try:
+            self._lock.acquire()
+        finally:
+            with self._count_lock:
+                self.waiting -= 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+write_queue = WriteQueue()
+
+
+def enabled():
+    return getattr(settings, 'SQLITE_TUNING', True)
+
+
+def pragmas():
+    """The effective ``{pragma: value}`` profile."""
+    merged = dict(DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {}))
+    return {name: value for name, value in merged.items() if value is not None}
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not enabled():
+        return
+    in_memory = connection.is_in_memory_db()
+    with connection.cursor() as cursor:
+        for name, value in pragmas().items():
+            if in_memory and name in FILE_ONLY_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def backoff(attempt):
+    """Seconds to sleep before retry ``attempt`` (0-based), with full jitter."""
+    base = getattr(settings, 'SQLITE_LOCK_BACKOFF', DEFAULT_LOCK_BACKOFF)
+    return random.uniform(0, min(MAX_LOCK_BACKOFF, base * 2 ** attempt))
+
+
+def run_with_retry(func, *args, **kwargs):
+    """Call ``func`` in a transaction, retrying it when SQLite is locked.
+
+    Inside an outer transaction, or with the profile off, ``func`` runs once:
+    only the outermost transaction can be safely rolled back and replayed.
+    """
+    retries = getattr(settings, 'SQLITE_LOCK_RETRIES', DEFAULT_LOCK_RETRIES)
+    if connection.vendor != 'sqlite' or not enabled() or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    queue = write_queue if getattr(settings, 'SQLITE_SERIALIZE_WRITES', True) else nullcontext()
+    for attempt in range(retries + 1):
+        try:
+            with queue, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e) or attempt == retries:
+                raise
+            delay = backoff(attempt)
+            logger.warning('SQLite locked, retrying in %.3fs (attempt %d of %d)', delay, attempt + 1, retries)
+            time.sleep(delay)
+
+
+def retry_on_lock(view):
+    """Run the decorated view's writes through :func:`run_with_retry`.
+
+    GET and HEAD go straight through: WAL readers never wait for writers.
+    Errors raised when the transaction commits (deferred foreign key checks,
+    a lock that outlasted the retries) happen after the view's own error
+    handling, so they are answered here in the same JSON form.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        try:
+            return run_with_retry(view, request, *args, **kwargs)
+        except DatabaseError as e:
+            return FastJsonResponse({'error': str(e)}, status=500)
+    return inner
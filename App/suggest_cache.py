@@ -0,0 +1,128 @@
+"""Bounded LRU/TTL memoization for ``/api/suggest/``.
+
+Most requests repeat a handful of pH/moisture/soil/crop combinations, so the
+suggestion list is cached per normalized input tuple; only ``generated_at``
+is produced fresh on a hit. With ``SUGGEST_CACHE_PRECISION`` set, float
+readings are rounded to that many decimals *before* the rules run, so a
+cached answer is exactly what its key would compute. Text inputs are keyed
+case-insensitively, as keyword rules match them, unless a reason repeats
+the value.
+
+Settings: ``SUGGEST_CACHE_SIZE`` (entries, 0 disables), ``SUGGEST_CACHE_TTL``
+(seconds) and ``SUGGEST_CACHE_PRECISION`` (decimals, ``None`` = exact).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .ai_engine import _timestamp, get_engine
+
+
+class SuggestionCache:
+
+    def __init__(self, maxsize=1024, ttl=300.0, precision=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._engine = None
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def normalize(self, payload, engine):
+        """``(key, payload)`` for the engine's inputs; key is ``None`` if unhashable."""
+        values = {}
+        for name in engine.inputs:
+            value = payload.get(name)
+            if isinstance(value, float) and self.precision is not None:
+                value = round(value, self.precision)
+            elif isinstance(value, str) and name not in engine.echoed:
+                value = value.lower()
+            values[name] = value
+        # type is part of the key: 5 and 5.0 render differently in reasons
+        key = tuple((type(v).__name__, v) for v in values.values())
+        try:
+            hash(key)
+        except TypeError:
+            return None, payload
+        return key, values
+
+    def suggestions(self, payload):
+        engine = get_engine()
+        if self.maxsize <= 0:
+            return engine.suggest(payload)
+        key, normalized = self.normalize(payload, engine)
+        if key is None:
+            return engine.suggest(payload)
+
+        now = time.monotonic()
+        with self._lock:
+            if engine is not self._engine:  # rules were reloaded
+                self._data.clear()
+                self._engine = engine
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, cached = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return [dict(s) for s in cached]
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+
+        result = engine.suggest(normalized)
+        with self._lock:
+            if engine is self._engine:
+                self._data[key] = (now + self.ttl, result)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return [dict(s) for s in result]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'precision': self.precision,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SuggestionCache(
+                    maxsize=getattr(settings, 'SUGGEST_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'SUGGEST_CACHE_TTL', 300.0),
+                    precision=getattr(settings, 'SUGGEST_CACHE_PRECISION', None),
+                )
+    return _cache
+
+
+def cached_suggest_actions(payload: dict):
+    """:func:`ai_engine.suggest_actions` served through the shared cache."""
+    return {
+        'generated_at': _timestamp(),
+        'suggestions': get_cache().suggestions(payload),
+    }
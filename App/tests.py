@@ -1 +1,1344 @@
-# Create your tests here.
+import gc
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from . import ai_engine, analytics, async_views, latest, metrics, renderers, series, urls, views
+from .ai_engine import DEFAULT_RULES, suggest_actions
+from .counters import reconcile, touch_all
+from .ingest import bulk_insert
+from .models import Farmer, CropRecord, ImportCheckpoint, LatestReading, Rollup, SoilRecord, TableCount, WaterRecord
+from .precompressed import PrecompressedJSON
+from .querylog import DEFAULT_BUDGETS, QueryLog, budget_for, query_budget
+from .rule_engine import RuleEngine
+from .seeding import seed_dataset
+from .signals import records_bulk_created
+from .sqlite import retry_on_lock
+from .suggest_cache import SuggestionCache
+from .timestamps import TimestampError, coerce_timestamp, parse_timestamp, require_timestamp
+
+
+def seed(rows):
+    farmers = Farmer.objects.bulk_create(Farmer(name=f'Farmer {i}') for i in range(rows))
+    SoilRecord.objects.bulk_create(SoilRecord(farmer=f, ph=6.5) for f in farmers)
+    WaterRecord.objects.bulk_create(WaterRecord(farmer=f, ph=7.0) for f in farmers)
+    CropRecord.objects.bulk_create(CropRecord(farmer=f, crop_name='mirchi') for f in farmers)
+    # bulk_create skips the signals that version the tables
+    touch_all()
+
+
+class SerializationQueryCountTests(TestCase):
+    LIST_URLS = [
+        '/api/farmers/',
+        '/api/records/soil/',
+        '/api/records/water/',
+        '/api/records/crop/',
+    ]
+
+    # One read of the ETag validator (see App.conditional) plus one for the data
+    def assertListQueries(self, rows):
+        for url in self.LIST_URLS:
+            with self.subTest(url=url, rows=rows), self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(len(response.json()), rows)
+
+    def test_list_query_count_is_constant(self):
+        seed(3)
+        self.assertListQueries(3)
+        seed(40)
+        self.assertListQueries(43)
+
+    def test_detail_query_count(self):
+        seed(1)
+        farmer = Farmer.objects.get()
+        urls = {
+            f'/api/farmers/{farmer.id}/': 'region',
+            f'/api/records/soil/{SoilRecord.objects.get().id}/': 'farmer_id',
+            f'/api/records/water/{WaterRecord.objects.get().id}/': 'farmer_id',
+            f'/api/records/crop/{CropRecord.objects.get().id}/': 'farmer_id',
+        }
+        for url, key in urls.items():
+            with self.subTest(url=url), self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertIn(key, response.json())
+        self.assertEqual(response.json()['farmer_id'], farmer.id)
+
+    def test_put_moves_record_to_other_farmer(self):
+        seed(2)
+        record = SoilRecord.objects.first()
+        other = Farmer.objects.exclude(id=record.farmer_id).get()
+        self.client.put(f'/api/records/soil/{record.id}/', {'farmer_id': other.id},
+                        content_type='application/json')
+        record.refresh_from_db()
+        self.assertEqual(record.farmer_id, other.id)
+
+
+class ConditionalGetTests(TestCase):
+
+    def test_unchanged_collection_is_not_modified(self):
+        seed(2)
+        etag = self.client.get('/api/records/soil/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/records/soil/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post('/api/records/soil/', {'farmer_id': Farmer.objects.first().id, 'ph': 7},
+                         content_type='application/json')
+        response = self.client.get('/api/records/soil/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_changes_on_update(self):
+        seed(1)
+        url = f'/api/farmers/{Farmer.objects.get().id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.put(url, {'name': 'Renamed'}, content_type='application/json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ListEndpointTests(TestCase):
+    """List responses are a bare JSON array of App.serializers.FIELDS,
+    newest first, read with one projected SELECT."""
+    KEYS = {
+        '/api/farmers/': ['id', 'name', 'phone', 'region'],
+        '/api/records/soil/': ['id', 'farmer_id', 'ph', 'nitrogen', 'phosphorus', 'potassium', 'date_recorded'],
+        '/api/records/water/': ['id', 'farmer_id', 'ph', 'ec', 'tds', 'date_recorded'],
+        '/api/records/crop/': ['id', 'farmer_id', 'crop_name', 'yield_kg', 'date_recorded'],
+        '/api/records/crops/': ['id', 'farmer_id', 'crop_name', 'yield_kg', 'date_recorded'],
+    }
+
+    def test_response_shape(self):
+        farmer = Farmer.objects.create(name='Ravi', phone='98480', location='Guntur')
+        when = datetime(2024, 7, 15, 6, 30, tzinfo=timezone.utc)
+        SoilRecord.objects.create(farmer=farmer, ph=6.5, nitrogen=40, moisture=18, date_recorded=when)
+        WaterRecord.objects.create(farmer=farmer, ph=7.0, tds=300)
+        CropRecord.objects.create(farmer=farmer, crop_name='mirchi', yield_kg=900)
+        for url, keys in self.KEYS.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertNotIn('X-Next-Cursor', response)
+                body = response.json()
+                self.assertIsInstance(body, list)
+                self.assertEqual(list(body[0]), keys)
+                if 'farmer_id' in keys:
+                    self.assertEqual(body[0]['farmer_id'], farmer.id)
+        self.assertEqual(self.client.get('/api/farmers/').json(),
+                         [{'id': farmer.id, 'name': 'Ravi', 'phone': '98480', 'region': 'Guntur'}])
+        soil = self.client.get('/api/records/soil/').json()[0]
+        self.assertEqual((soil['ph'], soil['nitrogen'], soil['potassium']), (6.5, 40, None))
+        self.assertEqual(soil['date_recorded'], '2024-07-15T06:30:00Z')
+
+    def test_data_query_selects_only_the_projection(self):
+        seed(2)
+        for url in ('/api/records/soil/', '/api/records/crop/'):
+            with self.subTest(url=url), QueryLog() as log:
+                self.client.get(url)
+            sql = log.statements[-1][0]
+            self.assertNotIn('JOIN', sql)
+            self.assertNotIn('"App_farmer"', sql)
+            self.assertNotIn('"moisture"', sql)
+            self.assertNotIn('"soil_type"', sql)
+
+    def test_newest_first_and_filters(self):
+        seed(3)
+        farmer = Farmer.objects.first()
+        CropRecord.objects.create(farmer=farmer, crop_name='rice')
+        ids = [r['id'] for r in self.client.get('/api/records/crop/').json()]
+        self.assertEqual(ids, list(CropRecord.objects.order_by('-planted_on', '-id').values_list('id', flat=True)))
+
+        rows = self.client.get(f'/api/records/crop/?farmer_id={farmer.id}').json()
+        self.assertEqual({r['crop_name'] for r in rows}, {'rice', 'mirchi'})
+        self.assertEqual({r['farmer_id'] for r in rows}, {farmer.id})
+        self.assertEqual([r['crop_name'] for r in self.client.get('/api/records/crops/?crop_name=rice').json()],
+                         ['rice'])
+        self.assertEqual(self.client.get('/api/records/soil/?farmer_id=x').status_code, 400)
+
+
+class PaginationTests(TestCase):
+
+    def test_cursor_walks_every_row_once(self):
+        seed(7)
+        seen, url = [], '/api/records/soil/?limit=3'
+        while url:
+            response = self.client.get(url)
+            seen += [r['id'] for r in response.json()]
+            cursor = response.get('X-Next-Cursor')
+            url = f'/api/records/soil/?limit=3&cursor={cursor}' if cursor else None
+        self.assertEqual(seen, list(SoilRecord.objects.values_list('id', flat=True)))
+
+    @override_settings(API_PAGE_SIZE=4, API_MAX_PAGE_SIZE=5)
+    def test_page_size_defaults_and_caps(self):
+        seed(7)
+        response = self.client.get('/api/farmers/')
+        self.assertEqual(len(response.json()), 4)
+        self.assertEqual(response['Link'], f'</api/farmers/?cursor={response["X-Next-Cursor"]}>; rel="next"')
+        capped = self.client.get('/api/farmers/?limit=50')
+        self.assertEqual(len(capped.json()), 5)
+        self.assertIn('X-Next-Cursor', capped)
+        self.assertNotIn('X-Next-Cursor', self.client.get(f'/api/farmers/?cursor={capped["X-Next-Cursor"]}'))
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/farmers/?limit=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/farmers/?cursor=garbage').status_code, 400)
+
+
+class ExportTests(TestCase):
+    """/api/records/<kind>/export/ streams App.export chunks."""
+
+    def export(self, kind, fmt):
+        response = self.client.get(f'/api/records/{kind}/export/?format={fmt}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, list(response.streaming_content)
+
+    def listed(self, kind):
+        return sorted(self.client.get(f'/api/records/{kind}/?limit=100').json(), key=lambda r: r['id'])
+
+    @override_settings(EXPORT_CHUNK_SIZE=3)
+    def test_ndjson_is_one_record_per_line_across_chunks(self):
+        seed(7)
+        response, chunks = self.export('soil', 'ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="soil_records.ndjson"')
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(all(chunk.endswith(b'\n') for chunk in chunks))
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.listed('soil'))
+
+    @override_settings(EXPORT_CHUNK_SIZE=3)
+    def test_json_is_one_array_across_chunks(self):
+        seed(7)
+        response, chunks = self.export('crop', 'json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual((chunks[0], chunks[-1]), (b'[', b']'))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b''.join(chunks)), self.listed('crop'))
+
+    def test_empty_table(self):
+        self.assertEqual(self.export('water', 'ndjson')[1], [])
+        self.assertEqual(json.loads(b''.join(self.export('water', 'json')[1])), [])
+
+    def test_bad_kind_and_format(self):
+        self.assertEqual(self.client.get('/api/records/dust/export/').status_code, 404)
+        self.assertEqual(self.client.get('/api/records/soil/export/?format=csv').status_code, 400)
+
+
+class RendererTests(TestCase):
+    """App.renderers encodes the same values with orjson and the stdlib."""
+
+    def render(self, name, data):
+        with override_settings(JSON_RENDERER=name):
+            self.assertEqual(renderers.renderer(), name)
+            return renderers.dumps(data)
+
+    def test_orjson_and_stdlib_agree(self):
+        if renderers.orjson is None:
+            self.skipTest('orjson is not installed')
+        ist = timezone(timedelta(hours=5, minutes=30))
+        payload = {
+            'utc': datetime(2024, 7, 15, 6, 30, 1, 250, tzinfo=timezone.utc),
+            'utc_whole_seconds': datetime(2024, 7, 15, 6, 30, tzinfo=timezone.utc),
+            'offset': datetime(2024, 7, 15, 12, 0, 0, 999999, tzinfo=ist),
+            'naive': datetime(2024, 7, 15, 6, 30, 1, 5),
+            'day': date(2024, 7, 15),
+            'decimals': [Decimal('6.50'), Decimal('-0.001'), Decimal('12345678901234567890.1')],
+            'floats': [0.1, 6.5, -1e-07, 1e+300, 2 / 3],
+            'text': 'Ramesh Kumar — మిర్చి, ज्वार 🌶',
+            'nested': [{'id': 1, 'farmer_id': None, 'ok': True}],
+        }
+        orjson_body = self.render('orjson', payload)
+        stdlib_body = self.render('stdlib', payload)
+        self.assertEqual(json.loads(orjson_body), json.loads(stdlib_body))
+        parsed = json.loads(orjson_body)
+        self.assertEqual(parsed['utc'], '2024-07-15T06:30:01.000250Z')
+        self.assertEqual(parsed['offset'], '2024-07-15T12:00:00.999999+05:30')
+        self.assertEqual(parsed['naive'], '2024-07-15T06:30:01.000005')
+        self.assertEqual(parsed['decimals'], ['6.50', '-0.001', '12345678901234567890.1'])
+        self.assertEqual(parsed['text'], payload['text'])
+
+
+class PrecompressedTests(TestCase):
+    """App.precompressed content negotiation and validators."""
+    DOCUMENT = {'openapi': '3.0.3', 'paths': {'/api/': {'get': {'summary': 'Überblick'}}}}
+
+    def variants(self, brotli=None):
+        with patch('App.precompressed.brotli', brotli):
+            return PrecompressedJSON(self.DOCUMENT)
+
+    def get(self, document, accept_encoding=None, **headers):
+        if accept_encoding is not None:
+            headers['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        return document.response(RequestFactory().get('/openapi.json', **headers))
+
+    def test_negotiates_the_best_accepted_coding(self):
+        fake_brotli = SimpleNamespace(compress=lambda body, quality: b'br' + body)
+        document = self.variants(fake_brotli)
+        cases = {
+            None: None, 'identity': None, 'gzip': 'gzip', 'deflate, gzip': 'gzip',
+            'gzip, br': 'br', 'br;q=0, gzip': 'gzip', 'gzip;q=0': None,
+        }
+        for accept, coding in cases.items():
+            with self.subTest(accept_encoding=accept):
+                response = self.get(document, accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), coding)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                body = response.content
+                if coding == 'gzip':
+                    body = gzip.decompress(body)
+                elif coding == 'br':
+                    body = body.removeprefix(b'br')
+                self.assertEqual(json.loads(body), self.DOCUMENT)
+
+    def test_gzip_without_brotli_installed(self):
+        document = self.variants(brotli=None)
+        self.assertEqual(set(document.variants), {'identity', 'gzip'})
+        self.assertEqual(self.get(document, 'br').get('Content-Encoding'), None)
+        self.assertEqual(self.get(document, 'br, gzip')['Content-Encoding'], 'gzip')
+
+    def test_each_variant_has_its_own_strong_etag(self):
+        document = self.variants(SimpleNamespace(compress=lambda body, quality: body[::-1]))
+        etags = {coding: self.get(document, coding)['ETag'] for coding in ('identity', 'gzip', 'br')}
+        self.assertEqual(len(set(etags.values())), 3)
+        self.assertFalse(any(etag.startswith('W/') for etag in etags.values()))
+
+        for coding, etag in etags.items():
+            with self.subTest(coding=coding):
+                response = self.get(document, coding, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+        # Another representation's tag does not validate this one
+        self.assertEqual(self.get(document, 'gzip', HTTP_IF_NONE_MATCH=etags['identity']).status_code, 200)
+
+    def test_schema_endpoint(self):
+        response = self.client.get('/openapi.json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('paths', json.loads(gzip.decompress(response.content)))
+        response = self.client.get('/openapi.json', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class AsyncViewTests(TestCase):
+
+    async def assertSameResponse(self, name, url, **kwargs):
+        response = await getattr(async_views, name)(AsyncRequestFactory().get(url), **kwargs)
+        expected = await sync_to_async(getattr(views, name))(RequestFactory().get(url), **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        self.assertEqual(response.get('X-Next-Cursor'), expected.get('X-Next-Cursor'))
+
+    async def test_async_views_match_sync_views(self):
+        await sync_to_async(seed)(5)
+        farmer = await Farmer.objects.afirst()
+        soil = await SoilRecord.objects.afirst()
+        await self.assertSameResponse('farmer_list_create', '/api/farmers/?limit=2')
+        await self.assertSameResponse('soil_record_list_create', f'/api/records/soil/?farmer_id={farmer.id}')
+        await self.assertSameResponse('crop_record_list_create', '/api/records/crop/?crop_name=mirchi')
+        await self.assertSameResponse('water_record_list_create', '/api/records/water/?limit=x')
+        await self.assertSameResponse('farmer_detail', f'/api/farmers/{farmer.id}/', farmer_id=farmer.id)
+        await self.assertSameResponse('soil_record_detail', f'/api/records/soil/{soil.id}/', record_id=soil.id)
+
+    async def test_async_writes_and_suggest(self):
+        factory = AsyncRequestFactory()
+        response = await async_views.farmer_list_create(
+            factory.post('/api/farmers/', {'name': 'Async'}, content_type='application/json'))
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Farmer.objects.filter(name='Async').aexists())
+
+        response = await async_views.suggest(
+            factory.post('/api/suggest/', {'soil_ph': 5.0}, content_type='application/json'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('suggestions', json.loads(response.content))
+
+
+@override_settings(HEALTH_CACHE_TTL=0)
+class HealthTests(TestCase):
+
+    def test_ready_reports_latencies(self):
+        response = self.client.get('/api/health/ready/')
+        self.assertEqual(response.status_code, 200)
+        check = response.json()['checks']['database:default']
+        self.assertEqual(check['status'], 'ok')
+        self.assertIn('latency_ms', check)
+
+    def test_slow_database_is_not_ready(self):
+        with override_settings(HEALTH_THRESHOLDS={'database_ms': -1}):
+            response = self.client.get('/api/health/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['database:default']['status'], 'slow')
+        self.assertEqual(self.client.get('/api/health/live/').status_code, 200)
+
+
+class MetricsTests(TestCase):
+
+    def series_value(self, text, prefix):
+        line = next(line for line in text.splitlines() if line.startswith(prefix))
+        return float(line.rsplit(' ', 1)[1])
+
+    @override_settings(RESPONSE_CACHE_ALIAS=None)
+    def test_counts_requests_and_queries_per_route(self):
+        seed(3)
+        before = self.client.get('/metrics').content.decode()
+        labels = '{route="farmer_list_create",method="GET"'
+        try:
+            requests = self.series_value(before, 'agri_http_request_duration_seconds_count' + labels)
+            queries = self.series_value(before, 'agri_http_db_queries_total' + labels)
+        except StopIteration:
+            requests = queries = 0
+        with self.assertNumQueries(2):
+            self.client.get('/api/farmers/', HTTP_IF_NONE_MATCH='"stale"')
+        after = self.client.get('/metrics').content.decode()
+        self.assertEqual(self.series_value(after, 'agri_http_request_duration_seconds_count' + labels), requests + 1)
+        self.assertEqual(self.series_value(after, 'agri_http_db_queries_total' + labels), queries + 2)
+        self.assertIn('# TYPE agri_http_request_duration_seconds histogram', after)
+
+    def observe(self, route, response):
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name=route, route=route)
+        metrics.observe(request, response, 0.01, [0, 0.0])
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('GET', 'PATCH', 'OPTIONS', 'PROPFIND', 'BREW', 'X-RANDOM-1'):
+            request = RequestFactory().generic(method, '/')
+            request.resolver_match = SimpleNamespace(view_name='methods', route='methods')
+            metrics.observe(request, HttpResponse(b'ok'), 0.01, [0, 0.0])
+        methods = {method: total['count'] for (route, method), total in metrics.snapshot().items()
+                   if route == 'methods'}
+        self.assertEqual(methods, {'GET': 1, 'PATCH': 1, 'OPTIONS': 1, 'other': 3})
+
+    def test_finished_threads_are_folded_into_totals(self):
+        shards = len(metrics._shards)
+        threads = [threading.Thread(target=self.observe, args=('threaded', HttpResponse(b'ok')))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+        self.assertEqual(len(metrics._shards), shards)
+        self.assertEqual(metrics.snapshot()[('threaded', 'GET')]['count'], 20)
+        self.observe('threaded', HttpResponse(b'ok'))
+        self.assertEqual(metrics.snapshot()[('threaded', 'GET')]['count'], 21)
+
+    def test_streams_of_unknown_size_are_not_sized(self):
+        self.observe('streamed', StreamingHttpResponse(iter([b'a' * 5000])))
+        sized = StreamingHttpResponse(iter([b'a' * 5000]))
+        sized['Content-Length'] = '5000'
+        self.observe('streamed', sized)
+        self.observe('streamed', HttpResponse(b'a' * 50))
+        total = metrics.snapshot()[('streamed', 'GET')]
+        self.assertEqual((total['count'], total['size_count'], total['size_sum']), (3, 2, 5050))
+        text = metrics.render({('streamed', 'GET'): total})
+        self.assertIn('agri_http_response_size_bytes_count{route="streamed",method="GET"} 2', text)
+        self.assertIn('agri_http_request_duration_seconds_count{route="streamed",method="GET"} 3', text)
+
+
+@override_settings(QUERY_BUDGET_MODE='raise', RESPONSE_CACHE_ALIAS=None, HEALTH_CACHE_TTL=0)
+class QueryBudgetTests(TestCase):
+    """Every endpoint stays within its budget in App.querylog, and runs as
+    many queries on a large database as on a small one."""
+    WHEN = datetime(2024, 7, 15, 6, tzinfo=timezone.utc)
+    # Django's admin is mounted first and shadows these pages
+    SHADOWED = ('admin_dashboard', 'admin_farmers', 'admin_crops', 'admin_soil', 'admin_water')
+
+    def seed(self, farmers, records, seed):
+        seed_dataset(farmers, records, seed=seed)
+        reconcile()
+        latest.rebuild()
+        analytics.rebuild()
+
+    def history(self, farmer, rows):
+        """``rows`` readings of each kind for ``farmer`` in the two weeks before ``WHEN``."""
+        older = [self.WHEN - timedelta(days=1 + i % 14, minutes=i) for i in range(rows)]
+        SoilRecord.objects.bulk_create(SoilRecord(farmer=farmer, ph=5 + i % 10 / 10, date_recorded=at)
+                                       for i, at in enumerate(older))
+        WaterRecord.objects.bulk_create(WaterRecord(farmer=farmer, ph=6 + i % 10 / 10, date_recorded=at)
+                                        for i, at in enumerate(older))
+        CropRecord.objects.bulk_create(CropRecord(farmer=farmer, crop_name='mirchi', yield_kg=100 + i,
+                                                  date_recorded=at) for i, at in enumerate(older))
+
+    def requests(self, history=0):
+        """``(url name, method, path, body)`` for every endpoint, probing two
+        new farmers with ``history`` older readings of each kind.
+
+        Each kind's latest reading is updated, moved to the other farmer and
+        deleted there, so the writes take the most expensive paths through
+        App.signals: recomputing both farmers' latest readings, re-reading
+        bucket extremes and emptying the reading's daily buckets.
+        """
+        farmer = Farmer.objects.create(name='Probe')
+        neighbour = Farmer.objects.create(name='Neighbour')
+        self.history(farmer, history)
+        self.history(neighbour, history)
+        # The probe's latest readings, alone on their day and the largest of their month
+        soil = SoilRecord.objects.create(farmer=farmer, ph=6.5, date_recorded=self.WHEN)
+        water = WaterRecord.objects.create(farmer=farmer, ph=7.0, date_recorded=self.WHEN)
+        crop = CropRecord.objects.create(farmer=farmer, crop_name='mirchi', yield_kg=900, date_recorded=self.WHEN)
+        reconcile()
+        latest.rebuild()
+        analytics.rebuild()
+        f = farmer.id
+        gets = {
+            'frontend_index': '/', 'frontend_index_html': '/index.html',
+            'frontend_farmers': '/farmers.html', 'frontend_contact': '/contact.html',
+            'index': '/api/', 'stats': '/stats/?exact=1', 'openapi_schema': '/openapi.json', 'docs': '/docs/',
+            'response_cache_stats': '/api/cache/', 'metrics': '/metrics', 'database_pool_stats': '/api/db/',
+            'health': '/api/health/', 'health_live': '/api/health/live/', 'health_ready': '/api/health/ready/',
+            'farmer_list_create': '/api/farmers/', 'farmer_detail': f'/api/farmers/{f}/',
+            'farmer_suggest': f'/api/farmers/{f}/suggest/', 'farmer_series': f'/api/farmers/{f}/series/water.ph/',
+            'soil_record_list_create': '/api/records/soil/', 'soil_record_detail': f'/api/records/soil/{soil.id}/',
+            'water_record_list_create': '/api/records/water/',
+            'water_record_detail': f'/api/records/water/{water.id}/',
+            'crop_record_list_create': '/api/records/crop/', 'crop_record_detail': f'/api/records/crop/{crop.id}/',
+            'crop_records_list': '/api/records/crops/', 'record_export': '/api/records/soil/export/',
+            'suggest_cache_stats': '/api/suggest/cache/', 'analytics_index': '/api/analytics/',
+            'analytics_rollups': '/api/analytics/soil.ph/?granularity=day',
+        }
+        reading = {'farmer_id': f, 'ph': 6.0, 'crop_name': 'rice', 'yield_kg': 1200,
+                   'date_recorded': self.WHEN.isoformat()}
+        writes = [
+            ('farmer_list_create', 'POST', '/api/farmers/', {'name': 'New'}),
+            ('farmer_detail', 'PUT', f'/api/farmers/{f}/', {'name': 'Renamed'}),
+            ('suggest', 'POST', '/api/suggest/', {'soil_ph': 5.2, 'crop_type': 'rice'}),
+            ('suggest_batch', 'POST', '/api/suggest/batch/', {'soil_ph': [5.2, 7.9]}),
+        ]
+        for kind, record in (('soil', soil), ('water', water), ('crop', crop)):
+            path = f'/api/records/{kind}/{record.id}/'
+            writes += [
+                (f'{kind}_record_detail', 'PUT', path, {'ph': 7.5, 'yield_kg': 950}),
+                (f'{kind}_record_detail', 'PUT', path, {'farmer_id': neighbour.id, 'ph': 8.0, 'yield_kg': 990}),
+                (f'{kind}_record_detail', 'DELETE', path, None),
+                (f'{kind}_record_list_create', 'POST', f'/api/records/{kind}/', reading),
+            ]
+        writes += [
+            ('record_bulk_create', 'POST', '/api/records/soil/bulk/', [reading] * 50),
+            ('farmer_detail', 'DELETE', f'/api/farmers/{f}/', None),
+        ]
+        return [(name, 'GET', path, None) for name, path in gets.items()] + writes
+
+    def query_counts(self, history):
+        counts = []
+        for name, method, path, body in self.requests(history):
+            kwargs = {} if body is None else {'data': json.dumps(body), 'content_type': 'application/json'}
+            # The middleware raises QueryBudgetExceeded over budget or on repeated query shapes
+            with self.subTest(name=name, method=method, body=body), QueryLog() as log:
+                response = getattr(self.client, method.lower())(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400)
+            counts.append((name, method, len(log)))
+        return counts
+
+    def test_every_endpoint_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - set(DEFAULT_BUDGETS), set())
+        self.assertEqual(names - {name for name, *_ in self.requests()} - set(self.SHADOWED), set())
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        self.seed(5, 20, seed=1)
+        small = self.query_counts(history=4)
+        self.seed(200, 3000, seed=2)
+        self.assertEqual(self.query_counts(history=250), small)
+
+    def test_shadowed_pages_run_no_queries(self):
+        for name in self.SHADOWED:
+            with self.subTest(name=name), query_budget(budget_for(name, 'GET')):
+                getattr(views, name)(RequestFactory().get('/'))
+
+    def test_repeated_query_shapes_are_reported(self):
+        seed(5)
+        with self.assertRaisesMessage(AssertionError, 'possible N+1: 5 queries'):
+            with query_budget():
+                [record.farmer.name for record in SoilRecord.objects.all()]
+
+
+class WriteTransactionTests(TransactionTestCase):
+    """Writes commit in App.sqlite.run_with_retry, where SQLite checks the
+    deferred foreign keys, so these need real transactions."""
+
+    def test_unknown_farmer_is_a_json_error(self):
+        farmer = Farmer.objects.create(name='Known')
+        record = SoilRecord.objects.create(farmer=farmer, ph=6.5)
+        responses = [
+            self.client.post('/api/records/soil/', {'farmer_id': 9999, 'ph': 6.0},
+                             content_type='application/json'),
+            self.client.put(f'/api/records/soil/{record.id}/', {'farmer_id': 9999},
+                            content_type='application/json'),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 500)
+            self.assertIn('FOREIGN KEY constraint failed', response.json()['error'])
+        record.refresh_from_db()
+        self.assertEqual(record.farmer_id, farmer.id)
+        self.assertEqual(SoilRecord.objects.count(), 1)
+
+
+class SQLiteTuningTests(TransactionTestCase):
+    """App.sqlite connection PRAGMAs and lock retries."""
+
+    def fresh_connection(self):
+        """A new connection to a database file, so file-only PRAGMAs apply."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        default = connections['default']
+        wrapper = default.__class__(dict(default.settings_dict, NAME=os.path.join(directory, 'tuned.db')))
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_are_tuned(self):
+        wrapper = self.fresh_connection()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 250, 'synchronous': None})
+    def test_pragma_overrides(self):
+        wrapper = self.fresh_connection()
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 250)
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 2)  # SQLite's default, FULL
+
+    @override_settings(SQLITE_TUNING=False)
+    def test_profile_off(self):
+        wrapper = self.fresh_connection()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_LOCK_RETRIES=2)
+    def test_persistent_lock_is_a_json_error(self):
+        attempts = []
+
+        @retry_on_lock
+        def locked_view(request):
+            attempts.append(request.method)
+            Farmer.objects.create(name='Never committed')
+            raise OperationalError('database is locked')
+
+        with patch('App.sqlite.time.sleep') as sleep, self.assertLogs('App.sqlite', 'WARNING') as logs:
+            response = locked_view(RequestFactory().post('/api/farmers/'))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(json.loads(response.content), {'error': 'database is locked'})
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertFalse(Farmer.objects.exists())
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class RollupTests(TestCase):
+    """Rollups maintained by App.signals equal a rebuild from the history."""
+    WHEN = datetime(2024, 7, 15, 6, tzinfo=timezone.utc)
+
+    def rollups(self):
+        return sorted(Rollup.objects.values_list(
+            'farmer_id', 'metric', 'granularity', 'period', 'crop_name', 'count', 'total', 'minimum', 'maximum'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollups()
+        analytics.rebuild()
+        self.assertEqual(maintained, self.rollups())
+
+    def test_writes_keep_rollups_equal_to_rebuild(self):
+        first, second = Farmer.objects.create(name='First'), Farmer.objects.create(name='Second')
+        soil = [SoilRecord.objects.create(farmer=first, ph=5 + i / 2, moisture=20 + i,
+                                          date_recorded=self.WHEN + timedelta(days=10 * i)) for i in range(8)]
+        crops = [CropRecord.objects.create(farmer=farmer, crop_name=name, yield_kg=100 * i,
+                                           date_recorded=self.WHEN + timedelta(days=i))
+                 for i, (farmer, name) in enumerate([(first, 'rice'), (first, 'wheat'), (second, 'rice')])]
+        self.assertMatchesRebuild()
+
+        soil[3].ph = 9.5  # new maximum
+        soil[3].save()
+        soil[0].ph = 6.0  # was the minimum
+        soil[0].save()
+        self.assertMatchesRebuild()
+
+        soil[7].farmer = second
+        soil[7].save()
+        crops[0].farmer, crops[0].crop_name = second, 'wheat'
+        crops[0].save()
+        self.assertMatchesRebuild()
+
+        soil[3].delete()
+        soil[5].delete()
+        crops[2].delete()
+        self.assertMatchesRebuild()
+
+        self.client.delete(f'/api/farmers/{first.id}/')
+        self.assertMatchesRebuild()
+
+    def test_migration_writes_what_rebuild_writes(self):
+        seed_dataset(20, 300, seed=3)
+        analytics.rebuild()
+        rebuilt = self.rollups()
+        Rollup.objects.all().delete()
+        import_module('App.migrations.0013_rollups').populate(django_apps, None)
+        self.assertEqual(self.rollups(), rebuilt)
+
+    def test_rollups_endpoint(self):
+        farmer, other = Farmer.objects.create(name='First'), Farmer.objects.create(name='Second')
+        for day, ph in ((0, 6.0), (1, 7.0), (40, 5.0)):
+            SoilRecord.objects.create(farmer=farmer, ph=ph, date_recorded=self.WHEN + timedelta(days=day))
+        SoilRecord.objects.create(farmer=other, ph=8.0, date_recorded=self.WHEN)
+
+        response = self.client.get(f'/api/analytics/soil.ph/?granularity=month&farmer_id={farmer.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['label'], row['count'], row['average'], row['min'], row['max'])
+                          for row in response.json()],
+                         [('2024-08', 1, 5.0, 5.0, 5.0), ('2024-07', 2, 6.5, 6.0, 7.0)])
+
+        season = self.client.get('/api/analytics/soil.ph/?granularity=season').json()
+        self.assertEqual(sorted((row['farmer_id'], row['label'], row['count']) for row in season),
+                         [(farmer.id, 'kharif-2024', 3), (other.id, 'kharif-2024', 1)])
+        days = self.client.get('/api/analytics/soil.ph/?granularity=day&from=2024-07-16&to=2024-08-01').json()
+        self.assertEqual([(row['period'], row['total']) for row in days], [('2024-07-16', 7.0)])
+
+        self.assertEqual(self.client.get('/api/analytics/soil.ph/?granularity=week').status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/soil.ph/?farmer_id=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/soil.colour/').status_code, 404)
+
+
+class LatestReadingTests(TestCase):
+    """LatestReading rows maintained by App.latest equal a full recompute."""
+    WHEN = datetime(2024, 7, 15, 6, tzinfo=timezone.utc)
+
+    def readings(self):
+        return sorted(LatestReading.objects.values_list(
+            'farmer_id', 'soil_id', 'soil_at', 'soil_ph', 'moisture', 'soil_type',
+            'water_id', 'water_at', 'crop_id', 'crop_at', 'crop_name'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.readings()
+        latest.rebuild()
+        self.assertEqual(maintained, self.readings())
+
+    def test_writes_keep_latest_readings_equal_to_rebuild(self):
+        first, second = Farmer.objects.create(name='First'), Farmer.objects.create(name='Second')
+        soil = [SoilRecord.objects.create(farmer=first, ph=5 + i / 2, soil_type='loam',
+                                          date_recorded=self.WHEN + timedelta(days=i)) for i in range(4)]
+        WaterRecord.objects.create(farmer=second, ph=7.0, date_recorded=self.WHEN)
+        self.assertEqual(LatestReading.objects.get(pk=first.id).soil_id, soil[3].id)
+        self.assertMatchesRebuild()
+
+        soil[0].date_recorded = self.WHEN + timedelta(days=10)  # an older reading becomes the latest
+        soil[0].save()
+        soil[0].date_recorded = self.WHEN - timedelta(days=10)  # and stops being it
+        soil[0].save()
+        soil[3].ph = 4.5
+        soil[3].save()
+        self.assertMatchesRebuild()
+
+        soil[3].farmer = second  # the latest reading moves to another farmer
+        soil[3].save()
+        self.assertEqual(LatestReading.objects.get(pk=first.id).soil_id, soil[2].id)
+        self.assertEqual(LatestReading.objects.get(pk=second.id).soil_id, soil[3].id)
+        self.assertMatchesRebuild()
+
+        soil[2].delete()  # the latest reading
+        soil[0].delete()
+        soil[3].delete()
+        self.assertEqual(LatestReading.objects.get(pk=first.id).soil_id, soil[1].id)
+        self.assertIsNone(LatestReading.objects.get(pk=second.id).soil_id)
+        self.assertMatchesRebuild()
+
+    def test_editing_an_older_reading_reads_no_history(self):
+        farmer = Farmer.objects.create(name='First')
+        old = WaterRecord.objects.create(farmer=farmer, ph=7.0, date_recorded=self.WHEN - timedelta(days=3))
+        newest = WaterRecord.objects.create(farmer=farmer, ph=7.2, date_recorded=self.WHEN)
+        old.ph = 6.8
+        with patch('App.latest.recompute', wraps=latest.recompute) as recompute, QueryLog() as log:
+            old.save()
+        recompute.assert_not_called()
+        self.assertFalse([sql for sql, _ in log.statements if 'ORDER BY COALESCE' in sql])
+        self.assertEqual(LatestReading.objects.get(pk=farmer.id).water_id, newest.id)
+
+        old.date_recorded = self.WHEN + timedelta(days=1)  # now the newest: offered, still no history read
+        with patch('App.latest.recompute', wraps=latest.recompute) as recompute:
+            old.save()
+        recompute.assert_not_called()
+        self.assertEqual(LatestReading.objects.get(pk=farmer.id).water_id, old.id)
+        self.assertMatchesRebuild()
+
+    def test_offer_keeps_the_newest_reading(self):
+        farmer = Farmer.objects.create(name='First')
+        newest = SoilRecord.objects.create(farmer=farmer, ph=6.0, date_recorded=self.WHEN)
+        older = SoilRecord.objects.bulk_create([
+            SoilRecord(farmer=farmer, ph=5.0, date_recorded=self.WHEN - timedelta(days=1)),
+            SoilRecord(farmer=farmer, ph=5.5, date_recorded=self.WHEN - timedelta(days=2)),
+        ])
+        latest.offer(older)
+        self.assertEqual(LatestReading.objects.get(pk=farmer.id).soil_id, newest.id)
+        tie = SoilRecord.objects.bulk_create([SoilRecord(farmer=farmer, ph=6.5, date_recorded=self.WHEN)])
+        latest.offer(tie)
+        self.assertEqual(LatestReading.objects.get(pk=farmer.id).soil_id, tie[0].id)
+
+        SoilRecord.objects.filter(pk=tie[0].id).delete()  # without the signals
+        latest.recompute(SoilRecord, farmer.id)
+        self.assertEqual(LatestReading.objects.get(pk=farmer.id).soil_id, newest.id)
+        self.assertMatchesRebuild()
+
+    def test_migration_writes_what_rebuild_writes(self):
+        seed_dataset(20, 300, seed=3)
+        latest.rebuild()
+        rebuilt = self.readings()
+        LatestReading.objects.all().delete()
+        import_module('App.migrations.0011_latest_reading').populate(django_apps, None)
+        self.assertEqual(self.readings(), rebuilt)
+
+    def test_farmer_suggest_uses_latest_readings(self):
+        farmer = Farmer.objects.create(name='First')
+        SoilRecord.objects.create(farmer=farmer, ph=7.9, moisture=40, date_recorded=self.WHEN - timedelta(days=1))
+        SoilRecord.objects.create(farmer=farmer, ph=5.2, moisture=12.5, soil_type='clay', date_recorded=self.WHEN)
+        CropRecord.objects.create(farmer=farmer, crop_name='rice', date_recorded=self.WHEN)
+        WaterRecord.objects.create(farmer=farmer, ph=7.0, date_recorded=self.WHEN - timedelta(days=3))
+
+        with patch('App.views.timezone.now', return_value=self.WHEN):
+            body = self.client.get(f'/api/farmers/{farmer.id}/suggest/').json()
+        inputs = {'soil_ph': 5.2, 'moisture': 12.5, 'soil_type': 'clay', 'crop': 'rice', 'days_since_last_water': 3}
+        self.assertEqual(body['farmer_id'], farmer.id)
+        self.assertEqual(body['inputs'], inputs)
+        self.assertEqual(body['suggestions'], suggest_actions(inputs)['suggestions'])
+
+        newcomer = Farmer.objects.create(name='Newcomer')
+        body = self.client.get(f'/api/farmers/{newcomer.id}/suggest/').json()
+        self.assertEqual(body['inputs'], {})
+        self.assertEqual(body['suggestions'], suggest_actions({})['suggestions'])
+        self.assertEqual(self.client.get('/api/farmers/9999/suggest/').status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class TableCountTests(TestCase):
+    """Counters maintained by App.counters equal COUNT(*) of each table."""
+
+    def stats(self):
+        stored = self.client.get('/stats/').json()
+        self.assertEqual(stored, self.client.get('/stats/?exact=1').json())
+        return stored
+
+    def test_writes_keep_counters_exact(self):
+        farmer = Farmer.objects.create(name='First')
+        other = Farmer.objects.create(name='Second')
+        record = SoilRecord.objects.create(farmer=farmer, ph=6.5)
+        CropRecord.objects.create(farmer=farmer, crop_name='rice')
+        self.assertEqual(self.stats(), {'farmers': 2, 'crops': 1, 'soil': 1, 'water': 0})
+
+        version = TableCount.objects.get(pk='soil').version
+        record.farmer = other
+        record.save()
+        self.assertEqual(TableCount.objects.get(pk='soil').version, version + 1)
+
+        rows = [{'farmer_id': farmer.id, 'ph': 6.0}, {'farmer_id': other.id, 'ph': 7.0},
+                {'farmer_id': 9999, 'ph': 7.0}]
+        response = self.client.post('/api/records/water/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(self.stats(), {'farmers': 2, 'crops': 1, 'soil': 1, 'water': 2})
+
+        self.client.delete(f'/api/farmers/{farmer.id}/')  # cascades to a crop and a water record
+        self.assertEqual(self.stats(), {'farmers': 1, 'crops': 0, 'soil': 1, 'water': 1})
+        self.assertFalse(LatestReading.objects.filter(farmer_id=farmer.id).exists())
+        self.assertFalse(Rollup.objects.filter(farmer_id=farmer.id).exists())
+        record.delete()
+        self.assertEqual(self.stats(), {'farmers': 1, 'crops': 0, 'soil': 0, 'water': 1})
+
+    @override_settings(RESPONSE_CACHE_ALIAS='responses')
+    def test_exact_counts_see_past_counter_drift(self):
+        seed(3)
+        reconcile()
+        counted = self.client.get('/stats/')
+        self.assertEqual(self.client.get('/stats/?exact=1').json()['water'], 3)
+        with connection.cursor() as cursor:  # behind the signals' back
+            cursor.execute('DELETE FROM App_waterrecord WHERE id = %s', [WaterRecord.objects.first().id])
+
+        self.assertEqual(self.client.get('/stats/', HTTP_IF_NONE_MATCH=counted['ETag']).status_code, 304)
+        for headers in ({}, {'HTTP_IF_NONE_MATCH': counted['ETag']}):
+            response = self.client.get('/stats/?exact=1', **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['water'], 2)
+            self.assertNotIn('X-Cache', response)
+
+    def test_reconcile_repairs_writes_that_bypass_signals(self):
+        seed(3)
+        self.assertEqual(reconcile()['soil'], (0, 3))
+        self.assertEqual(reconcile()['soil'], (3, 3))
+        self.assertEqual(self.stats(), {'farmers': 3, 'crops': 3, 'soil': 3, 'water': 3})
+
+    def test_migration_writes_what_reconcile_writes(self):
+        seed(3)
+        reconcile()
+        reconciled = sorted(TableCount.objects.values_list('table', 'rows'))
+        TableCount.objects.all().delete()
+        import_module('App.migrations.0012_table_counts').populate(django_apps, None)
+        self.assertEqual(sorted(TableCount.objects.values_list('table', 'rows')), reconciled)
+
+
+class TimestampTests(TestCase):
+    """App.timestamps parsing and the ?from=&to= filters."""
+    WHEN = datetime(2024, 7, 15, 6, 30, tzinfo=timezone.utc)
+
+    def test_parse_formats(self):
+        day = datetime(2024, 7, 15, tzinfo=timezone.utc)
+        cases = {
+            '2024-07-15T06:30:00Z': self.WHEN,
+            '2024-07-15T12:00:00+05:30': self.WHEN,
+            '2024-07-15 06:30': self.WHEN,  # naive: the default time zone (UTC)
+            '  2024-07-15T06:30:00  ': self.WHEN,
+            '2024-07-15': day,
+            '15/07/2024 06:30:00': self.WHEN,
+            '15/07/2024 06:30': self.WHEN,
+            '15/07/2024': day,
+            '15-07-2024': day,
+            '2024/07/15': day,
+            '15.07.2024': day,
+            self.WHEN: self.WHEN,
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(parse_timestamp(value), expected)
+        for value in ('', '   ', 'last tuesday', '2024-13-45', '31/02/2024', None, 1721025000):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_timestamp(value))
+
+    def test_require_and_coerce(self):
+        with self.assertRaisesMessage(TimestampError, 'from must be an ISO 8601 date or datetime'):
+            require_timestamp('from', 'soon')
+        self.assertEqual(coerce_timestamp('date_recorded', '', default=self.WHEN), self.WHEN)
+        self.assertIsNone(coerce_timestamp('date_recorded', None))
+        with self.assertRaises(TimestampError):
+            coerce_timestamp('date_recorded', 'soon')
+
+    def test_range_filters(self):
+        farmer = Farmer.objects.create(name='First')
+        ids = [SoilRecord.objects.create(farmer=farmer, ph=6.5, date_recorded=self.WHEN + timedelta(days=i)).id
+               for i in range(4)]
+
+        def listed(query):
+            response = self.client.get(f'/api/records/soil/?{query}')
+            self.assertEqual(response.status_code, 200)
+            return sorted(row['id'] for row in response.json())
+
+        self.assertEqual(listed('from=2024-07-16T06:30:00Z'), ids[1:])  # inclusive
+        self.assertEqual(listed('to=2024-07-17T06:30:00Z'), ids[:2])  # exclusive
+        self.assertEqual(listed('from=16/07/2024&to=2024-07-18'), ids[1:3])
+        response = self.client.get('/api/records/soil/?from=soon')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('from must be', response.json()['error'])
+
+
+class BackfillMigrationTests(TransactionTestCase):
+    """0008 parses the legacy text and reports the values it had to replace."""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate(target or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(target).apps if target else None
+
+    def tearDown(self):
+        self.migrate(None)
+
+    def test_unparseable_text_is_logged(self):
+        apps = self.migrate([('App', '0007_date_recorded_datetime')])
+        Farmer = apps.get_model('App', 'Farmer')
+        SoilRecord = apps.get_model('App', 'SoilRecord')
+        farmer = Farmer.objects.create(name='First')
+        texts = ['2024-07-15T06:30:00Z', '15/07/2024', 'after the rains', '', None]
+        ids = [SoilRecord.objects.create(farmer=farmer, ph=6.5, date_recorded_text=text).id for text in texts]
+
+        with self.assertLogs('App.migrations.0008_backfill_date_recorded', 'WARNING') as logs:
+            apps = self.migrate([('App', '0008_backfill_date_recorded')])
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn(f"SoilRecord {ids[2]}: unparseable date_recorded 'after the rains'", logs.output[0])
+        self.assertIn('SoilRecord: 1 unparseable', logs.output[1])
+
+        records = apps.get_model('App', 'SoilRecord').objects.in_bulk(ids)
+        self.assertEqual(records[ids[0]].date_recorded, datetime(2024, 7, 15, 6, 30, tzinfo=timezone.utc))
+        self.assertEqual(records[ids[1]].date_recorded, datetime(2024, 7, 15, tzinfo=timezone.utc))
+        for pk in ids[2:]:
+            self.assertEqual(records[pk].date_recorded, records[pk].recorded_at)
+
+
+class SeriesTests(TestCase):
+    """App.series downsampling and /api/farmers/<id>/series/<metric>/."""
+    WHEN = datetime(2024, 7, 15, 10, tzinfo=timezone.utc)
+
+    def test_reading_times_round_trip(self):
+        farmer = Farmer.objects.create(name='First')
+        moments = [self.WHEN, self.WHEN + timedelta(microseconds=250000),
+                   self.WHEN + timedelta(seconds=1, microseconds=123456)]
+        for moment in moments:
+            WaterRecord.objects.create(farmer=farmer, ph=7.0, date_recorded=moment)
+        times, _ = series.load(WaterRecord, farmer.id, 'ph')
+        self.assertEqual(times[0], self.WHEN.timestamp())
+        self.assertEqual([datetime.fromtimestamp(t, timezone.utc) for t in times.tolist()], moments)
+        body = self.client.get(f'/api/farmers/{farmer.id}/series/water.ph/').json()
+        self.assertEqual(body['data'][0], ['2024-07-15T10:00:00Z', 7.0])
+
+    def test_lttb(self):
+        times = np.arange(100, dtype=float)
+        values = np.sin(times / 10)
+        values[37] = 50  # a spike LTTB must keep
+        chosen = series.lttb(times, values, 10)
+        self.assertEqual(len(chosen), 10)
+        self.assertEqual((chosen[0], chosen[-1]), (0, 99))
+        self.assertTrue(np.all(np.diff(chosen) > 0))
+        self.assertIn(37, chosen)
+        # Bucket i holds the interior points [edges[i], edges[i + 1]) and gives one sample
+        edges = np.linspace(1, 99, 9).astype(int)
+        self.assertTrue(all(lo <= index < hi for index, lo, hi in zip(chosen[1:-1], edges, edges[1:])))
+        for points in (100, 500, 2):
+            self.assertEqual(series.lttb(times, values, points).tolist(), list(range(100)))
+
+    def test_minmax(self):
+        rng = np.random.default_rng(0)
+        times = np.arange(101, dtype=float)
+        values = rng.integers(0, 20, 101).astype(float)  # ties pick the first index
+        chosen = series.minmax(times, values, 9)
+        starts = np.linspace(0, 101, 5).astype(int)
+        expected = set()
+        for lo, hi in zip(starts, starts[1:]):
+            expected |= {lo + int(values[lo:hi].argmin()), lo + int(values[lo:hi].argmax())}
+        self.assertEqual(chosen.tolist(), sorted(expected))
+        for points in (101, 1000, 1):
+            self.assertEqual(series.minmax(times, values, points).tolist(), list(range(101)))
+
+    def test_series_endpoint(self):
+        farmer = Farmer.objects.create(name='First')
+        for i in range(20):
+            SoilRecord.objects.create(farmer=farmer, ph=5 + i % 7 / 2, date_recorded=self.WHEN + timedelta(hours=i))
+        url = f'/api/farmers/{farmer.id}/series/soil.ph/'
+
+        body = self.client.get(f'{url}?points=1000').json()
+        self.assertEqual((body['rows'], len(body['data'])), (20, 20))
+        body = self.client.get(f'{url}?points=6&method=minmax').json()
+        self.assertEqual(body['rows'], 20)
+        self.assertLessEqual(len(body['data']), 6)
+        body = self.client.get(f'{url}?from=2024-07-15T12:00:00Z&to=2024-07-15T15:00:00Z').json()
+        self.assertEqual([point[0] for point in body['data']],
+                         ['2024-07-15T12:00:00Z', '2024-07-15T13:00:00Z', '2024-07-15T14:00:00Z'])
+
+        for query in ('points=2', 'points=many', 'method=mean', 'from=soon'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'{url}?{query}').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/farmers/{farmer.id}/series/soil.colour/').status_code, 404)
+        self.assertEqual(self.client.get('/api/farmers/9999/series/soil.ph/').status_code, 404)
+
+
+@override_settings(BULK_MAX_ITEMS=5, RESPONSE_CACHE_ALIAS=None)
+class BulkUploadTests(TestCase):
+    """/api/records/<kind>/bulk/ and App.ingest.bulk_insert."""
+
+    def setUp(self):
+        self.farmer = Farmer.objects.create(name='First')
+
+    def post(self, body, kind='soil'):
+        return self.client.post(f'/api/records/{kind}/bulk/', body, content_type='application/json')
+
+    def test_all_valid(self):
+        rows = [{'farmer_id': self.farmer.id, 'ph': 6 + i / 10, 'date_recorded': f'2024-07-1{i}'} for i in range(5)]
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (5, 0))
+        stored = SoilRecord.objects.in_bulk([result['id'] for result in body['results']])
+        self.assertEqual([stored[result['id']].ph for result in body['results']], [6.0, 6.1, 6.2, 6.3, 6.4])
+        # The derived tables saw the rows
+        self.assertEqual(TableCount.objects.get(pk='soil').rows, 5)
+        self.assertEqual(LatestReading.objects.get(pk=self.farmer.id).soil_ph, 6.4)
+
+    def test_partial_failure(self):
+        rows = [
+            {'farmer_id': self.farmer.id, 'crop_name': 'rice', 'yield_kg': '1200'},
+            {'farmer_id': 9999, 'crop_name': 'rice'},
+            {'farmer_id': self.farmer.id, 'yield_kg': 5},
+            {'farmer_id': self.farmer.id, 'crop_name': 'rice', 'yield_kg': 'lots'},
+            'rice',
+        ]
+        response = self.post(rows, kind='crop')
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (1, 4))
+        self.assertEqual([result['index'] for result in body['results']], [0, 1, 2, 3, 4])
+        self.assertEqual(CropRecord.objects.get().id, body['results'][0]['id'])
+        self.assertEqual([result.get('error') for result in body['results'][1:]], [
+            'farmer 9999 does not exist', 'crop_name is required', 'yield_kg must be a number',
+            'item must be an object'])
+
+    def test_rows_for_unknown_farmers_only(self):
+        rows = [{'farmer_id': 9999, 'ph': 6.0}, {'farmer_id': True, 'ph': 6.0}, {'farmer_id': str(self.farmer.id)}]
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['error'] for result in response.json()['results']], [
+            'farmer 9999 does not exist', 'farmer_id must be an integer', 'farmer_id must be an integer'])
+        self.assertFalse(SoilRecord.objects.exists())
+
+    def test_bad_bodies(self):
+        for body in ('', '{"farmer_id": 1}', '[', '[]', '"rows"'):
+            with self.subTest(body=body):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+        response = self.post([{'farmer_id': self.farmer.id}] * 6)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.post([{'farmer_id': self.farmer.id}], kind='compost').status_code, 404)
+        self.assertFalse(SoilRecord.objects.exists())
+
+    def test_bulk_insert_batches_and_signals(self):
+        sent = []
+
+        def receiver(sender, records, **kwargs):
+            sent.append(len(records))
+
+        records_bulk_created.connect(receiver, sender=WaterRecord)
+        self.addCleanup(records_bulk_created.disconnect, receiver, sender=WaterRecord)
+        with transaction.atomic():
+            created = bulk_insert(WaterRecord, [WaterRecord(farmer=self.farmer, ph=7.0) for _ in range(5)], size=2)
+        self.assertEqual(sent, [5])
+        self.assertTrue(all(record.id for record in created))
+        self.assertEqual(WaterRecord.objects.count(), 5)
+        self.assertEqual(bulk_insert(WaterRecord, []), [])
+        self.assertEqual(sent, [5])
+
+
+class ImportRecordsTests(TestCase):
+    """manage.py import_records resumes an interrupted import exactly once."""
+
+    def test_interrupted_import_resumes_without_gaps_or_duplicates(self):
+        farmer = Farmer.objects.create(name='Ravi Kumar')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'soil.ndjson')
+        with open(path, 'w') as fh:
+            for n in range(1, 24):
+                row = {'farmer': ' ravi kumar '} if n % 2 else {'farmer_id': farmer.id}
+                fh.write(json.dumps({**row, 'ph': 6.0, 'notes': f'row {n}'}) + '\n')
+            fh.write('{"farmer": "nobody", "notes": "row 24"}\n')  # skipped
+
+        calls = []
+
+        def crash_on_third_batch(model, records, size=None):
+            # Dies after inserting, before the checkpoint is written
+            created = bulk_insert(model, records, size)
+            calls.append(len(records))
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return created
+
+        with patch('App.management.commands.import_records.bulk_insert', crash_on_third_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('import_records', 'soil', path, batch_size=5, stdout=StringIO())
+        self.assertEqual(SoilRecord.objects.count(), 10)
+        self.assertEqual(ImportCheckpoint.objects.get(pk=path).rows, 10)
+
+        out = StringIO()
+        call_command('import_records', 'soil', path, batch_size=5, stdout=out)
+        self.assertIn('Resuming after 10 rows', out.getvalue())
+        self.assertIn('Done: 13 rows inserted, 1 skipped', out.getvalue())
+        notes = sorted(SoilRecord.objects.values_list('notes', flat=True), key=lambda note: int(note.split()[1]))
+        self.assertEqual(notes, [f'row {n}' for n in range(1, 24)])
+        self.assertEqual(set(SoilRecord.objects.values_list('farmer_id', flat=True)), {farmer.id})
+
+        # A finished import re-run from its checkpoint inserts nothing
+        call_command('import_records', 'soil', path, batch_size=5, stdout=StringIO())
+        self.assertEqual(SoilRecord.objects.count(), 23)
+
+        # An edited file does not resume from a count that referred to other contents
+        with open(path, 'a') as fh:
+            fh.write(json.dumps({'farmer_id': farmer.id, 'notes': 'row 25'}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'has changed since 24 rows were imported'):
+            call_command('import_records', 'soil', path, batch_size=5, stdout=StringIO())
+        self.assertEqual(SoilRecord.objects.count(), 23)
+        call_command('import_records', 'soil', path, no_resume=True, stdout=StringIO())
+        self.assertEqual(SoilRecord.objects.count(), 47)
+        self.assertEqual(ImportCheckpoint.objects.get(pk=path).rows, 25)
+
+
+class RuleEngineTests(TestCase):
+    """The vectorized rule engine agrees with the per-plot one."""
+
+    def test_batch_matches_scalar_on_random_plots(self):
+        rng = random.Random(0)
+        engine = RuleEngine(DEFAULT_RULES)
+        # Rule boundaries, both sides of them, ints and floats, missing and NaN readings
+        numbers = {
+            'soil_ph': [5.5, 6.5, 8.0, 5, 8, 5.49, 6.51, 8.01, 3.2, 7.0, 14],
+            'moisture': [20, 80, 19.99, 80.01, 0, 50.5, 100],
+            'days_since_last_water': [5, 10, 4, 9, 9.99, 10.0, 30, 0],
+        }
+        texts = {
+            'crop': ['mirchi', 'Green CHILI', 'methi', 'fenugreek leaves', 'rice', ''],
+            'soil_type': ['sandy loam', 'CLAY', 'sandy clay', 'loam', ''],
+        }
+        plots = []
+        for _ in range(2000):
+            plot = {}
+            for name, choices in numbers.items():
+                plot[name] = rng.choice(choices + [None, float('nan'), round(rng.uniform(-1, 120), 2)])
+            for name, choices in texts.items():
+                plot[name] = rng.choice(choices + [None])
+            plots.append(plot)
+        columns = {name: [plot[name] for plot in plots] for name in plots[0]}
+        # Also a column left out entirely, as when a client sends no soil types
+        partial = {name: values for name, values in columns.items() if name != 'soil_type'}
+        for given in (columns, partial):
+            expected = [engine.suggest({name: values[i] for name, values in given.items()})
+                        for i in range(len(plots))]
+            self.assertEqual(engine.suggest_batch(given), expected)
+
+
+class RuleReloadTests(TestCase):
+    """get_engine() picks up AI_RULES_FILE changes and keeps the last good rules."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'rules.json')
+        self.mtime = time.time()
+        settings = override_settings(AI_RULES_FILE=self.path, AI_RULES_CHECK_INTERVAL=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(ai_engine.reload_rules)
+        ai_engine.reload_rules()
+
+    def write(self, content):
+        with open(self.path, 'w') as fh:
+            fh.write(content if isinstance(content, str) else json.dumps(content))
+        self.mtime += 10  # the next file always looks changed, whatever the clock's resolution
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def rules(self, action):
+        return {'suggestions': {'tip': {'action': action, 'confidence': 0.5}},
+                'rules': [{'otherwise': True, 'suggest': 'tip'}]}
+
+    def actions(self):
+        return [s['action'] for s in ai_engine.suggest_actions({})['suggestions']]
+
+    def test_changed_file_is_picked_up(self):
+        self.write(self.rules('Water in the morning'))
+        self.assertEqual(self.actions(), ['Water in the morning'])
+        self.write(self.rules('Water in the evening'))
+        self.assertEqual(self.actions(), ['Water in the evening'])
+
+    def test_invalid_file_keeps_previous_rules(self):
+        self.write(self.rules('Water in the morning'))
+        engine = ai_engine.get_engine()
+        bad = ['{"rules": [', {'suggestions': {}, 'rules': [{'suggest': 'missing'}]},
+               {'suggestions': {'tip': {'action': 'x', 'confidence': 1}},
+                'rules': [{'input': 'soil_ph', 'gt': 'six', 'suggest': 'tip'}]}]
+        for content in bad:
+            with self.subTest(content=content):
+                self.write(content)
+                with self.assertLogs('App.ai_engine', 'ERROR'):
+                    self.assertIs(ai_engine.get_engine(), engine)
+        os.remove(self.path)
+        with self.assertLogs('App.ai_engine', 'ERROR'):
+            self.assertIs(ai_engine.get_engine(), engine)
+        self.write(self.rules('Water in the evening'))
+        self.assertEqual(self.actions(), ['Water in the evening'])
+
+    def test_check_interval_limits_stats(self):
+        self.write(self.rules('Water in the morning'))
+        self.assertEqual(self.actions(), ['Water in the morning'])
+        with override_settings(AI_RULES_CHECK_INTERVAL=3600):
+            self.write(self.rules('Water in the evening'))
+            self.assertEqual(self.actions(), ['Water in the morning'])
+            ai_engine.reload_rules()
+            self.assertEqual(self.actions(), ['Water in the evening'])
+
+
+class SuggestCacheTests(TestCase):
+    """App.suggest_cache answers exactly what the engine would."""
+    ECHO_RULES = {
+        'suggestions': {'crop': {'action': 'Crop tip', 'reason': 'growing {value}', 'confidence': 0.5},
+                        'soil': {'action': 'Soil tip', 'reason': 'soil is clay', 'confidence': 0.5}},
+        'rules': [{'input': 'crop', 'keywords': ['mirchi'], 'suggest': 'crop'},
+                  {'input': 'soil_type', 'keywords': ['clay'], 'suggest': 'soil'}],
+    }
+
+    def test_hits_and_misses(self):
+        cache = SuggestionCache()
+        payload = {'soil_ph': 5.2, 'moisture': 12.5, 'crop': 'mirchi'}
+        first = cache.suggestions(payload)
+        first[0]['action'] = 'changed by the caller'
+        self.assertEqual(cache.suggestions(payload), suggest_actions(payload)['suggestions'])
+        cache.suggestions({**payload, 'unused': 'not an input'})
+        cache.suggestions({**payload, 'soil_ph': 5})  # 5 and 5.0 render differently
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 2, 2))
+
+    def test_ttl_expiry(self):
+        cache = SuggestionCache(ttl=10)
+        with patch('App.suggest_cache.time.monotonic', return_value=100.0):
+            cache.suggestions({'soil_ph': 7.0})
+        with patch('App.suggest_cache.time.monotonic', return_value=109.0):
+            cache.suggestions({'soil_ph': 7.0})
+        with patch('App.suggest_cache.time.monotonic', return_value=110.0):
+            cache.suggestions({'soil_ph': 7.0})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 2, 1))
+
+    def test_lru_eviction(self):
+        cache = SuggestionCache(maxsize=2)
+        for ph in (5.0, 6.0, 5.0, 7.0):  # 5.0 is used again, so 6.0 is the oldest
+            cache.suggestions({'soil_ph': ph})
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache.suggestions({'soil_ph': 5.0})
+        cache.suggestions({'soil_ph': 6.0})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 4, 2))
+
+    def test_key_normalisation(self):
+        cache = SuggestionCache(precision=1)
+        for payload in ({'soil_ph': 5.46, 'soil_type': 'Clay'}, {'soil_ph': 5.54, 'soil_type': 'CLAY'}):
+            self.assertEqual(cache.suggestions(payload), suggest_actions({**payload, 'soil_ph': 5.5})['suggestions'])
+        self.assertEqual(cache.stats()['hits'], 1)
+        # Unhashable values go to the engine uncached, and fail there as they would uncached
+        with self.assertRaises(AttributeError):
+            cache.suggestions({'crop': ['mirchi']})
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_repeated_text_keeps_its_case(self):
+        engine = RuleEngine(self.ECHO_RULES)
+        cache = SuggestionCache()
+        with patch('App.suggest_cache.get_engine', return_value=engine):
+            for crop in ('Mirchi', 'MIRCHI', 'mirchi'):
+                for soil_type in ('Clay', 'clay'):
+                    payload = {'crop': crop, 'soil_type': soil_type}
+                    self.assertEqual(cache.suggestions(payload), engine.suggest(payload))
+        # Crops are keyed as sent, soil types case-insensitively
+        self.assertEqual((cache.stats()['misses'], cache.stats()['hits']), (3, 3))
+
+    def test_reloaded_rules_empty_the_cache(self):
+        cache = SuggestionCache()
+        cache.suggestions({'soil_ph': 5.0})
+        with patch('App.suggest_cache.get_engine', return_value=RuleEngine(self.ECHO_RULES)):
+            self.assertEqual(cache.suggestions({'soil_ph': 5.0}), [])
+        self.assertEqual(cache.stats()['size'], 1)
@@ -0,0 +1,85 @@
+"""Parsing of client-supplied timestamps and ``?from=&to=`` range filters.
+
+``date_recorded`` used to be free text; these helpers turn the formats that
+were accepted in practice into aware datetimes so the column can be a real,
+indexed ``DateTimeField``.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Non-ISO formats seen in uploaded lab reports and meter logs
+FALLBACK_FORMATS = (
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+)
+
+
+class TimestampError(ValueError):
+    """Raised for a value that is not a recognisable timestamp."""
+
+
+def parse_timestamp(value):
+    """Parse ``value`` into an aware datetime, or return ``None`` if unparseable.
+
+    Naive values are taken to be in the default time zone; date-only values
+    map to midnight.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif not isinstance(value, str):
+        return None
+    else:
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value.replace('Z', '+00:00'))
+            if parsed is None:
+                day = parse_date(value)
+                parsed = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            for fmt in FALLBACK_FORMATS:
+                try:
+                    parsed = datetime.strptime(value, fmt)
+                    break
+                except ValueError:
+                    continue
+        if parsed is None:
+            return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def require_timestamp(name, value):
+    """Like :func:`parse_timestamp` but raise :class:`TimestampError` on bad input."""
+    parsed = parse_timestamp(value)
+    if parsed is None:
+        raise TimestampError(f'{name} must be an ISO 8601 date or datetime')
+    return parsed
+
+
+def coerce_timestamp(name, value, default=None):
+    """Client value for a nullable timestamp field: empty gives ``default``."""
+    if value is None or value == '':
+        return default
+    return require_timestamp(name, value)
+
+
+def filter_range(queryset, request, field='date_recorded'):
+    """Apply ``?from=`` (inclusive) and ``?to=`` (exclusive) to ``field``."""
+    start = request.GET.get('from')
+    end = request.GET.get('to')
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': require_timestamp('from', start)})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': require_timestamp('to', end)})
+    return queryset
@@ -1,5 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+
+def api(name):
+    """``views.<name>``, or its native async version when ``ASYNC_VIEWS`` is on (ASGI)."""
+    module = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
+    return getattr(module, name)
+
 
 urlpatterns = [
     # Frontend pages
@@ -16,8 +24,19 @@ urlpatterns = [
     path('openapi.json', views.openapi_schema, name='openapi_schema'),
     path('docs/', views.docs, name='docs'),
     
+    # Response cache statistics
+    path('api/cache/', views.response_cache_stats, name='response_cache_stats'),
+
+    # Prometheus metrics (App.metrics)
+    path('metrics', views.metrics, name='metrics'),
+
+    # Database connection pool statistics
+    path('api/db/', views.database_pool_stats, name='database_pool_stats'),
+
     # Health check endpoint
     path('api/health/', views.health, name='health'),
+    path('api/health/live/', views.health_live, name='health_live'),
+    path('api/health/ready/', views.health_ready, name='health_ready'),
     
     # Admin views
     path('admin/', views.admin_dashboard, name='admin_dashboard'),
@@ -27,22 +46,36 @@ urlpatterns = [
     path('admin/water/', views.admin_water, name='admin_water'),
     
     # Farmer endpoints
-    path('api/farmers/', views.farmer_list_create, name='farmer_list_create'),
-    path('api/farmers/<int:farmer_id>/', views.farmer_detail, name='farmer_detail'),
+    path('api/farmers/', api('farmer_list_create'), name='farmer_list_create'),
+    path('api/farmers/<int:farmer_id>/', api('farmer_detail'), name='farmer_detail'),
+    path('api/farmers/<int:farmer_id>/suggest/', views.farmer_suggest, name='farmer_suggest'),
+    path('api/farmers/<int:farmer_id>/series/<str:metric>/', views.farmer_series, name='farmer_series'),
     
     # Soil record endpoints
-    path('api/records/soil/', views.soil_record_list_create, name='soil_record_list_create'),
-    path('api/records/soil/<int:record_id>/', views.soil_record_detail, name='soil_record_detail'),
+    path('api/records/soil/', api('soil_record_list_create'), name='soil_record_list_create'),
+    path('api/records/soil/<int:record_id>/', api('soil_record_detail'), name='soil_record_detail'),
     
     # Water record endpoints
-    path('api/records/water/', views.water_record_list_create, name='water_record_list_create'),
-    path('api/records/water/<int:record_id>/', views.water_record_detail, name='water_record_detail'),
+    path('api/records/water/', api('water_record_list_create'), name='water_record_list_create'),
+    path('api/records/water/<int:record_id>/', api('water_record_detail'), name='water_record_detail'),
     
     # Crop record endpoints
-    path('api/records/crop/', views.crop_record_list_create, name='crop_record_list_create'),
-    path('api/records/crop/<int:record_id>/', views.crop_record_detail, name='crop_record_detail'),
-    path('api/records/crops/', views.crop_record_list_create, name='crop_records_list'),  # Alias for compatibility
+    path('api/records/crop/', api('crop_record_list_create'), name='crop_record_list_create'),
+    path('api/records/crop/<int:record_id>/', api('crop_record_detail'), name='crop_record_detail'),
+    path('api/records/crops/', api('crop_record_list_create'), name='crop_records_list'),  # Alias for compatibility
+
+    # Bulk ingestion (JSON array body)
+    path('api/records/<str:kind>/bulk/', views.record_bulk_create, name='record_bulk_create'),
+
+    # Streaming exports (?format=ndjson|json)
+    path('api/records/<str:kind>/export/', views.record_export, name='record_export'),
     
     # AI suggestions endpoint
-    path('api/suggest/', views.suggest, name='suggest'),
+    path('api/suggest/', api('suggest'), name='suggest'),
+    path('api/suggest/batch/', views.suggest_batch, name='suggest_batch'),
+    path('api/suggest/cache/', views.suggest_cache_stats, name='suggest_cache_stats'),
+
+    # Analytics rollups (?granularity=day|month|season)
+    path('api/analytics/', views.analytics_index, name='analytics_index'),
+    path('api/analytics/<str:metric>/', views.analytics_rollups, name='analytics_rollups'),
 ]
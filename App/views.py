@@ -1,26 +1,107 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.serializers import serialize
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 import json
-from datetime import datetime
 
-from .models import Farmer, CropRecord, SoilRecord, WaterRecord
-from .ai_engine import suggest_actions
-from .openapi import OPENAPI_SCHEMA
+from .models import Farmer, CropRecord, Rollup, SoilRecord, WaterRecord
+from .ai_engine import suggest_actions_batch
+from .analytics import GRANULARITIES, METRIC_NAMES, serialize_rollup
+from .openapi import ENCODED_SCHEMA
+from .conditional import conditional
+from .counters import counts, exact_counts
+from .db_pool import pool_stats
+from .export import stream_json, stream_ndjson
+from .health import liveness, readiness
+from .ingest import ingest, max_items
+from .latest import suggestion_payload as latest_payload
+from .metrics import collect as collect_metrics, render as render_metrics
+from .pagination import PaginationError, paginate
+from .renderers import FastJsonResponse
+from .response_cache import cache_stats, cached_response
+from .series import DEFAULT_POINTS, METHODS as SERIES_METHODS, max_points, series
+from .serializers import RECORD_MODELS, SORT_FIELDS, get_serialized, projected, serialize_many
+from .signals import delete_farmer
+from .sqlite import retry_on_lock
+from .suggest_cache import cached_suggest_actions, get_cache
+from .timestamps import TimestampError, coerce_timestamp, filter_range
+
+
+def page_response(request, out, next_cursor):
+    """List response for one keyset page.
+
+    The body stays a bare JSON array for existing clients; the cursor for
+    the following page travels in the ``X-Next-Cursor`` and ``Link`` headers.
+    """
+    response = FastJsonResponse(out, safe=False)
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = f'<{request.path}?{params.urlencode()}>; rel="next"'
+    return response
+
+
+def list_queryset(request, model):
+    """Filtered projection behind a list response.
+
+    Raises ``ValueError`` (including ``TimestampError``) for a bad query
+    parameter.
+    """
+    queryset = projected(model)
+    farmer_id = request.GET.get('farmer_id')
+    crop_name = request.GET.get('crop_name')
+    if model is not Farmer:
+        queryset = filter_range(queryset, request)
+    if farmer_id and model is not Farmer:
+        if not farmer_id.isdigit():
+            raise ValueError('farmer_id must be an integer')
+        queryset = queryset.filter(farmer_id=int(farmer_id))
+    if crop_name and model is CropRecord:
+        queryset = queryset.filter(crop_name=crop_name)
+    return queryset
+
+
+def list_response(request, model):
+    """Serialize one keyset page of ``model`` in a single projected query."""
+    try:
+        rows, next_cursor = paginate(list_queryset(request, model), request, SORT_FIELDS[model])
+    except ValueError as e:  # PaginationError, TimestampError, bad farmer_id
+        return FastJsonResponse({'error': str(e)}, status=400)
+    return page_response(request, serialize_many(model, rows), next_cursor)
 
 
 @require_http_methods(["GET"])
 def health(request):
-    """Health check endpoint"""
-    return JsonResponse({'status': 'ok', 'time': 'now'})
+    """Health check endpoint (liveness)"""
+    return health_live(request)
+
+
+@require_http_methods(["GET", "HEAD"])
+def health_live(request):
+    """Liveness: the process is up and serving requests"""
+    response = FastJsonResponse(liveness())
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def health_ready(request):
+    """Readiness: databases, caches and connection pool within thresholds (503 otherwise)"""
+    ready, body = readiness()
+    response = FastJsonResponse(body, status=200 if ready else 503)
+    patch_cache_control(response, no_store=True)
+    return response
 
 
 @require_http_methods(["GET"])
 def index(request):
     """Root endpoint - provides service info"""
-    return JsonResponse({
+    return FastJsonResponse({
         'service': 'Smart Agriculture Backend',
         'status': 'running',
         'endpoints': ['/docs/', '/api/health', '/api/farmers', '/api/records/soil', '/api/suggest'],
@@ -30,7 +111,8 @@ def index(request):
 
 @require_http_methods(["GET"])
 def openapi_schema(request):
-    return JsonResponse(OPENAPI_SCHEMA)
+    """OpenAPI schema from bytes encoded once per process (gzip/brotli too)"""
+    return ENCODED_SCHEMA.response(request)
 
 
 def docs(request: HttpRequest) -> HttpResponse:
@@ -64,21 +146,28 @@ def admin_water(request: HttpRequest) -> HttpResponse:
 
 @require_http_methods(["GET"])
 def stats(request):
-    """Get counts of all records for dashboard display"""
+    """Get counts of all records for dashboard display.
+
+    Served from the incrementally maintained counters; ``?exact=1`` counts
+    the tables instead. Exact counts exist to see past counter drift, so
+    they bypass the counter-versioned validators and response cache.
+    """
+    if request.GET.get('exact') in ('1', 'true'):
+        return _stats_response(exact_counts)
+    return counted_stats(request)
+
+
+@conditional(Farmer, CropRecord, SoilRecord, WaterRecord)
+@cached_response()
+def counted_stats(request):
+    return _stats_response(counts)
+
+
+def _stats_response(count):
     try:
-        farmers_count = Farmer.objects.count()
-        crops_count = CropRecord.objects.count()
-        soil_count = SoilRecord.objects.count()
-        water_count = WaterRecord.objects.count()
-
-        return JsonResponse({
-            'farmers': farmers_count,
-            'crops': crops_count,
-            'soil': soil_count,
-            'water': water_count
-        })
+        return FastJsonResponse(count())
     except Exception as e:
-        return JsonResponse({
+        return FastJsonResponse({
             'error': str(e),
             'farmers': 0,
             'crops': 0,
@@ -90,11 +179,14 @@ def stats(request):
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
 def test(request):
-    return JsonResponse({'state': 'ok'}, status=400)
+    return FastJsonResponse({'state': 'ok'}, status=400)
 
 
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
+@retry_on_lock
+@conditional(Farmer)
+@cached_response()
 def farmer_list_create(request):
     """Create a new farmer (POST) or list all farmers (GET)"""
     if request.method == 'POST':
@@ -103,44 +195,40 @@ def farmer_list_create(request):
             name = data.get('name')
 
             if not name:
-                return JsonResponse({'error': 'name is required'}, status=400)
+                return FastJsonResponse({'error': 'name is required'}, status=400)
 
             farmer = Farmer.objects.create(
                 name=name,
                 phone=data.get('phone'),
                 location=data.get('location')
             )
-            return JsonResponse({
+            return FastJsonResponse({
                 'id': farmer.id,
                 'name': farmer.name
             }, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'GET':
-        farmers = Farmer.objects.all()
-        out = [{'id': f.id, 'name': f.name, 'phone': f.phone, 'region': f.location} for f in farmers]
-        return JsonResponse(out, safe=False)
+        return list_response(request, Farmer)
 
 
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
+@retry_on_lock
+@conditional(Farmer, lookup='farmer_id')
+@cached_response()
 def farmer_detail(request, farmer_id):
     """Get, update, or delete a specific farmer"""
+    if request.method == 'GET':
+        return FastJsonResponse(get_serialized(Farmer, farmer_id))
+
     farmer = get_object_or_404(Farmer, id=farmer_id)
 
-    if request.method == 'GET':
-        return JsonResponse({
-            'id': farmer.id,
-            'name': farmer.name,
-            'phone': farmer.phone,
-            'region': farmer.location
-        })
-
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         try:
             data = json.loads(request.body)
             farmer.name = data.get('name', farmer.name)
@@ -148,26 +236,29 @@ def farmer_detail(request, farmer_id):
             farmer.location = data.get('region', farmer.location)
             farmer.save()
 
-            return JsonResponse({
+            return FastJsonResponse({
                 'id': farmer.id,
                 'name': farmer.name
             }, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'DELETE':
         try:
-            farmer.delete()
-            return JsonResponse({'success': True}, status=200)
+            delete_farmer(farmer)
+            return FastJsonResponse({'success': True}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
+@retry_on_lock
+@conditional(SoilRecord)
+@cached_response()
 def soil_record_list_create(request):
     """Create a new soil record (POST) or list all soil records (GET)"""
     if request.method == 'POST':
@@ -181,74 +272,67 @@ def soil_record_list_create(request):
                 nitrogen=data.get('nitrogen'),
                 phosphorus=data.get('phosphorus'),
                 potassium=data.get('potassium'),
-                date_recorded=data.get('date_recorded') or datetime.now().isoformat()
+                date_recorded=coerce_timestamp('date_recorded', data.get('date_recorded'), timezone.now())
             )
-            return JsonResponse({'id': record.id}, status=201)
+            return FastJsonResponse({'id': record.id}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'GET':
-        records = SoilRecord.objects.all()
-        out = [{
-            'id': r.id,
-            'farmer_id': r.farmer.id,
-            'ph': r.ph,
-            'nitrogen': r.nitrogen,
-            'phosphorus': r.phosphorus,
-            'potassium': r.potassium,
-            'date_recorded': r.date_recorded
-        } for r in records]
-        return JsonResponse(out, safe=False)
+        return list_response(request, SoilRecord)
 
 
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
+@retry_on_lock
+@conditional(SoilRecord, lookup='record_id')
+@cached_response()
 def soil_record_detail(request, record_id):
     """Get, update, or delete a specific soil record"""
+    if request.method == 'GET':
+        return FastJsonResponse(get_serialized(SoilRecord, record_id))
+
     record = get_object_or_404(SoilRecord, id=record_id)
 
-    if request.method == 'GET':
-        return JsonResponse({
-            'id': record.id,
-            'farmer_id': record.farmer.id,
-            'ph': record.ph,
-            'nitrogen': record.nitrogen,
-            'phosphorus': record.phosphorus,
-            'potassium': record.potassium,
-            'date_recorded': record.date_recorded
-        })
-
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         try:
             data = json.loads(request.body)
-            record.farmer.id = data.get('farmer_id', record.farmer.id)
+            record.farmer_id = data.get('farmer_id', record.farmer_id)
             record.ph = data.get('ph', record.ph)
             record.nitrogen = data.get('nitrogen', record.nitrogen)
             record.phosphorus = data.get('phosphorus', record.phosphorus)
             record.potassium = data.get('potassium', record.potassium)
-            record.date_recorded = data.get('date_recorded', record.date_recorded)
+            if 'date_recorded' in data:
+                record.date_recorded = coerce_timestamp('date_recorded', data['date_recorded'])
             record.save()
 
-            return JsonResponse({'id': record.id}, status=200)
+            return FastJsonResponse({'id': record.id}, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'DELETE':
         try:
             record.delete()
-            return JsonResponse({'success': True}, status=200)
+            return FastJsonResponse({'success': True}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
+@retry_on_lock
+@conditional(WaterRecord)
+@cached_response()
 def water_record_list_create(request):
     """Create a new water record (POST) or list all water records (GET)"""
     if request.method == 'POST':
@@ -260,71 +344,66 @@ def water_record_list_create(request):
                 ph=data.get('ph'),
                 ec=data.get('ec'),
                 tds=data.get('tds'),
-                date_recorded=data.get('date_recorded') or datetime.now().isoformat()
+                date_recorded=coerce_timestamp('date_recorded', data.get('date_recorded'), timezone.now())
             )
-            return JsonResponse({'id': record.id}, status=201)
+            return FastJsonResponse({'id': record.id}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'GET':
-        records = WaterRecord.objects.all()
-        out = [{
-            'id': r.id,
-            'farmer_id': r.farmer.id,
-            'ph': r.ph,
-            'ec': r.ec,
-            'tds': r.tds,
-            'date_recorded': r.date_recorded
-        } for r in records]
-        return JsonResponse(out, safe=False)
+        return list_response(request, WaterRecord)
 
 
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
+@retry_on_lock
+@conditional(WaterRecord, lookup='record_id')
+@cached_response()
 def water_record_detail(request, record_id):
     """Get, update, or delete a specific water record"""
+    if request.method == 'GET':
+        return FastJsonResponse(get_serialized(WaterRecord, record_id))
+
     record = get_object_or_404(WaterRecord, id=record_id)
 
-    if request.method == 'GET':
-        return JsonResponse({
-            'id': record.id,
-            'farmer_id': record.farmer.id,
-            'ph': record.ph,
-            'ec': record.ec,
-            'tds': record.tds,
-            'date_recorded': record.date_recorded
-        })
-
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         try:
             data = json.loads(request.body)
-            record.farmer.id = data.get('farmer_id', record.farmer.id)
+            record.farmer_id = data.get('farmer_id', record.farmer_id)
             record.ph = data.get('ph', record.ph)
             record.ec = data.get('ec', record.ec)
             record.tds = data.get('tds', record.tds)
-            record.date_recorded = data.get('date_recorded', record.date_recorded)
+            if 'date_recorded' in data:
+                record.date_recorded = coerce_timestamp('date_recorded', data['date_recorded'])
             record.save()
 
-            return JsonResponse({'id': record.id}, status=200)
+            return FastJsonResponse({'id': record.id}, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'DELETE':
         try:
             record.delete()
-            return JsonResponse({'success': True}, status=200)
+            return FastJsonResponse({'success': True}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
+@retry_on_lock
+@conditional(CropRecord)
+@cached_response()
 def crop_record_list_create(request):
     """Create a new crop record (POST) or list all crop records (GET)"""
     if request.method == 'POST':
@@ -335,64 +414,110 @@ def crop_record_list_create(request):
                 farmer_id=data.get('farmer_id'),
                 crop_name=data.get('crop_name'),
                 yield_kg=data.get('yield_kg'),
-                date_recorded=data.get('date_recorded') or datetime.now().isoformat()
+                date_recorded=coerce_timestamp('date_recorded', data.get('date_recorded'), timezone.now())
             )
-            return JsonResponse({'id': record.id}, status=201)
+            return FastJsonResponse({'id': record.id}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'GET':
-        records = CropRecord.objects.all()
-        out = [{
-            'id': r.id,
-            'farmer_id': r.farmer.id,
-            'crop_name': r.crop_name,
-            'yield_kg': r.yield_kg,
-            'date_recorded': r.date_recorded
-        } for r in records]
-        return JsonResponse(out, safe=False)
+        return list_response(request, CropRecord)
 
 
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
+@retry_on_lock
+@conditional(CropRecord, lookup='record_id')
+@cached_response()
 def crop_record_detail(request, record_id):
     """Get, update, or delete a specific crop record"""
+    if request.method == 'GET':
+        return FastJsonResponse(get_serialized(CropRecord, record_id))
+
     record = get_object_or_404(CropRecord, id=record_id)
 
-    if request.method == 'GET':
-        return JsonResponse({
-            'id': record.id,
-            'farmer_id': record.farmer.id,
-            'crop_name': record.crop_name,
-            'yield_kg': record.yield_kg,
-            'date_recorded': record.date_recorded
-        })
-
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         try:
             data = json.loads(request.body)
-            record.farmer.id = data.get('farmer_id', record.farmer.id)
+            record.farmer_id = data.get('farmer_id', record.farmer_id)
             record.crop_name = data.get('crop_name', record.crop_name)
             record.yield_kg = data.get('yield_kg', record.yield_kg)
-            record.date_recorded = data.get('date_recorded', record.date_recorded)
+            if 'date_recorded' in data:
+                record.date_recorded = coerce_timestamp('date_recorded', data['date_recorded'])
             record.save()
 
-            return JsonResponse({'id': record.id}, status=200)
+            return FastJsonResponse({'id': record.id}, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+        except TimestampError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'DELETE':
         try:
             record.delete()
-            return JsonResponse({'success': True}, status=200)
+            return FastJsonResponse({'success': True}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def record_export(request, kind):
+    """Stream every soil/water/crop record as a JSON array or NDJSON"""
+    model = RECORD_MODELS.get(kind)
+    if model is None:
+        raise Http404(f'Unknown record kind: {kind}')
+
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt == 'ndjson':
+        response = StreamingHttpResponse(stream_ndjson(model), content_type='application/x-ndjson')
+    elif fmt == 'json':
+        response = StreamingHttpResponse(stream_json(model), content_type='application/json')
+    else:
+        return FastJsonResponse({'error': 'format must be json or ndjson'}, status=400)
+    response['Content-Disposition'] = f'attachment; filename="{kind}_records.{fmt}"'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@retry_on_lock
+def record_bulk_create(request, kind):
+    """Create many soil/water/crop records from a JSON array in one transaction"""
+    model = RECORD_MODELS.get(kind)
+    if model is None:
+        raise Http404(f'Unknown record kind: {kind}')
+
+    try:
+        items = json.loads(request.body)
+    except json.JSONDecodeError:
+        return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(items, list) or not items:
+        return FastJsonResponse({'error': 'Expected a non-empty JSON array of records'}, status=400)
+    if len(items) > max_items():
+        return FastJsonResponse({'error': f'At most {max_items()} records per request'}, status=413)
+
+    try:
+        results = ingest(model, items)
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+    created = sum(1 for r in results if r.get('id') is not None)
+    failed = len(results) - created
+    if not failed:
+        status = 201
+    elif created:
+        status = 207
+    else:
+        status = 400
+    return FastJsonResponse({'created': created, 'failed': failed, 'results': results}, status=status)
 
 
 @csrf_exempt
@@ -401,12 +526,143 @@ def suggest(request):
     """Get AI suggestions for agricultural actions"""
     try:
         data = json.loads(request.body)
-        result = suggest_actions(data)
-        return JsonResponse(result)
+        result = cached_suggest_actions(data)
+        return FastJsonResponse(result)
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def farmer_suggest(request, farmer_id):
+    """Get AI suggestions for a farmer from their latest stored readings"""
+    payload = latest_payload(farmer_id, timezone.now())
+    if payload is None:
+        get_object_or_404(Farmer.objects.only('id'), id=farmer_id)
+        payload = {}
+    try:
+        result = cached_suggest_actions(payload)
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+    result['farmer_id'] = farmer_id
+    result['inputs'] = payload
+    return FastJsonResponse(result)
+
+
+@require_http_methods(["GET"])
+def farmer_series(request, farmer_id, metric):
+    """Downsampled time series of one metric for charting.
+
+    ``?points=N`` caps the response at N samples however many readings the
+    farmer has; ``?method=lttb|minmax`` picks the downsampling.
+    """
+    if metric not in METRIC_NAMES:
+        return FastJsonResponse({'error': f'Unknown metric {metric!r}'}, status=404)
+    method = request.GET.get('method', 'lttb')
+    if method not in SERIES_METHODS:
+        return FastJsonResponse({'error': f'method must be one of {", ".join(SERIES_METHODS)}'}, status=400)
+    try:
+        points = int(request.GET.get('points', DEFAULT_POINTS))
+    except ValueError:
+        return FastJsonResponse({'error': 'points must be an integer'}, status=400)
+    if points < 3:
+        return FastJsonResponse({'error': 'points must be at least 3'}, status=400)
+    points = min(points, max_points())
+    try:
+        start = coerce_timestamp('from', request.GET.get('from'))
+        end = coerce_timestamp('to', request.GET.get('to'))
+    except TimestampError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+
+    get_object_or_404(Farmer.objects.only('id'), id=farmer_id)
+    try:
+        return FastJsonResponse(series(farmer_id, metric, points, method, start, end))
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def response_cache_stats(request):
+    """Hit/miss/eviction counters of the API response cache"""
+    return FastJsonResponse(cache_stats())
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Per-route request metrics in Prometheus text format (all workers with METRICS_DIR)"""
+    return HttpResponse(render_metrics(collect_metrics()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_http_methods(["GET"])
+def database_pool_stats(request):
+    """Connection pool (or persistent connection) settings and counters per database"""
+    return FastJsonResponse(pool_stats())
+
+
+@require_http_methods(["GET"])
+def suggest_cache_stats(request):
+    """Hit/miss counters of the /api/suggest/ response cache"""
+    return FastJsonResponse(get_cache().stats())
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def suggest_batch(request):
+    """Get AI suggestions for many plots from columnar inputs"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return FastJsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict) or not all(isinstance(v, list) or v is None for v in data.values()):
+        return FastJsonResponse({'error': 'Expected an object of equal-length arrays'}, status=400)
+
+    limit = getattr(settings, 'SUGGEST_BATCH_MAX', 100000)
+    if any(len(v or []) > limit for v in data.values()):
+        return FastJsonResponse({'error': f'At most {limit} plots per request'}, status=413)
+
+    try:
+        return FastJsonResponse(suggest_actions_batch(data))
+    except ValueError as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return FastJsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def analytics_index(request):
+    """Metrics and granularities available from the rollup tables"""
+    return FastJsonResponse({'metrics': list(METRIC_NAMES), 'granularities': list(GRANULARITIES)})
+
+
+@require_http_methods(["GET"])
+def analytics_rollups(request, metric):
+    """Per-farmer count/total/average/min/max of one metric per period.
+
+    Reads only the rollup table; newest periods first, keyset paginated.
+    """
+    if metric not in METRIC_NAMES:
+        return FastJsonResponse({'error': f'Unknown metric {metric!r}'}, status=404)
+    granularity = request.GET.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return FastJsonResponse({'error': f'granularity must be one of {", ".join(GRANULARITIES)}'}, status=400)
+
+    queryset = Rollup.objects.filter(metric=metric, granularity=granularity).values(
+        'id', 'farmer_id', 'period', 'crop_name', 'count', 'total', 'minimum', 'maximum')
+    farmer_id = request.GET.get('farmer_id')
+    crop_name = request.GET.get('crop_name')
+    try:
+        if farmer_id:
+            if not farmer_id.isdigit():
+                return FastJsonResponse({'error': 'farmer_id must be an integer'}, status=400)
+            queryset = queryset.filter(farmer_id=int(farmer_id))
+        if crop_name:
+            queryset = queryset.filter(crop_name=crop_name)
+        queryset = filter_range(queryset, request, field='period')
+        rows, next_cursor = paginate(queryset, request, 'period')
+    except (PaginationError, TimestampError) as e:
+        return FastJsonResponse({'error': str(e)}, status=400)
+    return page_response(request, [serialize_rollup(row, granularity) for row in rows], next_cursor)
 
 
 # Frontend views